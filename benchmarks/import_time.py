@@ -0,0 +1,92 @@
+"""
+Cold-start import benchmark for the Streamlit pages.
+
+Runs `python -X importtime` in a fresh interpreter per module, several
+times, and reports the median total import time of each module along with
+whether it pulled in the heavy OpenAI and Pinecone client packages.
+Arguments ending in `.py` stand for every module that script imports, which
+is what `streamlit run` pays before rendering the page.
+
+Usage:
+    python benchmarks/import_time.py [--repeat 5] [module | script.py ...]
+"""
+
+import ast
+import subprocess
+import sys
+from argparse import ArgumentParser
+from pathlib import Path
+from statistics import median
+from typing import List, Set, Tuple
+
+PROJECT_ROOT: Path = Path(__file__).resolve().parent.parent
+
+DEFAULT_MODULES: Tuple[str, ...] = (
+    "streamlit_app.py",
+    "pages/chat.py",
+    "config.envs",
+    "tools.weather",
+    "tools.web_search",
+    "llms.openai",
+    "chains.web_search",
+    "components.chat_ui",
+)
+HEAVY_PACKAGES: Tuple[str, ...] = ("langchain_openai", "openai", "pinecone")
+
+
+def get_script_imports(script: str) -> List[str]:
+    tree = ast.parse((PROJECT_ROOT / script).read_text())
+    modules: List[str] = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            modules.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module:
+            modules.append(node.module)
+    return modules
+
+
+def measure_import(target: str) -> Tuple[float, List[str]]:
+    """Return the total import time in ms and the heavy packages loaded."""
+    modules: List[str] = (
+        get_script_imports(target) if target.endswith(".py") else [target]
+    )
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {', '.join(modules)}"],
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    # Self times of every imported module add up to the total import time,
+    # interpreter startup imports included
+    total_us: int = 0
+    imported: Set[str] = set()
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, _, name = line.removeprefix("import time:").split("|")
+        total_us += int(self_us)
+        imported.add(name.strip())
+
+    heavy: List[str] = [package for package in HEAVY_PACKAGES if package in imported]
+    return total_us / 1000, heavy
+
+
+def main() -> None:
+    parser = ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("modules", nargs="*", default=DEFAULT_MODULES)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'module':<24} {'median ms':>10}  heavy packages")
+    for module in args.modules:
+        runs = [measure_import(module) for _ in range(args.repeat)]
+        heavy: List[str] = runs[-1][1]
+        print(
+            f"{module:<24} {median(run[0] for run in runs):>10.1f}  "
+            f"{', '.join(heavy) or '-'}"
+        )
+
+
+if __name__ == "__main__":
+    main()
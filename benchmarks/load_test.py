@@ -0,0 +1,425 @@
+"""
+Concurrent load test for the chain response streams.
+
+Simulates N chat sessions at once. Each session sends a few turns drawn
+from a mix of small-talk, web, weather, combined and follow-up queries, with
+its chat history growing turn by turn. The report covers throughput,
+TTFB and total latency percentiles, error rate, peak RSS and peak thread
+count. Several session counts can be run in one go to see where latency
+or memory starts to climb.
+
+With `--backend fake` (the default) the LLMs and tools are the latency
+simulating fakes from llms.fake and tools.fake, so no network or API keys
+are needed. `--backend real` uses the OpenAI models and the live tools.
+The orchestrator decision cache is off unless `--orchestrator-cache` is
+given, since sessions repeat queries often enough for cache hits to hide
+orchestrator latency; it is cleared before each session count is run.
+
+Usage:
+    python -m benchmarks.load_test [--sessions 10,25,50] [--turns 3]
+        [--chain mixed] [--backend fake] [--orchestrator-cache]
+        [--json report.json]
+"""
+
+import json
+import resource
+import sys
+import threading
+from argparse import ArgumentParser
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from dataclasses import dataclass, field
+from pathlib import Path
+from random import Random
+from time import perf_counter, sleep
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+from unittest.mock import patch
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+
+from chains.history import (
+    ChatHistoryManager,
+    ORCHESTRATOR_HISTORY_BUDGET,
+    SUMMARIZER_HISTORY_BUDGET,
+)
+from chains.orchestrator_cache import orchestrator_cache
+from chains.types import ChainConfig, ChainInputs
+from chains.web_search import (
+    get_multi_web_search_chain_response_stream,
+    get_simple_chain_response_stream,
+    get_single_web_search_chain_response_stream,
+)
+from llms.fake import LatencyFakeChatModel
+from tools.fake import FakeSearchTools, LatencyDistribution
+
+ChainResponseStream = Callable[[ChainConfig, ChainInputs], Iterator[str]]
+
+CHAIN_FUNCTIONS: Dict[str, ChainResponseStream] = {
+    "simple": get_simple_chain_response_stream,
+    "single_task": get_single_web_search_chain_response_stream,
+    "multi_task": get_multi_web_search_chain_response_stream,
+}
+
+TOPICS: Tuple[str, ...] = (
+    "the SpaceX Starship program",
+    "the latest Python release",
+    "electric vehicle sales",
+    "the Champions League final",
+)
+CITIES: Tuple[str, ...] = ("Paris", "Tokyo", "Austin, Texas", "Nairobi")
+QUERY_MIX: Tuple[Tuple[str, str], ...] = (
+    ("small_talk", "Hi there, how are you today?"),
+    ("web", "What is the latest news about {topic}?"),
+    ("weather", "What's the weather like in {city} right now?"),
+    ("multi", "What's new with {topic}, and how is the weather in {city}?"),
+    ("follow_up", "Can you tell me more about that?"),
+)
+
+FAKE_SINGLE_TASK_RESPONSES: Tuple[str, ...] = (
+    '{"should_search_web": true, "should_search_weather": false, '
+    '"web_query": "latest news", "web_query_count": 3, "weather_query": ""}',
+    '{"should_search_web": false, "should_search_weather": true, '
+    '"web_query": "", "web_query_count": 0, "weather_query": "Paris"}',
+)
+FAKE_MULTI_TASK_RESPONSES: Tuple[str, ...] = (
+    '{"should_search_web": true, "web_tasks": [{"query": "latest news", '
+    '"query_count": 3}, {"query": "recent analysis", "query_count": 5}], '
+    '"should_search_weather": true, "weather_tasks": [{"location": "Paris"}]}',
+    '{"should_search_web": false, "web_tasks": [], '
+    '"should_search_weather": true, "weather_tasks": [{"location": "Tokyo"}, '
+    '{"location": "Nairobi"}]}',
+)
+FAKE_SUMMARY: str = " ".join(
+    ["Here", "is", "a", "short", "answer", "with", "sources."] * 20
+)
+
+
+@dataclass(frozen=True)
+class TurnResult:
+    session: int
+    turn: int
+    chain: str
+    query_type: str
+    ttfb: Optional[float]
+    total: float
+    error: Optional[str] = None
+
+
+@dataclass
+class LoadReport:
+    sessions: int
+    turns: int
+    wall_time: float
+    peak_rss_mb: float
+    peak_threads: int
+    results: List[TurnResult] = field(default_factory=list)
+
+    def summarize(self) -> Dict[str, object]:
+        succeeded: List[TurnResult] = [r for r in self.results if r.error is None]
+        ttfbs: List[float] = [r.ttfb for r in succeeded if r.ttfb is not None]
+        totals: List[float] = [r.total for r in succeeded]
+        return {
+            "sessions": self.sessions,
+            "turns": len(self.results),
+            "wall_time_s": round(self.wall_time, 3),
+            "throughput_turns_per_s": round(len(succeeded) / self.wall_time, 3),
+            "error_rate": round(1 - len(succeeded) / max(len(self.results), 1), 4),
+            "ttfb_s": get_percentiles(ttfbs),
+            "total_s": get_percentiles(totals),
+            "peak_rss_mb": round(self.peak_rss_mb, 1),
+            "peak_threads": self.peak_threads,
+        }
+
+
+def get_percentiles(
+    values: Sequence[float], percentiles: Sequence[int] = (50, 95, 99)
+) -> Dict[str, Optional[float]]:
+    ordered: List[float] = sorted(values)
+    if not ordered:
+        return {f"p{p}": None for p in percentiles}
+    # Nearest-rank percentiles
+    return {
+        f"p{p}": round(ordered[max(-(-p * len(ordered) // 100) - 1, 0)], 4)
+        for p in percentiles
+    }
+
+
+def read_rss_mb() -> Optional[float]:
+    # Current RSS is only exposed on Linux; elsewhere the peak is reported
+    try:
+        with open("/proc/self/statm") as statm:
+            pages: int = int(statm.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+    return pages * resource.getpagesize() / 2**20
+
+
+def get_peak_rss_mb() -> float:
+    max_rss: int = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    return max_rss / 2**20 if sys.platform == "darwin" else max_rss / 2**10
+
+
+class ResourceSampler:
+    """Samples RSS and the live thread count in the background."""
+
+    def __init__(self, interval: float = 0.05) -> None:
+        self.interval: float = interval
+        self.peak_rss_mb: float = 0.0
+        self.peak_threads: int = 0
+        self._rss_sampled: bool = False
+        self._stopped: threading.Event = threading.Event()
+        self._thread: threading.Thread = threading.Thread(
+            target=self._sample, name="resource-sampler", daemon=True
+        )
+
+    def _sample(self) -> None:
+        while True:
+            rss_mb: Optional[float] = read_rss_mb()
+            if rss_mb is not None:
+                self.peak_rss_mb = max(self.peak_rss_mb, rss_mb)
+                self._rss_sampled = True
+            self.peak_threads = max(self.peak_threads, threading.active_count())
+            if self._stopped.wait(self.interval):
+                return
+
+    def __enter__(self) -> "ResourceSampler":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._stopped.set()
+        self._thread.join()
+        # The process-wide peak would carry earlier, larger runs into this
+        # one, so it is only used where the current RSS cannot be read
+        if not self._rss_sampled:
+            self.peak_rss_mb = get_peak_rss_mb()
+
+
+def make_query(rng: Random, history: Sequence[BaseMessage]) -> Tuple[str, str]:
+    query_mix = QUERY_MIX if history else QUERY_MIX[:-1]
+    query_type, template = rng.choice(query_mix)
+    return query_type, template.format(
+        topic=rng.choice(TOPICS), city=rng.choice(CITIES)
+    )
+
+
+def run_session(
+    session: int,
+    chains: Sequence[str],
+    configs: Dict[str, ChainConfig],
+    turns: int,
+    seed: int,
+    think_time: float,
+) -> List[TurnResult]:
+    rng: Random = Random(f"{seed}:{session}")
+    history: List[BaseMessage] = []
+    history_manager: ChatHistoryManager = ChatHistoryManager()
+    results: List[TurnResult] = []
+
+    for turn in range(turns):
+        chain: str = rng.choice(chains)
+        query_type, user_query = make_query(rng, history)
+        # Rendered the way the pages do, under the same history budgets
+        inputs: ChainInputs = ChainInputs(
+            user_query=user_query,
+            chat_history=history_manager.render(history, SUMMARIZER_HISTORY_BUDGET),
+            orchestrator_chat_history=history_manager.render(
+                history, ORCHESTRATOR_HISTORY_BUDGET
+            ),
+        )
+
+        start: float = perf_counter()
+        ttfb: Optional[float] = None
+        chunks: List[str] = []
+        error: Optional[str] = None
+        try:
+            for chunk in CHAIN_FUNCTIONS[chain](config=configs[chain], inputs=inputs):
+                if ttfb is None:
+                    ttfb = perf_counter() - start
+                chunks.append(chunk)
+        except Exception as exception:
+            error = f"{type(exception).__name__}: {exception}"
+        results.append(
+            TurnResult(
+                session=session,
+                turn=turn,
+                chain=chain,
+                query_type=query_type,
+                ttfb=ttfb,
+                total=perf_counter() - start,
+                error=error,
+            )
+        )
+
+        history.append(HumanMessage(user_query))
+        history.append(AIMessage("".join(chunks)))
+        if think_time:
+            sleep(rng.uniform(0, 2 * think_time))
+    return results
+
+
+def run_load_test(
+    sessions: int,
+    turns: int,
+    chains: Sequence[str],
+    configs: Dict[str, ChainConfig],
+    seed: int = 0,
+    think_time: float = 0.0,
+) -> LoadReport:
+    """Run `sessions` concurrent sessions of `turns` turns each."""
+    with ResourceSampler() as sampler:
+        start: float = perf_counter()
+        with ThreadPoolExecutor(
+            max_workers=sessions, thread_name_prefix="load-session"
+        ) as executor:
+            futures = [
+                executor.submit(
+                    run_session, session, chains, configs, turns, seed, think_time
+                )
+                for session in range(sessions)
+            ]
+            results: List[TurnResult] = [
+                result for future in futures for result in future.result()
+            ]
+        wall_time: float = perf_counter() - start
+
+    return LoadReport(
+        sessions=sessions,
+        turns=turns,
+        wall_time=wall_time,
+        peak_rss_mb=sampler.peak_rss_mb,
+        peak_threads=sampler.peak_threads,
+        results=results,
+    )
+
+
+def make_fake_configs(
+    orchestrator_ttfb: float = 0.3,
+    summarizer_ttfb: float = 0.2,
+    inter_token_latency: float = 0.01,
+    use_orchestrator_cache: bool = False,
+) -> Dict[str, ChainConfig]:
+    def make_config(orchestrator_responses: Sequence[str]) -> ChainConfig:
+        return ChainConfig(
+            orchestrator_llm=LatencyFakeChatModel(
+                responses=list(orchestrator_responses),
+                ttfb=orchestrator_ttfb,
+                inter_token_latency=inter_token_latency / 4,
+                model_name="fake-orchestrator",
+            ),
+            summarizer_llm=LatencyFakeChatModel(
+                responses=[FAKE_SUMMARY],
+                ttfb=summarizer_ttfb,
+                inter_token_latency=inter_token_latency,
+                model_name="fake-summarizer",
+            ),
+            use_orchestrator_cache=use_orchestrator_cache,
+        )
+
+    return {
+        "simple": make_config(FAKE_SINGLE_TASK_RESPONSES),
+        "single_task": make_config(FAKE_SINGLE_TASK_RESPONSES),
+        "multi_task": make_config(FAKE_MULTI_TASK_RESPONSES),
+    }
+
+
+def make_real_configs(use_orchestrator_cache: bool = False) -> Dict[str, ChainConfig]:
+    from llms.openai import get_openai_lite_model, get_openai_regular_model
+
+    config = ChainConfig(
+        orchestrator_llm=get_openai_regular_model(),
+        summarizer_llm=get_openai_lite_model(),
+        use_orchestrator_cache=use_orchestrator_cache,
+    )
+    return {chain: config for chain in CHAIN_FUNCTIONS}
+
+
+def patch_fake_tools(stack: ExitStack, seed: int) -> None:
+    fake_tools = FakeSearchTools(
+        web_latency=LatencyDistribution(median=0.6, sigma=0.5),
+        weather_latency=LatencyDistribution(median=0.25, sigma=0.3),
+        seed=seed,
+    )
+    for target, fake in fake_tools.get_patch_targets().items():
+        stack.enter_context(patch(target, fake))
+
+
+def format_report(summary: Dict[str, object]) -> str:
+    ttfb: Dict[str, float] = summary["ttfb_s"]
+    total: Dict[str, float] = summary["total_s"]
+    return (
+        f"{summary['sessions']:>8} {summary['turns']:>6} "
+        f"{summary['throughput_turns_per_s']:>9.2f} "
+        f"{summary['error_rate']:>7.2%} "
+        f"{ttfb['p50'] or 0:>7.3f} {ttfb['p95'] or 0:>7.3f} {ttfb['p99'] or 0:>7.3f} "
+        f"{total['p50'] or 0:>7.3f} {total['p95'] or 0:>7.3f} "
+        f"{summary['peak_rss_mb']:>8.1f} {summary['peak_threads']:>7}"
+    )
+
+
+def main() -> None:
+    parser = ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--sessions",
+        default="10,25,50",
+        help="Comma-separated concurrent session counts, run in order",
+    )
+    parser.add_argument("--turns", type=int, default=3)
+    parser.add_argument(
+        "--chain", choices=[*CHAIN_FUNCTIONS, "mixed"], default="mixed"
+    )
+    parser.add_argument("--backend", choices=["fake", "real"], default="fake")
+    parser.add_argument(
+        "--think-time", type=float, default=0.0, help="Mean pause between turns"
+    )
+    parser.add_argument(
+        "--orchestrator-cache",
+        action="store_true",
+        help="Serve repeated orchestrator decisions from the cache",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="Also write the summaries to this file")
+    args = parser.parse_args()
+
+    chains: List[str] = (
+        list(CHAIN_FUNCTIONS) if args.chain == "mixed" else [args.chain]
+    )
+    summaries: List[Dict[str, object]] = []
+    with ExitStack() as stack:
+        if args.backend == "fake":
+            configs = make_fake_configs(use_orchestrator_cache=args.orchestrator_cache)
+            patch_fake_tools(stack, args.seed)
+        else:
+            configs = make_real_configs(use_orchestrator_cache=args.orchestrator_cache)
+
+        print(
+            f"{'sessions':>8} {'turns':>6} {'turns/s':>9} {'errors':>7} "
+            f"{'ttfb50':>7} {'ttfb95':>7} {'ttfb99':>7} "
+            f"{'total50':>7} {'total95':>7} {'rss MB':>8} {'threads':>7}"
+        )
+        for sessions in (int(value) for value in args.sessions.split(",")):
+            # Each run starts cold, whether or not the cache is enabled
+            orchestrator_cache.clear()
+            report: LoadReport = run_load_test(
+                sessions,
+                args.turns,
+                chains,
+                configs,
+                seed=args.seed,
+                think_time=args.think_time,
+            )
+            summary: Dict[str, object] = report.summarize()
+            summary["orchestrator_cache"] = args.orchestrator_cache
+            summaries.append(summary)
+            print(format_report(summary), flush=True)
+            errors = sorted({r.error for r in report.results if r.error})
+            for error in errors[:3]:
+                print(f"         error: {error}")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(summaries, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""
+Recall and latency of dense, lexical and hybrid retrieval on a fixture corpus.
+
+Indexes the corpus in a LocalVectorStore and a BM25Index, runs every query
+through each retrieval mode and reports recall@k against the labelled
+relevant documents, the share of queries answered by the lexical fast path
+and the median and p95 latency of each stage. Embeddings are the offline
+hashing fakes with a simulated API latency, or OpenAI's with `--openai`.
+
+Usage:
+    python -m benchmarks.retrieval_eval [--k 3] [--embedding-latency 0.15]
+        [--corpus tests/fixtures/retrieval_corpus.jsonl]
+        [--queries tests/fixtures/retrieval_queries.jsonl] [--openai]
+"""
+
+import json
+from argparse import ArgumentParser
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from statistics import mean, median, quantiles
+from time import perf_counter
+from typing import Any, Callable, Dict, List, Tuple
+
+from langchain_core.embeddings import Embeddings
+
+from chains.metrics import MetricsRegistry
+from llms.fake import HashingFakeEmbeddings
+from tools.hybrid_retrieval import (
+    LEXICAL_PATH,
+    HybridRetriever,
+    RetrievalResult,
+    get_document_key,
+)
+from tools.lexical_index import BM25Index
+from tools.local_vectorstore import LocalVectorStore
+
+FIXTURES_PATH: Path = Path(__file__).resolve().parent.parent / "tests" / "fixtures"
+DEFAULT_CORPUS_PATH: Path = FIXTURES_PATH / "retrieval_corpus.jsonl"
+DEFAULT_QUERIES_PATH: Path = FIXTURES_PATH / "retrieval_queries.jsonl"
+# Median latency of a single-input OpenAI embeddings call
+DEFAULT_EMBEDDING_LATENCY: float = 0.15
+
+Retrieve = Callable[[str, int], RetrievalResult]
+
+
+@dataclass
+class ModeReport:
+    mode: str
+    recalls: List[float] = field(default_factory=list)
+    stage_times: Dict[str, List[float]] = field(default_factory=dict)
+    totals: List[float] = field(default_factory=list)
+    paths: Counter = field(default_factory=Counter)
+
+    @property
+    def recall(self) -> float:
+        return mean(self.recalls) if self.recalls else 0.0
+
+    @property
+    def fast_path_rate(self) -> float:
+        total: int = sum(self.paths.values())
+        return self.paths[LEXICAL_PATH] / total if total else 0.0
+
+
+def load_jsonl(path: str | Path) -> List[Dict[str, Any]]:
+    with open(path, encoding="utf-8") as file:
+        return [json.loads(line) for line in file if line.strip()]
+
+
+def build_indexes(
+    corpus: List[Dict[str, Any]], embeddings: Embeddings
+) -> Tuple[LocalVectorStore, BM25Index]:
+    ids: List[str] = [record["id"] for record in corpus]
+    texts: List[str] = [record["text"] for record in corpus]
+    metadatas: List[Dict[str, Any]] = [
+        {name: value for name, value in record.items() if name not in ("id", "text")}
+        for record in corpus
+    ]
+    store = LocalVectorStore.from_texts(texts, embeddings, metadatas, ids=ids)
+    lexical_index = BM25Index()
+    lexical_index.add_documents(ids, texts, metadatas)
+    return store, lexical_index
+
+
+def make_retrievers(
+    store: LocalVectorStore, lexical_index: BM25Index
+) -> Dict[str, Retrieve]:
+    registry = MetricsRegistry()
+
+    def lexical_only(query: str, k: int) -> RetrievalResult:
+        start: float = perf_counter()
+        results = lexical_index.search(query, k=k)
+        documents = [lexical_index.get_document(id_) for id_, _ in results]
+        return RetrievalResult(
+            documents, LEXICAL_PATH, {"lexical": perf_counter() - start}
+        )
+
+    return {
+        "dense": HybridRetriever(store, registry=registry).retrieve,
+        "lexical": lexical_only,
+        "hybrid": HybridRetriever(
+            store, lexical_index, fast_path=None, registry=registry
+        ).retrieve,
+        "hybrid+fast_path": HybridRetriever(
+            store, lexical_index, registry=registry
+        ).retrieve,
+    }
+
+
+def evaluate(
+    mode: str, retrieve: Retrieve, queries: List[Dict[str, Any]], k: int
+) -> ModeReport:
+    report = ModeReport(mode)
+    for case in queries:
+        start: float = perf_counter()
+        result: RetrievalResult = retrieve(case["query"], k)
+        report.totals.append(perf_counter() - start)
+        retrieved = {get_document_key(document) for document in result.documents}
+        relevant = set(case["relevant"])
+        report.recalls.append(len(retrieved & relevant) / len(relevant))
+        report.paths[result.path] += 1
+        for stage, duration in result.stage_times.items():
+            report.stage_times.setdefault(stage, []).append(duration)
+    return report
+
+
+def format_ms(values: List[float]) -> str:
+    if not values:
+        return "-"
+    p95: float = quantiles(values, n=20)[-1] if len(values) > 1 else values[0]
+    return f"{median(values) * 1000:.2f}/{p95 * 1000:.2f}"
+
+
+def format_reports(reports: List[ModeReport], k: int) -> str:
+    stages: List[str] = ["lexical", "embed", "dense", "fusion"]
+    header: str = f"{'mode':<18}{'recall@' + str(k):>10}{'fast path':>11}" + "".join(
+        f"{stage + ' ms':>16}" for stage in stages + ["total"]
+    )
+    lines: List[str] = [header, "  (stage columns are p50/p95 ms)"]
+    for report in reports:
+        lines.append(
+            f"{report.mode:<18}{report.recall:>10.2f}{report.fast_path_rate:>11.0%}"
+            + "".join(
+                f"{format_ms(report.stage_times.get(stage, [])):>16}"
+                for stage in stages
+            )
+            + f"{format_ms(report.totals):>16}"
+        )
+    return "\n".join(lines)
+
+
+def main() -> None:
+    parser = ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--corpus", default=str(DEFAULT_CORPUS_PATH))
+    parser.add_argument("--queries", default=str(DEFAULT_QUERIES_PATH))
+    parser.add_argument(
+        "--embedding-latency", type=float, default=DEFAULT_EMBEDDING_LATENCY
+    )
+    parser.add_argument(
+        "--openai", action="store_true", help="Use OpenAI embeddings"
+    )
+    args = parser.parse_args()
+
+    embeddings: Embeddings
+    if args.openai:
+        from llms.openai import get_openai_embeddings
+
+        embeddings = get_openai_embeddings()
+    else:
+        embeddings = HashingFakeEmbeddings()
+    store, lexical_index = build_indexes(load_jsonl(args.corpus), embeddings)
+    if not args.openai:
+        # Indexing is not part of the measurement, so latency starts now
+        embeddings.latency = args.embedding_latency
+
+    queries: List[Dict[str, Any]] = load_jsonl(args.queries)
+    reports: List[ModeReport] = [
+        evaluate(mode, retrieve, queries, args.k)
+        for mode, retrieve in make_retrievers(store, lexical_index).items()
+    ]
+    print(format_reports(reports, args.k))
+
+
+if __name__ == "__main__":
+    main()
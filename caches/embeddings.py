@@ -0,0 +1,237 @@
+import sqlite3
+from array import array
+from collections import OrderedDict
+from dataclasses import dataclass
+from hashlib import sha256
+from threading import Lock
+from time import perf_counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from langchain_core.embeddings import Embeddings
+
+from chains.metrics import (
+    EMBEDDING_CACHE_LOOKUPS_METRIC,
+    EMBEDDING_CACHE_SAVED_METRIC,
+    EMBEDDING_METRIC,
+    MetricsRegistry,
+    metrics_registry,
+)
+
+EMBEDDING_CACHE_MAX_SIZE: int = 4096
+# SQLite's default limit on host parameters per statement is 999
+SQLITE_MAX_PARAMETERS: int = 900
+
+# (model, sha256 digest of the text)
+EmbeddingKey = Tuple[str, bytes]
+
+
+def get_content_hash(text: str) -> bytes:
+    return sha256(text.encode("utf-8")).digest()
+
+
+def pack_vector(vector: Iterable[float]) -> array:
+    # float32 is the precision embedding APIs compute in; a 1536-dim vector
+    # takes 6 KB instead of about 48 KB as a list of Python floats
+    return array("f", vector)
+
+
+@dataclass
+class EmbeddingCacheStats:
+    memory_hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+    embedded_texts: int = 0
+    embedding_time: float = 0.0
+    saved_time: float = 0.0
+
+    @property
+    def hit_rate(self) -> float:
+        hits: int = self.memory_hits + self.disk_hits
+        lookups: int = hits + self.misses
+        return hits / lookups if lookups else 0.0
+
+    @property
+    def seconds_per_text(self) -> float:
+        # Average cost of embedding one text, the basis for saved time
+        if not self.embedded_texts:
+            return 0.0
+        return self.embedding_time / self.embedded_texts
+
+
+class SqliteEmbeddingStore:
+    """
+    On-disk embedding store, one row of packed float32 bytes per vector.
+
+    Lookups and writes are batched into as few statements as possible, so
+    a document batch costs one round trip rather than one per text.
+    """
+
+    def __init__(self, path: str) -> None:
+        self._lock: Lock = Lock()
+        self._connection: sqlite3.Connection = sqlite3.connect(
+            path, check_same_thread=False
+        )
+        with self._lock, self._connection:
+            self._connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS embeddings (
+                    model TEXT NOT NULL,
+                    content_hash BLOB NOT NULL,
+                    vector BLOB NOT NULL,
+                    PRIMARY KEY (model, content_hash)
+                ) WITHOUT ROWID
+                """
+            )
+
+    def get_many(self, model: str, hashes: List[bytes]) -> Dict[bytes, array]:
+        found: Dict[bytes, array] = {}
+        for start in range(0, len(hashes), SQLITE_MAX_PARAMETERS):
+            chunk: List[bytes] = hashes[start : start + SQLITE_MAX_PARAMETERS]
+            placeholders: str = ", ".join("?" * len(chunk))
+            with self._lock:
+                rows = self._connection.execute(
+                    "SELECT content_hash, vector FROM embeddings "
+                    f"WHERE model = ? AND content_hash IN ({placeholders})",
+                    (model, *chunk),
+                ).fetchall()
+            for content_hash, blob in rows:
+                vector = array("f")
+                vector.frombytes(blob)
+                found[content_hash] = vector
+        return found
+
+    def set_many(self, model: str, vectors: Dict[bytes, array]) -> None:
+        with self._lock, self._connection:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?)",
+                (
+                    (model, content_hash, vector.tobytes())
+                    for content_hash, vector in vectors.items()
+                ),
+            )
+
+    def clear(self) -> None:
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM embeddings")
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embeddings wrapper that caches vectors by model and content hash.
+
+    An in-memory LRU sits in front of an optional SqliteEmbeddingStore.
+    The texts of a call that miss both are deduplicated and embedded with
+    a single `embed_documents` call. Queries share the document cache,
+    which is only correct for models that embed both the same way, as
+    OpenAI's do. Hits, misses and the estimated time saved are published
+    to the metrics registry.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        model: str,
+        max_size: int = EMBEDDING_CACHE_MAX_SIZE,
+        store: Optional[SqliteEmbeddingStore] = None,
+        registry: MetricsRegistry = metrics_registry,
+    ) -> None:
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        self.embeddings: Embeddings = embeddings
+        self.model: str = model
+        self.max_size: int = max_size
+        self.store: Optional[SqliteEmbeddingStore] = store
+        self.registry: MetricsRegistry = registry
+        self.stats: EmbeddingCacheStats = EmbeddingCacheStats()
+        self._entries: OrderedDict[EmbeddingKey, array] = OrderedDict()
+        self._lock: Lock = Lock()
+
+    def _insert(self, key: EmbeddingKey, vector: array) -> None:
+        self._entries[key] = vector
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def _record_lookups(self, tier: str, count: int) -> None:
+        if count:
+            self.registry.increment(
+                EMBEDDING_CACHE_LOOKUPS_METRIC, count, model=self.model, tier=tier
+            )
+
+    def _embed_misses(self, texts: Dict[bytes, str]) -> Dict[bytes, array]:
+        start: float = perf_counter()
+        vectors: List[List[float]] = self.embeddings.embed_documents(
+            list(texts.values())
+        )
+        duration: float = perf_counter() - start
+        self.registry.observe(EMBEDDING_METRIC, duration, model=self.model)
+        with self._lock:
+            self.stats.embedded_texts += len(texts)
+            self.stats.embedding_time += duration
+        return {
+            content_hash: pack_vector(vector)
+            for content_hash, vector in zip(texts, vectors)
+        }
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        hashes: List[bytes] = [get_content_hash(text) for text in texts]
+        found: Dict[bytes, array] = {}
+        with self._lock:
+            for content_hash in hashes:
+                key: EmbeddingKey = (self.model, content_hash)
+                vector: Optional[array] = self._entries.get(key)
+                if vector is not None:
+                    self._entries.move_to_end(key)
+                    found[content_hash] = vector
+        memory_hits: int = len(found)
+
+        # Repeated texts in one call are looked up and embedded only once
+        missing: Dict[bytes, str] = {
+            content_hash: text
+            for content_hash, text in zip(hashes, texts)
+            if content_hash not in found
+        }
+        stored: Dict[bytes, array] = {}
+        if missing and self.store is not None:
+            stored = self.store.get_many(self.model, list(missing))
+            for content_hash in stored:
+                del missing[content_hash]
+        embedded: Dict[bytes, array] = self._embed_misses(missing) if missing else {}
+        if embedded and self.store is not None:
+            self.store.set_many(self.model, embedded)
+
+        with self._lock:
+            for content_hash, vector in {**stored, **embedded}.items():
+                self._insert((self.model, content_hash), vector)
+            self.stats.memory_hits += memory_hits
+            self.stats.disk_hits += len(stored)
+            self.stats.misses += len(embedded)
+            saved_time: float = (
+                memory_hits + len(stored)
+            ) * self.stats.seconds_per_text
+            self.stats.saved_time += saved_time
+
+        self._record_lookups("memory", memory_hits)
+        self._record_lookups("disk", len(stored))
+        self._record_lookups("miss", len(embedded))
+        if saved_time:
+            self.registry.increment(
+                EMBEDDING_CACHE_SAVED_METRIC, saved_time, model=self.model
+            )
+
+        found.update(stored)
+        found.update(embedded)
+        return [found[content_hash].tolist() for content_hash in hashes]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.stats = EmbeddingCacheStats()
+        if self.store is not None:
+            self.store.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
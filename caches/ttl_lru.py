@@ -0,0 +1,223 @@
+import json
+import sqlite3
+from collections import OrderedDict
+from dataclasses import dataclass
+from threading import Lock
+from time import time
+from typing import Any, Callable, Hashable, Optional, Tuple
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups: int = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class SqliteCacheStore:
+    """
+    Optional on-disk store so cached entries survive process restarts.
+
+    Keys must be JSON-serializable, and values too once passed through
+    `encode`; `decode` turns the stored JSON back into a cached value.
+    Several caches can share one file by using different namespaces.
+
+    Every `purge_interval` writes, expired rows of the namespace are deleted
+    and, past `max_rows`, the least recently written ones too, so entries
+    that are never read again do not pile up on disk.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        namespace: str,
+        encode: Callable[[Any], Any] = lambda value: value,
+        decode: Callable[[Any], Any] = lambda value: value,
+        max_rows: int = 10_000,
+        purge_interval: int = 100,
+        clock: Callable[[], float] = time,
+    ) -> None:
+        if max_rows < 1 or purge_interval < 1:
+            raise ValueError("max_rows and purge_interval must be at least 1")
+        self.namespace: str = namespace
+        self.encode: Callable[[Any], Any] = encode
+        self.decode: Callable[[Any], Any] = decode
+        self.max_rows: int = max_rows
+        self.purge_interval: int = purge_interval
+        self._clock: Callable[[], float] = clock
+        self._writes: int = 0
+        self._lock: Lock = Lock()
+        self._connection: sqlite3.Connection = sqlite3.connect(
+            path, check_same_thread=False
+        )
+        with self._lock, self._connection:
+            self._connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS cache_entries (
+                    namespace TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    expires_at REAL,
+                    PRIMARY KEY (namespace, key)
+                )
+                """
+            )
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS cache_entries_expiry "
+                "ON cache_entries (namespace, expires_at)"
+            )
+
+    def get(self, key: Hashable) -> Optional[Tuple[Any, Optional[float]]]:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT value, expires_at FROM cache_entries WHERE namespace = ? AND key = ?",
+                (self.namespace, json.dumps(key)),
+            ).fetchone()
+        if row is None:
+            return None
+        return self.decode(json.loads(row[0])), row[1]
+
+    def set(self, key: Hashable, value: Any, expires_at: Optional[float]) -> None:
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO cache_entries VALUES (?, ?, ?, ?)",
+                (
+                    self.namespace,
+                    json.dumps(key),
+                    json.dumps(self.encode(value)),
+                    expires_at,
+                ),
+            )
+            self._writes += 1
+            if self._writes % self.purge_interval == 0:
+                self._purge()
+
+    def _purge(self) -> None:
+        # Replaced rows get a new rowid, so rowid order is write order
+        self._connection.execute(
+            "DELETE FROM cache_entries WHERE namespace = ? AND expires_at <= ?",
+            (self.namespace, self._clock()),
+        )
+        self._connection.execute(
+            """
+            DELETE FROM cache_entries WHERE rowid IN (
+                SELECT rowid FROM cache_entries WHERE namespace = ?
+                ORDER BY rowid DESC LIMIT -1 OFFSET ?
+            )
+            """,
+            (self.namespace, self.max_rows),
+        )
+
+    def purge(self) -> None:
+        with self._lock, self._connection:
+            self._purge()
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock, self._connection:
+            self._connection.execute(
+                "DELETE FROM cache_entries WHERE namespace = ? AND key = ?",
+                (self.namespace, json.dumps(key)),
+            )
+
+    def clear(self) -> None:
+        with self._lock, self._connection:
+            self._connection.execute(
+                "DELETE FROM cache_entries WHERE namespace = ?", (self.namespace,)
+            )
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connection.execute(
+                "SELECT COUNT(*) FROM cache_entries WHERE namespace = ?",
+                (self.namespace,),
+            ).fetchone()[0]
+
+
+class TTLLRUCache:
+    """
+    Thread-safe in-process cache with size-bounded LRU eviction and
+    per-entry expiry.
+
+    Each entry may carry its own TTL; `None` means the entry only leaves the
+    cache through LRU eviction. When a `SqliteCacheStore` is given, it backs
+    the in-memory entries and is consulted on memory misses.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 256,
+        default_ttl: Optional[float] = None,
+        store: Optional[SqliteCacheStore] = None,
+        clock: Callable[[], float] = time,
+    ) -> None:
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        self.max_size: int = max_size
+        self.default_ttl: Optional[float] = default_ttl
+        self.store: Optional[SqliteCacheStore] = store
+        self.stats: CacheStats = CacheStats()
+        self._clock: Callable[[], float] = clock
+        self._entries: OrderedDict[Hashable, Tuple[Any, Optional[float]]] = (
+            OrderedDict()
+        )
+        self._lock: Lock = Lock()
+
+    def _is_expired(self, expires_at: Optional[float]) -> bool:
+        return expires_at is not None and expires_at <= self._clock()
+
+    def _insert(self, key: Hashable, value: Any, expires_at: Optional[float]) -> None:
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.stats.evictions += 1
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if not self._is_expired(expires_at):
+                    self._entries.move_to_end(key)
+                    self.stats.hits += 1
+                    return value
+                del self._entries[key]
+                self.stats.expirations += 1
+
+            if self.store is not None:
+                stored = self.store.get(key)
+                if stored is not None:
+                    value, expires_at = stored
+                    if not self._is_expired(expires_at):
+                        self._insert(key, value, expires_at)
+                        self.stats.hits += 1
+                        return value
+                    self.store.delete(key)
+                    self.stats.expirations += 1
+
+            self.stats.misses += 1
+            return None
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        ttl = self.default_ttl if ttl is None else ttl
+        expires_at: Optional[float] = self._clock() + ttl if ttl is not None else None
+        with self._lock:
+            self._insert(key, value, expires_at)
+            if self.store is not None:
+                self.store.set(key, value, expires_at)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            if self.store is not None:
+                self.store.clear()
+            self.stats = CacheStats()
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,278 @@
+import json
+import math
+import re
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+from urllib.parse import urlsplit
+
+from chains.history import estimate_tokens, truncate_to_tokens
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+STOPWORDS: frozenset = frozenset(
+    "a an and are as at be by for from how i in is it its me my of on or the "
+    "to was what whats when where which who why will with you your".split()
+)
+# Enough for the summarizer to say a search failed and roughly why
+ERROR_NOTE_TOKENS: int = 40
+
+
+@dataclass(frozen=True)
+class Snippet:
+    title: str
+    url: str
+    body: str
+    # Position of the task and of the result within it, used to break ties
+    task_index: int
+    rank: int
+
+
+@dataclass(frozen=True)
+class PackedContext:
+    web_search_results: str
+    weather_search_results: str
+    tokens_before: int
+    tokens_after: int
+    knowledge_base_results: str = ""
+
+
+def tokenize(text: str) -> List[str]:
+    return [
+        token
+        for token in TOKEN_PATTERN.findall(text.casefold())
+        if token not in STOPWORDS
+    ]
+
+
+def as_list(results: Optional[Sequence[str] | str]) -> List[str]:
+    if not results:
+        return []
+    if isinstance(results, str):
+        return [results]
+    return [result for result in results if result]
+
+
+def normalize_url(url: str) -> str:
+    parts = urlsplit(url.strip())
+    return f"{parts.netloc.casefold().removeprefix('www.')}{parts.path.rstrip('/')}"
+
+
+def fit_json_records(text: str, max_tokens: int) -> str:
+    """
+    Serialize a JSON tool result compactly within `max_tokens` tokens.
+
+    Records are dropped from the end of the longest list first, such as the
+    later hours of a forecast, then the largest fields after the first one,
+    so what remains is always valid JSON. Non-JSON text is truncated as is,
+    and a result whose first field alone does not fit is dropped.
+    """
+    try:
+        value: Any = json.loads(text)
+    except (json.JSONDecodeError, TypeError):
+        return truncate_to_tokens(text, max_tokens)
+
+    def serialize(value: Any) -> str:
+        return json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+
+    def find_longest_list(value: Any) -> Optional[List[Any]]:
+        if isinstance(value, dict):
+            children: Iterable[Any] = value.values()
+        elif isinstance(value, list):
+            children = value
+        else:
+            return None
+        longest: Optional[List[Any]] = (
+            value if isinstance(value, list) and value else None
+        )
+        for child in children:
+            candidate: Optional[List[Any]] = find_longest_list(child)
+            if candidate is not None and (
+                longest is None or len(candidate) > len(longest)
+            ):
+                longest = candidate
+        return longest
+
+    serialized: str = serialize(value)
+    while estimate_tokens(serialized) > max_tokens:
+        records: Optional[List[Any]] = find_longest_list(value)
+        if records:
+            records.pop()
+        elif isinstance(value, dict) and len(value) > 1:
+            # The first field names what the result is about, e.g. location
+            del value[
+                max(list(value)[1:], key=lambda key: len(serialize(value[key])))
+            ]
+        else:
+            return ""
+        serialized = serialize(value)
+    return serialized
+
+
+def extract_error_notes(results: List[str]) -> List[str]:
+    """One short line per failed search, from responses with an error status."""
+    notes: List[str] = []
+    for result in results:
+        try:
+            response: Any = json.loads(result)
+        except json.JSONDecodeError:
+            continue
+        if not isinstance(response, dict) or response.get("status") != "error":
+            continue
+        note: str = (
+            f"- Search for \"{response.get('query', '')}\" failed: "
+            f"{' '.join(str(response.get('message', '')).split())}"
+        )
+        notes.append(truncate_to_tokens(note, ERROR_NOTE_TOKENS))
+    return notes
+
+
+def extract_snippets(web_search_results: List[str]) -> List[Snippet]:
+    """Flatten DDG search responses into snippets, dropping duplicate URLs."""
+    snippets: List[Snippet] = []
+    seen_urls: set = set()
+    for task_index, result in enumerate(web_search_results):
+        try:
+            response: Dict[str, Any] = json.loads(result)
+        except json.JSONDecodeError:
+            snippets.append(Snippet("", "", result, task_index, 0))
+            continue
+        for rank, item in enumerate(response.get("results") or []):
+            url: str = item.get("href", "")
+            url_key: str = normalize_url(url)
+            if url_key and url_key in seen_urls:
+                continue
+            seen_urls.add(url_key)
+            snippets.append(
+                Snippet(
+                    title=item.get("title", ""),
+                    url=url,
+                    body=" ".join(item.get("body", "").split()),
+                    task_index=task_index,
+                    rank=rank,
+                )
+            )
+    return snippets
+
+
+def extract_knowledge_base_snippets(knowledge_base_results: List[str]) -> List[Snippet]:
+    """Flatten knowledge base responses into snippets, one per unique chunk."""
+    snippets: List[Snippet] = []
+    seen_ids: set = set()
+    for task_index, result in enumerate(knowledge_base_results):
+        try:
+            response: Dict[str, Any] = json.loads(result)
+        except json.JSONDecodeError:
+            continue
+        for rank, item in enumerate(response.get("results") or []):
+            chunk_id: Any = item.get("id") or item.get("text")
+            if chunk_id in seen_ids:
+                continue
+            seen_ids.add(chunk_id)
+            source: str = item.get("source", "")
+            snippets.append(
+                Snippet(source, source, item.get("text", ""), task_index, rank)
+            )
+    return snippets
+
+
+def rank_snippets(user_query: str, snippets: List[Snippet]) -> List[Snippet]:
+    """Order snippets by IDF-weighted overlap with the user query."""
+    query_terms: set = set(tokenize(user_query))
+    snippet_terms: List[set] = [
+        set(tokenize(f"{snippet.title} {snippet.body}")) for snippet in snippets
+    ]
+    document_frequency: Counter = Counter(
+        term for terms in snippet_terms for term in terms & query_terms
+    )
+
+    def score(index: int) -> float:
+        relevance: float = sum(
+            math.log(1 + len(snippets) / document_frequency[term])
+            for term in snippet_terms[index] & query_terms
+        )
+        # Search engines rank well already, so keep a mild bias to their order
+        return relevance - 0.1 * snippets[index].rank
+
+    order: List[int] = sorted(
+        range(len(snippets)),
+        key=lambda index: (-score(index), snippets[index].rank, index),
+    )
+    return [snippets[index] for index in order]
+
+
+def format_snippet(snippet: Snippet) -> str:
+    if not snippet.url:
+        return f"- {snippet.body}"
+    return f"- [{snippet.title}]({snippet.url}) {snippet.body}"
+
+
+def pack_summarizer_context(
+    user_query: str,
+    web_search_results: Optional[Sequence[str] | str],
+    weather_search_results: Optional[Sequence[str] | str],
+    token_budget: int,
+    knowledge_base_results: Optional[Sequence[str] | str] = None,
+) -> PackedContext:
+    """
+    Fit tool results for the summarizer prompt into `token_budget` tokens.
+
+    Weather payloads are serialized compactly and packed first, since each
+    one answers a specific location the user asked about; a payload over
+    its share loses whole records rather than being cut mid-JSON. Failed
+    searches keep a one-line error note ahead of the results. Knowledge base
+    chunks come next, as our own documentation outranks the open web on the
+    questions it covers. Chunks and web results are flattened into one line
+    each, deduplicated across tasks, ranked by relevance to `user_query`
+    and added until the budget is spent.
+    """
+    web_results: List[str] = as_list(web_search_results)
+    weather_results: List[str] = as_list(weather_search_results)
+    knowledge_base: List[str] = as_list(knowledge_base_results)
+    tokens_before: int = (
+        estimate_tokens(str(web_results))
+        + estimate_tokens(str(weather_results))
+        + estimate_tokens(str(knowledge_base))
+    )
+
+    remaining_tokens: int = token_budget
+    packed_weather: List[str] = []
+    for weather_result in weather_results:
+        # No single location may crowd out every other result
+        share: int = max(remaining_tokens // 2, 1)
+        weather_text: str = fit_json_records(weather_result, share)
+        if weather_text:
+            packed_weather.append(weather_text)
+            remaining_tokens -= estimate_tokens(weather_text)
+
+    def pack_lines(results: List[str], snippets: List[Snippet]) -> List[str]:
+        nonlocal remaining_tokens
+        lines: List[str] = []
+        for line in extract_error_notes(results) + [
+            format_snippet(snippet) for snippet in rank_snippets(user_query, snippets)
+        ]:
+            line_tokens: int = estimate_tokens(line) + 1
+            if line_tokens > remaining_tokens:
+                continue
+            lines.append(line)
+            remaining_tokens -= line_tokens
+        return lines
+
+    packed_knowledge_base: List[str] = pack_lines(
+        knowledge_base, extract_knowledge_base_snippets(knowledge_base)
+    )
+    packed_web: List[str] = pack_lines(web_results, extract_snippets(web_results))
+
+    web_text: str = "\n".join(packed_web)
+    weather_text: str = "\n".join(packed_weather)
+    knowledge_base_text: str = "\n".join(packed_knowledge_base)
+    return PackedContext(
+        web_search_results=web_text,
+        weather_search_results=weather_text,
+        tokens_before=tokens_before,
+        tokens_after=(
+            estimate_tokens(web_text)
+            + estimate_tokens(weather_text)
+            + estimate_tokens(knowledge_base_text)
+        ),
+        knowledge_base_results=knowledge_base_text,
+    )
@@ -0,0 +1,172 @@
+from dataclasses import dataclass
+from hashlib import blake2b
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from langchain_core.messages import BaseMessage
+
+# OpenAI tokenizers average about four characters per token for English;
+# the estimate only has to keep prompts within budget, not match exactly
+CHARS_PER_TOKEN: int = 4
+
+Summarize = Callable[[str, Sequence[BaseMessage], int], str]
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+@dataclass(frozen=True)
+class HistoryBudget:
+    # Upper bound on the rendered history, summary included
+    max_tokens: int = 2000
+    # Most recent turns (user and assistant message pairs) kept verbatim
+    max_turns: int = 6
+    # Share of max_tokens the summary of older turns may use
+    summary_tokens: int = 300
+
+
+ORCHESTRATOR_HISTORY_BUDGET = HistoryBudget(
+    max_tokens=600, max_turns=2, summary_tokens=150
+)
+SUMMARIZER_HISTORY_BUDGET = HistoryBudget(
+    max_tokens=2000, max_turns=6, summary_tokens=300
+)
+
+
+def get_message_role(message: Any) -> str:
+    role: str = getattr(message, "type", "user")
+    return {"human": "user", "ai": "assistant"}.get(role, role)
+
+
+def render_message(message: Any) -> str:
+    content: Any = getattr(message, "content", message)
+    return f"{get_message_role(message)}: {content}"
+
+
+def digest_messages(messages: Sequence[Any]) -> str:
+    """Content hash of a message sequence, stable across object identity."""
+    digest = blake2b(digest_size=16)
+    for message in messages:
+        digest.update(render_message(message).encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    max_chars: int = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return text
+    return text[: max(max_chars - 1, 0)] + "…"
+
+
+def extractive_summarize(
+    previous_summary: str,
+    messages: Sequence[BaseMessage],
+    max_tokens: int,
+) -> str:
+    """
+    Fold messages into the summary without an LLM call.
+
+    Keeps the first sentence of each message and drops the oldest lines
+    once the summary exceeds `max_tokens`.
+    """
+    lines: List[str] = previous_summary.splitlines() if previous_summary else []
+    for message in messages:
+        content: str = " ".join(str(getattr(message, "content", message)).split())
+        first_sentence: str = content.split(". ")[0]
+        lines.append(
+            f"{get_message_role(message)}: {truncate_to_tokens(first_sentence, 40)}"
+        )
+    while len(lines) > 1 and estimate_tokens("\n".join(lines)) > max_tokens:
+        lines.pop(0)
+    return truncate_to_tokens("\n".join(lines), max_tokens)
+
+
+@dataclass
+class SummaryState:
+    summary: str = ""
+    # Number of leading messages already folded into the summary
+    folded_count: int = 0
+    # Content hash of those messages, to notice a replaced or edited history
+    folded_digest: str = ""
+
+
+class ChatHistoryManager:
+    """
+    Renders chat history for prompts under a token budget.
+
+    The most recent turns are kept verbatim. Older turns are folded into a
+    summary, and only the newly dropped messages are folded on each turn.
+    Each budget keeps its own summary and cached rendering, so the
+    orchestrator and summarizer can use different budgets with one manager.
+    A manager follows one conversation: use one per chat history, since the
+    summary is reset whenever the folded messages no longer match.
+    `summarize` defaults to a local extractive summary; pass the result of
+    `prompts.history.make_llm_summarize` to summarize with an LLM instead.
+    """
+
+    def __init__(self, summarize: Summarize = extractive_summarize) -> None:
+        self.summarize: Summarize = summarize
+        self._summaries: Dict[HistoryBudget, SummaryState] = {}
+        self._renders: Dict[HistoryBudget, Tuple[Tuple[int, str], str]] = {}
+
+    def _find_window_start(
+        self, messages: Sequence[BaseMessage], budget: HistoryBudget
+    ) -> int:
+        token_limit: int = budget.max_tokens - budget.summary_tokens
+        window_start: int = len(messages)
+        used_tokens: int = 0
+        while window_start > max(0, len(messages) - 2 * budget.max_turns):
+            message_tokens: int = estimate_tokens(
+                render_message(messages[window_start - 1])
+            )
+            if used_tokens + message_tokens > token_limit:
+                break
+            used_tokens += message_tokens
+            window_start -= 1
+        return window_start
+
+    def render(
+        self, messages: Optional[Sequence[BaseMessage]], budget: HistoryBudget
+    ) -> str:
+        if not messages:
+            return ""
+
+        render_key: Tuple[int, str] = (len(messages), digest_messages(messages))
+        cached_render = self._renders.get(budget)
+        if cached_render is not None and cached_render[0] == render_key:
+            return cached_render[1]
+
+        window_start: int = self._find_window_start(messages, budget)
+        state: SummaryState = self._summaries.setdefault(budget, SummaryState())
+        if state.folded_count and state.folded_digest != digest_messages(
+            messages[: state.folded_count]
+        ):
+            # The history was cleared, replaced or edited: start a new summary
+            state = self._summaries[budget] = SummaryState()
+        if window_start > state.folded_count:
+            state.summary = self.summarize(
+                state.summary,
+                messages[state.folded_count : window_start],
+                budget.summary_tokens,
+            )
+            state.folded_count = window_start
+            state.folded_digest = digest_messages(messages[:window_start])
+
+        sections: List[str] = []
+        if state.summary:
+            sections.append(f"Summary of earlier conversation:\n{state.summary}")
+        recent_messages: str = "\n".join(
+            render_message(message) for message in messages[state.folded_count :]
+        )
+        if recent_messages:
+            # A single message longer than the budget is cut rather than dropped
+            sections.append(
+                truncate_to_tokens(
+                    recent_messages, budget.max_tokens - budget.summary_tokens
+                )
+            )
+        rendered: str = "\n\n".join(sections)
+
+        self._renders[budget] = (render_key, rendered)
+        return rendered
@@ -0,0 +1,270 @@
+import re
+from bisect import bisect_left
+from typing import Generator, Optional, Dict, Iterable, List, Tuple
+from time import perf_counter
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from threading import Lock
+
+
+@dataclass
+class StepMetrics:
+    step_times: Dict[str, float] = field(default_factory=dict)
+    task_times: Dict[str, float] = field(default_factory=dict)
+    stats: Dict[str, float] = field(default_factory=dict)
+    # Set on creation, which is when a chain's response stream starts running
+    start_time: float = field(default_factory=perf_counter)
+    enabled: bool = True
+
+    def record_step(self, step_name: str, duration: float) -> None:
+        if self.enabled:
+            self.step_times[step_name] = duration
+
+    def record_task(self, task_name: str, duration: float) -> None:
+        # Per-task times overlap when tasks run concurrently, so they are kept
+        # apart from step_times and excluded from the total.
+        if self.enabled:
+            self.task_times[task_name] = duration
+
+    def record_stat(self, stat_name: str, value: float) -> None:
+        # Derived values (overlaps, sizes, ...) that are not step durations
+        if self.enabled:
+            self.stats[stat_name] = value
+
+    def get_total_time(self) -> float:
+        return sum(self.step_times.values())
+
+
+@contextmanager
+def time_block(metrics: StepMetrics, step_name: str) -> Generator[None, None, None]:
+    if not metrics.enabled:
+        yield
+        return
+
+    start: float = perf_counter()
+    try:
+        yield
+    finally:
+        duration: float = perf_counter() - start
+        metrics.record_step(step_name, duration)
+
+
+# Upper bounds from 1ms to about 4.5 minutes, four buckets per doubling, so an
+# interpolated quantile is within about 10% of the true value
+DEFAULT_LATENCY_BUCKETS: Tuple[float, ...] = tuple(
+    0.001 * 2 ** (index / 4) for index in range(73)
+)
+
+STEP_METRIC: str = "chain_step_duration_seconds"
+STREAM_METRIC: str = "chain_stream_duration_seconds"
+EMBEDDING_METRIC: str = "embedding_request_duration_seconds"
+EMBEDDING_CACHE_LOOKUPS_METRIC: str = "embedding_cache_lookups_total"
+EMBEDDING_CACHE_SAVED_METRIC: str = "embedding_cache_saved_seconds_total"
+RETRIEVAL_METRIC: str = "retrieval_stage_duration_seconds"
+RETRIEVAL_REQUESTS_METRIC: str = "retrieval_requests_total"
+METRIC_HELP: Dict[str, str] = {
+    STEP_METRIC: "Duration of chain steps and tool tasks, TTFB included.",
+    STREAM_METRIC: "Time from chain start until its response stream ended.",
+    EMBEDDING_METRIC: "Duration of embedding API calls for cache misses.",
+    EMBEDDING_CACHE_LOOKUPS_METRIC: "Embedding cache lookups by result tier.",
+    EMBEDDING_CACHE_SAVED_METRIC: "Estimated embedding time saved by cache hits.",
+    RETRIEVAL_METRIC: "Duration of document retrieval stages.",
+    RETRIEVAL_REQUESTS_METRIC: "Document retrievals by path (lexical, hybrid, dense).",
+}
+
+LabelSet = Tuple[Tuple[str, str], ...]
+
+
+class LatencyHistogram:
+    """
+    Fixed-bucket histogram of durations in seconds.
+
+    Observing is a binary search and three additions, cheap enough for the
+    request path. Histograms with the same buckets merge by adding counts,
+    so per-label series can be combined before a quantile query.
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_LATENCY_BUCKETS) -> None:
+        self.buckets: Tuple[float, ...] = buckets
+        # One count per bucket plus one for values above the last bound
+        self.counts: List[int] = [0] * (len(buckets) + 1)
+        self.sum: float = 0.0
+        self.count: int = 0
+        self._lock: Lock = Lock()
+
+    def observe(self, value: float) -> None:
+        index: int = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        if other.buckets != self.buckets:
+            raise ValueError("Only histograms with the same buckets can be merged")
+        with other._lock:
+            counts, total, count = list(other.counts), other.sum, other.count
+        with self._lock:
+            self.counts = [a + b for a, b in zip(self.counts, counts)]
+            self.sum += total
+            self.count += count
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimate the q-quantile by interpolating within its bucket."""
+        if not 0 <= q <= 1:
+            raise ValueError("q must be between 0 and 1")
+        with self._lock:
+            counts, count = list(self.counts), self.count
+        if count == 0:
+            return None
+
+        rank: float = q * count
+        cumulative: int = 0
+        for index, bucket_count in enumerate(counts):
+            if bucket_count and cumulative + bucket_count >= rank:
+                if index == len(self.buckets):
+                    # Values past the last bound have no upper edge to use
+                    return self.buckets[-1]
+                lower: float = self.buckets[index - 1] if index else 0.0
+                upper: float = self.buckets[index]
+                return lower + (upper - lower) * (rank - cumulative) / bucket_count
+            cumulative += bucket_count
+        return self.buckets[-1]
+
+
+def strip_task_index(task_name: str) -> str:
+    # "web_search[1]" and its re-submission "web_search[1]#2" -> "web_search"
+    return re.sub(r"(\[\d+\])?(#\d+)?$", "", task_name)
+
+
+def format_labels(labels: LabelSet, **extra: str) -> str:
+    items: List[Tuple[str, str]] = list(labels) + list(extra.items())
+    if not items:
+        return ""
+    escaped: Iterable[str] = (
+        '{}="{}"'.format(
+            name,
+            value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"),
+        )
+        for name, value in items
+    )
+    return "{" + ",".join(escaped) + "}"
+
+
+class MetricsRegistry:
+    """
+    Process-wide latency histograms and counters, one series per metric
+    name and labels.
+
+    Chains publish their StepMetrics here after each response; quantiles can
+    be queried over any subset of labels, and `render_prometheus` produces
+    the Prometheus text exposition format for scraping.
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_LATENCY_BUCKETS) -> None:
+        self.buckets: Tuple[float, ...] = buckets
+        self._lock: Lock = Lock()
+        self._series: Dict[str, Dict[LabelSet, LatencyHistogram]] = {}
+        self._counters: Dict[str, Dict[LabelSet, float]] = {}
+
+    def _get_series(self, name: str, labels: Dict[str, str]) -> LatencyHistogram:
+        label_set: LabelSet = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._series.setdefault(name, {})
+            histogram: Optional[LatencyHistogram] = series.get(label_set)
+            if histogram is None:
+                histogram = series[label_set] = LatencyHistogram(self.buckets)
+            return histogram
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        self._get_series(name, labels).observe(value)
+
+    def increment(self, name: str, value: float = 1.0, **labels: str) -> None:
+        label_set: LabelSet = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[label_set] = series.get(label_set, 0.0) + value
+
+    def get_counter(self, name: str, **labels: str) -> float:
+        """Sum every counter series of `name` whose labels include `labels`."""
+        with self._lock:
+            series = list(self._counters.get(name, {}).items())
+        return sum(
+            value
+            for label_set, value in series
+            if set(labels.items()) <= set(label_set)
+        )
+
+    def observe_step_metrics(self, metrics: StepMetrics, **labels: str) -> None:
+        for step_name, duration in metrics.step_times.items():
+            self.observe(STEP_METRIC, duration, step=step_name, **labels)
+        # Concurrent tool tasks are published per tool, like sequential steps
+        for task_name, duration in metrics.task_times.items():
+            self.observe(
+                STEP_METRIC, duration, step=strip_task_index(task_name), **labels
+            )
+        if "stream_total" in metrics.stats:
+            self.observe(STREAM_METRIC, metrics.stats["stream_total"], **labels)
+
+    def get_label_values(self, name: str, label: str) -> List[str]:
+        with self._lock:
+            label_sets = list(self._series.get(name, {}))
+        values = {dict(label_set).get(label) for label_set in label_sets}
+        return sorted(value for value in values if value is not None)
+
+    def get_histogram(self, name: str, **labels: str) -> LatencyHistogram:
+        """Merge every series of `name` whose labels include `labels`."""
+        merged = LatencyHistogram(self.buckets)
+        with self._lock:
+            series = list(self._series.get(name, {}).items())
+        for label_set, histogram in series:
+            if set(labels.items()) <= set(label_set):
+                merged.merge(histogram)
+        return merged
+
+    def quantiles(
+        self,
+        name: str,
+        quantiles: Tuple[float, ...] = (0.5, 0.95, 0.99),
+        **labels: str,
+    ) -> Dict[float, Optional[float]]:
+        histogram: LatencyHistogram = self.get_histogram(name, **labels)
+        return {q: histogram.quantile(q) for q in quantiles}
+
+    def render_prometheus(self) -> str:
+        lines: List[str] = []
+        with self._lock:
+            metrics = {name: dict(series) for name, series in self._series.items()}
+        for name, series in sorted(metrics.items()):
+            lines.append(f"# HELP {name} {METRIC_HELP.get(name, name)}")
+            lines.append(f"# TYPE {name} histogram")
+            for label_set, histogram in sorted(series.items()):
+                with histogram._lock:
+                    counts = list(histogram.counts)
+                    total, count = histogram.sum, histogram.count
+                cumulative: int = 0
+                for bound, bucket_count in zip(self.buckets, counts):
+                    cumulative += bucket_count
+                    labels: str = format_labels(label_set, le=f"{bound:.6g}")
+                    lines.append(f"{name}_bucket{labels} {cumulative}")
+                lines.append(
+                    f"{name}_bucket{format_labels(label_set, le='+Inf')} {count}"
+                )
+                lines.append(f"{name}_sum{format_labels(label_set)} {total}")
+                lines.append(f"{name}_count{format_labels(label_set)} {count}")
+        with self._lock:
+            counters = {name: dict(series) for name, series in self._counters.items()}
+        for name, series in sorted(counters.items()):
+            lines.append(f"# HELP {name} {METRIC_HELP.get(name, name)}")
+            lines.append(f"# TYPE {name} counter")
+            for label_set, value in sorted(series.items()):
+                lines.append(f"{name}{format_labels(label_set)} {value}")
+        return "\n".join(lines) + "\n"
+
+    def clear(self) -> None:
+        with self._lock:
+            self._series.clear()
+            self._counters.clear()
+
+
+metrics_registry = MetricsRegistry()
@@ -0,0 +1,64 @@
+import os
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Event, Thread
+
+from chains.metrics import MetricsRegistry, metrics_registry
+
+PROMETHEUS_CONTENT_TYPE: str = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def start_metrics_server(
+    port: int,
+    host: str = "127.0.0.1",
+    registry: MetricsRegistry = metrics_registry,
+) -> ThreadingHTTPServer:
+    """Serve `registry` at http://host:port/metrics from a daemon thread."""
+
+    class MetricsRequestHandler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body: bytes = registry.render_prometheus().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", PROMETHEUS_CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format: str, *args) -> None:
+            # Scrapes every few seconds would flood stderr
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsRequestHandler)
+    Thread(
+        target=server.serve_forever, name="metrics-server", daemon=True
+    ).start()
+    return server
+
+
+def write_metrics_file(path: str, registry: MetricsRegistry = metrics_registry) -> None:
+    # Write then rename, so a scraper never reads a half-written file
+    temp_path: str = f"{path}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as file:
+        file.write(registry.render_prometheus())
+    os.replace(temp_path, path)
+
+
+def start_metrics_file_writer(
+    path: str,
+    interval: float = 15.0,
+    registry: MetricsRegistry = metrics_registry,
+) -> Event:
+    """
+    Rewrite `path` every `interval` seconds, e.g. for node_exporter's textfile
+    collector. Setting the returned event stops the writer.
+    """
+    stopped: Event = Event()
+
+    def write_periodically() -> None:
+        while not stopped.wait(interval):
+            write_metrics_file(path, registry)
+
+    Thread(target=write_periodically, name="metrics-file-writer", daemon=True).start()
+    return stopped
@@ -0,0 +1,128 @@
+import hashlib
+import json
+import re
+from functools import cache
+from typing import Any, Dict, Optional, Tuple
+
+from langchain_core.prompts import ChatPromptTemplate
+from pydantic import BaseModel
+
+from caches.ttl_lru import TTLLRUCache
+from prompts.multi_task import multi_task_orchestrator_prompt
+from prompts.single_task import single_task_orchestrator_prompt
+
+SINGLE_TASK_NAMESPACE: str = "single_task"
+MULTI_TASK_NAMESPACE: str = "multi_task"
+
+ORCHESTRATOR_CACHE_TTL: float = 30 * 60
+ORCHESTRATOR_CACHE_MAX_SIZE: int = 1024
+# Only the most recent messages shape the orchestrator's decision
+ORCHESTRATOR_CACHE_HISTORY_WINDOW: int = 4
+
+# Queries about "now" may be answered with dated search queries, so the
+# decision for them is not reused
+TIME_SENSITIVE_PATTERN = re.compile(
+    r"\b(now|today|tonight|tomorrow|yesterday|latest|current|currently|recent|"
+    r"recently|breaking|live|this (morning|afternoon|evening|week|month|year)|"
+    r"right now|this weekend|upcoming|score|scores)\b",
+    re.IGNORECASE,
+)
+
+ORCHESTRATOR_PROMPTS: Dict[str, ChatPromptTemplate] = {
+    SINGLE_TASK_NAMESPACE: single_task_orchestrator_prompt,
+    MULTI_TASK_NAMESPACE: multi_task_orchestrator_prompt,
+}
+
+orchestrator_cache = TTLLRUCache(
+    max_size=ORCHESTRATOR_CACHE_MAX_SIZE,
+    default_ttl=ORCHESTRATOR_CACHE_TTL,
+)
+
+
+def is_time_sensitive(user_query: str) -> bool:
+    return TIME_SENSITIVE_PATTERN.search(user_query) is not None
+
+
+def render_history_window(chat_history: Any, window: int) -> str:
+    """Stable text for the last `window` messages of a list or string history."""
+    if not chat_history:
+        return ""
+    if isinstance(chat_history, str):
+        return chat_history[-window * 500 :]
+
+    lines: list[str] = []
+    for message in list(chat_history)[-window:]:
+        role: str = getattr(message, "type", type(message).__name__)
+        content: Any = getattr(message, "content", message)
+        lines.append(f"{role}: {' '.join(str(content).split())}")
+    return "\n".join(lines)
+
+
+@cache
+def get_prompt_version(namespace: str) -> str:
+    """Hash of the namespace's orchestrator prompt, schema included."""
+    prompt: Optional[ChatPromptTemplate] = ORCHESTRATOR_PROMPTS.get(namespace)
+    if prompt is None:
+        return ""
+    # Callable partials are resolved per format and left out of the version
+    partials: Dict[str, str] = {
+        name: value
+        for name, value in prompt.partial_variables.items()
+        if isinstance(value, str)
+    }
+    text: str = prompt.pretty_repr() + json.dumps(partials, sort_keys=True)
+    return hashlib.sha256(text.encode()).hexdigest()[:16]
+
+
+def get_orchestrator_cache_key(
+    namespace: str,
+    user_query: str,
+    chat_history: Any,
+    model: str = "",
+    window: int = ORCHESTRATOR_CACHE_HISTORY_WINDOW,
+) -> Tuple[str, str, str, str, str]:
+    """
+    Key a decision by who made it and what it answered.
+
+    `model` identifies the orchestrator LLM, and the prompt version changes
+    with the prompt or task schema, so decisions never cross models or
+    prompt revisions.
+    """
+    normalized_query: str = " ".join(user_query.casefold().split()).rstrip("?!. ")
+    history_hash: str = hashlib.sha256(
+        render_history_window(chat_history, window).encode()
+    ).hexdigest()
+    return (
+        namespace,
+        get_prompt_version(namespace),
+        model,
+        normalized_query,
+        history_hash,
+    )
+
+
+def get_cached_decision(
+    namespace: str, user_query: str, chat_history: Any, model: str = ""
+) -> Optional[BaseModel]:
+    if is_time_sensitive(user_query):
+        return None
+    decision: Optional[BaseModel] = orchestrator_cache.get(
+        get_orchestrator_cache_key(namespace, user_query, chat_history, model)
+    )
+    # Callers get their own copy so cached decisions are never mutated
+    return decision.model_copy(deep=True) if decision is not None else None
+
+
+def cache_decision(
+    namespace: str,
+    user_query: str,
+    chat_history: Any,
+    decision: BaseModel,
+    model: str = "",
+) -> None:
+    if is_time_sensitive(user_query):
+        return
+    orchestrator_cache.set(
+        get_orchestrator_cache_key(namespace, user_query, chat_history, model),
+        decision.model_copy(deep=True),
+    )
@@ -0,0 +1,108 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+from threading import Lock
+from typing import Tuple
+
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.runnables import Runnable
+
+from prompts.single_task import (
+    single_task_orchestrator_prompt,
+    single_task_orchestrator_parser,
+)
+from prompts.multi_task import (
+    multi_task_orchestrator_prompt,
+    multi_task_orchestrator_parser,
+)
+from prompts.summarizer import summarizer_prompt, simple_summarizer_prompt
+from chains.types import ChainConfig
+
+
+@dataclass(frozen=True)
+class CompiledChains:
+    multi_task_orchestrator: Runnable
+    # Same prompt and LLM, but yields raw text for the streaming orchestrator
+    multi_task_orchestrator_text: Runnable
+    single_task_orchestrator: Runnable
+    summarizer: Runnable
+    simple_summarizer: Runnable
+
+
+def compile_chains(
+    orchestrator_llm: Runnable, summarizer_llm: Runnable
+) -> CompiledChains:
+    return CompiledChains(
+        multi_task_orchestrator=(
+            multi_task_orchestrator_prompt
+            | orchestrator_llm
+            | multi_task_orchestrator_parser
+        ),
+        multi_task_orchestrator_text=(
+            multi_task_orchestrator_prompt | orchestrator_llm | StrOutputParser()
+        ),
+        single_task_orchestrator=(
+            single_task_orchestrator_prompt
+            | orchestrator_llm
+            | single_task_orchestrator_parser
+        ),
+        summarizer=summarizer_prompt | summarizer_llm | StrOutputParser(),
+        simple_summarizer=(
+            simple_summarizer_prompt | summarizer_llm | StrOutputParser()
+        ),
+    )
+
+
+class ChainRegistry:
+    """
+    Process-wide cache of compiled chains, keyed by a config's LLMs.
+
+    The pipelines only depend on the orchestrator and summarizer LLMs, so
+    configs sharing both reuse one set of chains. LLM clients are pydantic
+    models and not hashable, so entries are keyed by identity and keep a
+    reference to the LLMs, which stops the ids from being reused while the
+    entry lives. At most `max_entries` pairs are kept, least recently used
+    evicted first, so callers building LLMs per request do not leak chains.
+    """
+
+    def __init__(self, max_entries: int = 32) -> None:
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        self.max_entries: int = max_entries
+        self._lock: Lock = Lock()
+        self._entries: OrderedDict[
+            Tuple[int, int], Tuple[Runnable, Runnable, CompiledChains]
+        ] = OrderedDict()
+
+    def get(self, config: ChainConfig) -> CompiledChains:
+        key: Tuple[int, int] = (
+            id(config.orchestrator_llm),
+            id(config.summarizer_llm),
+        )
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry[2]
+            entry = (
+                config.orchestrator_llm,
+                config.summarizer_llm,
+                compile_chains(config.orchestrator_llm, config.summarizer_llm),
+            )
+            self._entries[key] = entry
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            return entry[2]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+chain_registry = ChainRegistry()
+
+
+def get_compiled_chains(config: ChainConfig) -> CompiledChains:
+    return chain_registry.get(config)
@@ -0,0 +1,240 @@
+import math
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from threading import Lock
+from typing import Any, Dict, Iterable, List, Optional, Protocol, Tuple
+
+from tasks.search import (
+    SingleSearchTask,
+    MultiSearchTask,
+    WebTextSearchTask,
+    WeatherSearchTask,
+)
+
+
+@dataclass(frozen=True)
+class RouteDecision:
+    should_search_web: bool
+    should_search_weather: bool
+    confidence: float
+    rule: str
+    web_queries: Tuple[str, ...] = ()
+    weather_locations: Tuple[str, ...] = ()
+
+    def to_single_search_task(self) -> SingleSearchTask:
+        return SingleSearchTask(
+            should_search_web=self.should_search_web,
+            should_search_weather=self.should_search_weather,
+            web_query=self.web_queries[0] if self.web_queries else "",
+            web_query_count=3 if self.web_queries else 0,
+            weather_query=self.weather_locations[0] if self.weather_locations else "",
+        )
+
+    def to_multi_search_task(self) -> MultiSearchTask:
+        return MultiSearchTask(
+            should_search_web=self.should_search_web,
+            web_tasks=[WebTextSearchTask(query=query) for query in self.web_queries],
+            should_search_weather=self.should_search_weather,
+            weather_tasks=[
+                WeatherSearchTask(location=location)
+                for location in self.weather_locations
+            ],
+        )
+
+
+class RouteClassifier(Protocol):
+    def classify(self, user_query: str) -> Optional[RouteDecision]: ...
+
+
+@dataclass
+class RouterStats:
+    fast_path: int = 0
+    fallback: int = 0
+    by_rule: Dict[str, int] = field(default_factory=dict)
+    _lock: Lock = field(default_factory=Lock, repr=False)
+
+    def record(self, decision: Optional[RouteDecision]) -> None:
+        with self._lock:
+            if decision is None:
+                self.fallback += 1
+                return
+            self.fast_path += 1
+            self.by_rule[decision.rule] = self.by_rule.get(decision.rule, 0) + 1
+
+    @property
+    def fast_path_rate(self) -> float:
+        total: int = self.fast_path + self.fallback
+        return self.fast_path / total if total else 0.0
+
+
+router_stats = RouterStats()
+
+SMALL_TALK_PATTERN = re.compile(
+    r"^(hi|hello|hey|yo|howdy|thanks|thank you|thx|ty|ok|okay|cool|great|nice|"
+    r"awesome|perfect|got it|sounds good|bye|goodbye|see you|good (morning|"
+    r"afternoon|evening|night))( (there|so much|a lot|again|you|everyone))*$",
+    re.IGNORECASE,
+)
+ARITHMETIC_PATTERN = re.compile(
+    r"^((what is|what's|whats|calculate|compute|solve|how much is) )?"
+    r"(?P<expression>[\d\s.+\-*/x×÷^%()=]+)$",
+    re.IGNORECASE,
+)
+OPERATION_PATTERN = re.compile(r"\d\s*[+\-*/x×÷^%]\s*[\d(]")
+WEATHER_PATTERN = re.compile(
+    r"^((what is|what's|whats|how is|how's|hows) )?(the )?(current )?"
+    r"(weather|temperature|forecast)( like)? (in|for|at) (?P<location>[^?!.]+?)"
+    r"( (today|right now|now|currently|this week|tomorrow))?$",
+    re.IGNORECASE,
+)
+# Follow-ups lean on earlier turns that only the LLM orchestrator can resolve
+FOLLOW_UP_PATTERN = re.compile(
+    r"\b(it|its|there|that|those|them|this|these|here|same)\b", re.IGNORECASE
+)
+LOCATION_SEPARATOR = re.compile(r",? and |; ", re.IGNORECASE)
+# The location group also swallows dates, units, comparisons and places
+# relative to the user ("Paris next weekend", "Paris vs London", "my area"),
+# which WeatherAPI cannot resolve, so those go to the LLM instead
+UNCERTAIN_LOCATION_PATTERN = re.compile(
+    r"\d|\b(today|tonight|tomorrow|yesterday|now|later|next|last|weekend|"
+    r"week|weeks|month|months|day|days|hour|hours|morning|afternoon|evening|"
+    r"night|from|until|monday|tuesday|wednesday|thursday|friday|saturday|"
+    r"sunday|fahrenheit|celsius|kelvin|degrees|metric|imperial|units|vs|versus|"
+    r"compared|or|than|my|our|your|his|her|their|me|us|near|nearby)\b",
+    re.IGNORECASE,
+)
+
+
+def normalize_route_query(user_query: str) -> str:
+    return " ".join(user_query.split()).rstrip("?!. ")
+
+
+def match_rules(user_query: str) -> Optional[RouteDecision]:
+    query: str = normalize_route_query(user_query)
+
+    if SMALL_TALK_PATTERN.match(query):
+        return RouteDecision(False, False, confidence=0.98, rule="small_talk")
+
+    arithmetic = ARITHMETIC_PATTERN.match(query)
+    if arithmetic and OPERATION_PATTERN.search(arithmetic.group("expression")):
+        return RouteDecision(False, False, confidence=0.97, rule="arithmetic")
+
+    weather = WEATHER_PATTERN.match(query)
+    if weather:
+        location_text: str = weather.group("location").strip()
+        locations: List[str] = [
+            location.strip()
+            for location in LOCATION_SEPARATOR.split(location_text)
+            if location.strip()
+        ]
+        if FOLLOW_UP_PATTERN.search(location_text) or (
+            UNCERTAIN_LOCATION_PATTERN.search(location_text)
+        ):
+            return None
+        if 0 < len(locations) <= 3 and all(
+            2 <= len(location) <= 100 for location in locations
+        ):
+            return RouteDecision(
+                False,
+                True,
+                # Several short names ("NY and LA") are often ambiguous
+                confidence=0.93 if len(locations) == 1 else 0.85,
+                rule="weather",
+                weather_locations=tuple(locations),
+            )
+
+    return None
+
+
+def route_query(
+    user_query: str,
+    chat_history: Any = None,
+    threshold: float = 0.9,
+    classifier: Optional[RouteClassifier] = None,
+) -> Optional[RouteDecision]:
+    """
+    Decide locally whether the orchestrator LLM can be skipped.
+
+    Deterministic rules run first, then the optional classifier. Returns a
+    decision only when its confidence reaches `threshold`; `None` means the
+    caller should fall back to the LLM orchestrator. Every call is counted
+    in `router_stats`.
+    """
+    decision: Optional[RouteDecision] = match_rules(user_query)
+    # The classifier only sees the query, so it is not trusted mid-conversation
+    if decision is None and classifier is not None and not chat_history:
+        decision = classifier.classify(user_query)
+    if decision is not None and decision.confidence < threshold:
+        decision = None
+    router_stats.record(decision)
+    return decision
+
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9']+")
+ROUTE_LABELS: Dict[str, Tuple[bool, bool]] = {
+    "none": (False, False),
+    "web": (True, False),
+}
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_PATTERN.findall(text.casefold())
+
+
+class NaiveBayesRouteClassifier:
+    """
+    Tiny multinomial naive Bayes classifier over query words.
+
+    Trained from labelled `(query, label)` pairs where the label is "none",
+    "web", "weather" or "web+weather". It only answers for "none" (no search)
+    and "web" (search the query as typed); weather needs a location the
+    rules could not extract, so those queries go to the LLM.
+    """
+
+    def __init__(self, examples: Iterable[Tuple[str, str]], alpha: float = 1.0):
+        self.alpha: float = alpha
+        self.label_counts: Counter = Counter()
+        self.word_counts: Dict[str, Counter] = {}
+        for query, label in examples:
+            self.label_counts[label] += 1
+            self.word_counts.setdefault(label, Counter()).update(tokenize(query))
+        self.vocabulary: set = {
+            word for counts in self.word_counts.values() for word in counts
+        }
+        self.total_words: Dict[str, int] = {
+            label: sum(counts.values()) for label, counts in self.word_counts.items()
+        }
+
+    def predict(self, user_query: str) -> Tuple[str, float]:
+        total_examples: int = sum(self.label_counts.values())
+        log_scores: Dict[str, float] = {}
+        for label, count in self.label_counts.items():
+            score: float = math.log(count / total_examples)
+            denominator: float = self.total_words[label] + self.alpha * len(
+                self.vocabulary
+            )
+            for word in tokenize(user_query):
+                score += math.log(
+                    (self.word_counts[label][word] + self.alpha) / denominator
+                )
+            log_scores[label] = score
+        best_label: str = max(log_scores, key=log_scores.get)
+        max_score: float = log_scores[best_label]
+        normalizer: float = sum(
+            math.exp(score - max_score) for score in log_scores.values()
+        )
+        return best_label, 1.0 / normalizer
+
+    def classify(self, user_query: str) -> Optional[RouteDecision]:
+        label, probability = self.predict(user_query)
+        if label not in ROUTE_LABELS or len(user_query.strip()) < 3:
+            return None
+        should_search_web, should_search_weather = ROUTE_LABELS[label]
+        return RouteDecision(
+            should_search_web,
+            should_search_weather,
+            confidence=probability,
+            rule=f"classifier:{label}",
+            web_queries=(user_query.strip()[:200],) if should_search_web else (),
+        )
@@ -0,0 +1,344 @@
+import json
+from concurrent.futures import Future
+from dataclasses import dataclass
+from time import perf_counter
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+from pydantic import ValidationError
+from langchain_core.runnables import Runnable
+
+from tools.web_search import ddg_text_search
+from tools.weather import get_bulk_weather_data
+from tools.knowledge_base import search_knowledge_base
+from tasks.search import MultiSearchTask, WebTextSearchTask, WeatherSearchTask
+from prompts.multi_task import multi_task_orchestrator_parser
+from chains.metrics import StepMetrics
+from chains.tool_stage import ToolStage
+
+WEB_TASKS: str = "web_tasks"
+WEATHER_TASKS: str = "weather_tasks"
+# Each task array only runs once its should_search flag has streamed as true
+TASK_FLAGS: Dict[str, str] = {
+    WEB_TASKS: "should_search_web",
+    WEATHER_TASKS: "should_search_weather",
+}
+
+
+@dataclass
+class DispatchedTask:
+    # What the task was submitted for, compared with the final decision
+    spec: Any
+    name: str
+    future: Future
+
+
+class StreamedTaskDispatcher:
+    """
+    Submits the tool tasks of one orchestration to a ToolStage.
+
+    Tasks are submitted per slot ("web_search[0]", "weather_search"). A slot
+    re-submitted because the final decision differs runs as a new attempt
+    named "<slot>#<attempt>", and the stale attempt is cancelled and
+    discarded, so only the tasks the decision uses are timed.
+    """
+
+    def __init__(self, stage: ToolStage) -> None:
+        self.stage: ToolStage = stage
+        self.dispatched: Dict[str, DispatchedTask] = {}
+        self.used_names: List[str] = []
+        self._attempts: Dict[str, int] = {}
+
+    def submit(self, slot: str, spec: Any, func: Callable[..., Any], **kwargs) -> None:
+        previous: Optional[DispatchedTask] = self.dispatched.get(slot)
+        if previous is not None:
+            self.discard(previous)
+        attempt: int = self._attempts.get(slot, 0) + 1
+        self._attempts[slot] = attempt
+        name: str = slot if attempt == 1 else f"{slot}#{attempt}"
+        self.dispatched[slot] = DispatchedTask(
+            spec, name, self.stage.submit(name, func, **kwargs)
+        )
+
+    def resolve(
+        self, slot: str, spec: Any, func: Callable[..., Any], **kwargs
+    ) -> Future:
+        """The slot's future for `spec`, reusing a matching streamed task."""
+        dispatched: Optional[DispatchedTask] = self.dispatched.get(slot)
+        if dispatched is None or dispatched.spec != spec:
+            self.submit(slot, spec, func, **kwargs)
+            dispatched = self.dispatched[slot]
+        self.used_names.append(dispatched.name)
+        return dispatched.future
+
+    def discard(self, dispatched: DispatchedTask) -> None:
+        dispatched.future.cancel()
+        self.stage.discard(dispatched.name)
+
+    def discard_unused(self) -> None:
+        for dispatched in self.dispatched.values():
+            if dispatched.name not in self.used_names:
+                self.discard(dispatched)
+
+
+class TaskArrayScanner:
+    """
+    Incremental scanner for a streamed JSON object.
+
+    Feed it text chunks as they arrive; it returns each element of the
+    top-level arrays named in `array_keys` as soon as the element's closing
+    brace has been seen, as `(array_key, index, element)`. Text before the
+    root object (such as a markdown code fence) is ignored. Top-level
+    booleans are collected in `flags` once their value is complete, and
+    tracked arrays in `closed_arrays` once their closing bracket is seen.
+    """
+
+    def __init__(self, array_keys: List[str]) -> None:
+        self.array_keys: List[str] = array_keys
+        self._buffer: str = ""
+        self._position: int = 0
+        # Open containers as [bracket, key in parent, element count, start]
+        self._stack: List[List[Any]] = []
+        self._expect_key: bool = False
+        self._current_key: Optional[str] = None
+        self._in_string: bool = False
+        self._escaped: bool = False
+        self._string_start: int = 0
+        self._done: bool = False
+        # Start of the root object's current value, to read booleans
+        self._value_start: Optional[int] = None
+        self.flags: Dict[str, bool] = {}
+        self.closed_arrays: Set[str] = set()
+
+    def _end_top_level_value(self, position: int) -> None:
+        if self._value_start is None:
+            return
+        value: str = self._buffer[self._value_start : position].strip()
+        if value in ("true", "false") and self._current_key is not None:
+            self.flags[self._current_key] = value == "true"
+        self._value_start = None
+
+    def _in_tracked_array(self) -> bool:
+        return (
+            len(self._stack) == 2
+            and self._stack[-1][0] == "["
+            and self._stack[-1][1] in self.array_keys
+        )
+
+    def feed(self, chunk: str) -> List[Tuple[str, int, Dict[str, Any]]]:
+        elements: List[Tuple[str, int, Dict[str, Any]]] = []
+        self._buffer += chunk
+
+        for char in chunk:
+            position: int = self._position
+            self._position += 1
+            if self._done:
+                continue
+
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._expect_key and self._stack[-1][0] == "{":
+                        self._current_key = json.loads(
+                            self._buffer[self._string_start : position + 1]
+                        )
+                continue
+
+            if not self._stack and char != "{":
+                continue
+
+            if char == '"':
+                self._in_string = True
+                self._string_start = position
+            elif char in "{[":
+                parent_key: Optional[str] = (
+                    self._current_key
+                    if self._stack and self._stack[-1][0] == "{"
+                    else None
+                )
+                self._stack.append([char, parent_key, 0, position])
+                self._expect_key = char == "{"
+            elif char in "}]":
+                if len(self._stack) == 1:
+                    self._end_top_level_value(position)
+                bracket, key, _, start = self._stack.pop()
+                if not self._stack:
+                    self._done = True
+                elif (
+                    bracket == "[" and len(self._stack) == 1 and key in self.array_keys
+                ):
+                    self.closed_arrays.add(key)
+                elif bracket == "{" and self._in_tracked_array():
+                    array: List[Any] = self._stack[-1]
+                    element_text: str = self._buffer[start : position + 1]
+                    try:
+                        elements.append((array[1], array[2], json.loads(element_text)))
+                    except json.JSONDecodeError:
+                        pass
+                    array[2] += 1
+                self._expect_key = False
+            elif char == ",":
+                if len(self._stack) == 1:
+                    self._end_top_level_value(position)
+                self._expect_key = self._stack[-1][0] == "{"
+            elif char == ":":
+                if len(self._stack) == 1:
+                    self._value_start = position + 1
+                self._expect_key = False
+
+        return elements
+
+
+def submit_web_task(
+    dispatcher: StreamedTaskDispatcher, index: int, task: WebTextSearchTask
+) -> None:
+    dispatcher.submit(
+        f"web_search[{index}]",
+        task,
+        ddg_text_search,
+        query=task.query,
+        query_count=task.query_count,
+    )
+
+
+def submit_weather_task(
+    dispatcher: StreamedTaskDispatcher, locations: List[str]
+) -> None:
+    dispatcher.submit(
+        "weather_search", locations, get_bulk_weather_data, locations=locations
+    )
+
+
+def run_streaming_multi_search_orchestration(
+    orchestrator_chain: Runnable,
+    orchestrator_inputs: Dict[str, Any],
+    metrics: StepMetrics,
+    max_concurrency: int = 8,
+) -> Tuple[MultiSearchTask, List[str], List[str], List[str]]:
+    """
+    Orchestrate and search with the tool stage overlapping generation.
+
+    `orchestrator_chain` must stream the raw orchestrator text (prompt, LLM
+    and a string parser). Each web task is dispatched as soon as its array
+    element is complete and valid, and all weather locations go out as one
+    bulk request once the weather array closes; either only after its
+    should_search flag has streamed as true. Once generation ends, the full
+    output is validated as a MultiSearchTask, and any tasks that were not
+    dispatched, or that differ from what was dispatched, are run then.
+    Knowledge base queries are not dispatched while streaming: they share one
+    embeddings call, so they run as one task once the output is parsed.
+
+    Records the "orchestration" and "tool_stage" steps, plus the
+    "tool_time_total" and "tool_time_hidden" stats. The hidden time is the
+    part of each used task's run time that overlapped orchestrator
+    generation; stale attempts are discarded and not counted.
+    """
+    scanner: TaskArrayScanner = TaskArrayScanner([WEB_TASKS, WEATHER_TASKS])
+    # Valid streamed elements by array and index, waiting for their flag
+    pending_web_tasks: Dict[int, WebTextSearchTask] = {}
+    weather_tasks: Dict[int, WeatherSearchTask] = {}
+    output_chunks: List[str] = []
+
+    stage: ToolStage = ToolStage(metrics, max_concurrency=max_concurrency)
+    dispatcher: StreamedTaskDispatcher = StreamedTaskDispatcher(stage)
+    try:
+        orchestration_start: float = perf_counter()
+        token_stream: Iterator[str] = orchestrator_chain.stream(orchestrator_inputs)
+        for chunk in token_stream:
+            output_chunks.append(chunk)
+            for array_key, index, element in scanner.feed(chunk):
+                try:
+                    if array_key == WEB_TASKS:
+                        pending_web_tasks[index] = WebTextSearchTask.model_validate(
+                            element
+                        )
+                    else:
+                        weather_tasks[index] = WeatherSearchTask.model_validate(
+                            element
+                        )
+                except ValidationError:
+                    continue
+
+            if scanner.flags.get(TASK_FLAGS[WEB_TASKS]):
+                for index, task in pending_web_tasks.items():
+                    submit_web_task(dispatcher, index, task)
+                pending_web_tasks.clear()
+            if (
+                WEATHER_TASKS in scanner.closed_arrays
+                and scanner.flags.get(TASK_FLAGS[WEATHER_TASKS])
+                and "weather_search" not in dispatcher.dispatched
+                and weather_tasks
+            ):
+                submit_weather_task(
+                    dispatcher,
+                    [weather_tasks[index].location for index in sorted(weather_tasks)],
+                )
+        orchestration_end: float = perf_counter()
+        metrics.record_step("orchestration", orchestration_end - orchestration_start)
+
+        search_task: MultiSearchTask = multi_task_orchestrator_parser.parse(
+            "".join(output_chunks)
+        )
+
+        web_futures: List[Future] = []
+        if search_task.should_search_web:
+            for index, task in enumerate(search_task.web_tasks):
+                web_futures.append(
+                    dispatcher.resolve(
+                        f"web_search[{index}]",
+                        task,
+                        ddg_text_search,
+                        query=task.query,
+                        query_count=task.query_count,
+                    )
+                )
+        weather_future: Optional[Future] = None
+        if search_task.should_search_weather and search_task.weather_tasks:
+            locations: List[str] = [task.location for task in search_task.weather_tasks]
+            weather_future = dispatcher.resolve(
+                "weather_search", locations, get_bulk_weather_data, locations=locations
+            )
+        knowledge_base_future: Optional[Future] = None
+        if (
+            search_task.should_search_knowledge_base
+            and search_task.knowledge_base_tasks
+        ):
+            queries: List[str] = [
+                task.query for task in search_task.knowledge_base_tasks
+            ]
+            knowledge_base_future = dispatcher.resolve(
+                "knowledge_base_search", queries, search_knowledge_base, queries=queries
+            )
+        dispatcher.discard_unused()
+
+        tool_stage_start: float = perf_counter()
+        web_search_results: List[str] = [future.result() for future in web_futures]
+        weather_search_results: List[str] = (
+            weather_future.result() if weather_future else []
+        )
+        knowledge_base_results: List[str] = (
+            knowledge_base_future.result() if knowledge_base_future else []
+        )
+        metrics.record_step("tool_stage", perf_counter() - tool_stage_start)
+    finally:
+        # Tasks the final output dropped are not waited for
+        stage.close(wait=False)
+
+    tool_time_total: float = 0.0
+    tool_time_hidden: float = 0.0
+    for task_name in dispatcher.used_names:
+        start, end = stage.task_spans[task_name]
+        tool_time_total += end - start
+        tool_time_hidden += max(0.0, min(end, orchestration_end) - start)
+    metrics.record_stat("tool_time_total", tool_time_total)
+    metrics.record_stat("tool_time_hidden", tool_time_hidden)
+
+    return (
+        search_task,
+        web_search_results,
+        weather_search_results,
+        knowledge_base_results,
+    )
@@ -0,0 +1,177 @@
+from asyncio import Semaphore, gather
+from concurrent.futures import Future, ThreadPoolExecutor
+from threading import Lock
+from time import perf_counter
+from typing import Any, Awaitable, Callable, Dict, List, Set, Tuple
+
+from tools.web_search import ddg_text_search, addg_text_search
+from tools.weather import get_bulk_weather_data, aget_bulk_weather_data
+from tools.knowledge_base import search_knowledge_base, asearch_knowledge_base
+from tasks.search import MultiSearchTask
+from chains.metrics import StepMetrics
+
+
+class ToolStage:
+    """
+    Bounded-concurrency executor for the tool stage of a chain.
+
+    Tasks are submitted with a unique name and run on at most
+    `max_concurrency` worker threads. Per-task durations are recorded in
+    `StepMetrics.task_times` under the submitted name, and the
+    `perf_counter` start and end of each task are kept in `task_spans`.
+    A discarded task's timings are dropped, including when it finishes later.
+    """
+
+    def __init__(self, metrics: StepMetrics, max_concurrency: int = 8) -> None:
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        self.metrics: StepMetrics = metrics
+        self.task_spans: Dict[str, Tuple[float, float]] = {}
+        self._discarded: Set[str] = set()
+        self._timing_lock: Lock = Lock()
+        self._executor: ThreadPoolExecutor = ThreadPoolExecutor(
+            max_workers=max_concurrency,
+            thread_name_prefix="tool-stage",
+        )
+
+    def submit(self, task_name: str, func: Callable[..., str], **kwargs) -> Future:
+        def run_timed_task() -> str:
+            start: float = perf_counter()
+            try:
+                return func(**kwargs)
+            finally:
+                end: float = perf_counter()
+                with self._timing_lock:
+                    if task_name not in self._discarded:
+                        self.task_spans[task_name] = (start, end)
+                        self.metrics.record_task(task_name, end - start)
+
+        return self._executor.submit(run_timed_task)
+
+    def discard(self, task_name: str) -> None:
+        with self._timing_lock:
+            self._discarded.add(task_name)
+            self.task_spans.pop(task_name, None)
+            self.metrics.task_times.pop(task_name, None)
+
+    def close(self, wait: bool = True) -> None:
+        # Without waiting, queued tasks are cancelled and running ones are
+        # left to finish in the background
+        self._executor.shutdown(wait=wait, cancel_futures=not wait)
+
+    def __enter__(self) -> "ToolStage":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def run_multi_search_task(
+    search_task: MultiSearchTask,
+    metrics: StepMetrics,
+    max_concurrency: int = 8,
+) -> Tuple[List[str], List[str], List[str]]:
+    """
+    Run every tool task of a MultiSearchTask concurrently.
+
+    Results are returned in task order regardless of completion order, as
+    `(web_search_results, weather_search_results, knowledge_base_results)`.
+    All weather locations are fetched by one `weather_search` task using a
+    WeatherAPI bulk request, and all knowledge base queries by one
+    `knowledge_base_search` task sharing a single embeddings call.
+    """
+    web_futures: List[Future] = []
+    weather_future: Future | None = None
+    knowledge_base_future: Future | None = None
+
+    with ToolStage(metrics, max_concurrency=max_concurrency) as stage:
+        if search_task.should_search_web:
+            for index, web_task in enumerate(search_task.web_tasks):
+                web_futures.append(
+                    stage.submit(
+                        f"web_search[{index}]",
+                        ddg_text_search,
+                        query=web_task.query,
+                        query_count=web_task.query_count,
+                    )
+                )
+        if search_task.should_search_weather and search_task.weather_tasks:
+            weather_future = stage.submit(
+                "weather_search",
+                get_bulk_weather_data,
+                locations=[task.location for task in search_task.weather_tasks],
+            )
+        if (
+            search_task.should_search_knowledge_base
+            and search_task.knowledge_base_tasks
+        ):
+            knowledge_base_future = stage.submit(
+                "knowledge_base_search",
+                search_knowledge_base,
+                queries=[task.query for task in search_task.knowledge_base_tasks],
+            )
+
+    return (
+        [future.result() for future in web_futures],
+        weather_future.result() if weather_future else [],
+        knowledge_base_future.result() if knowledge_base_future else [],
+    )
+
+
+async def arun_multi_search_task(
+    search_task: MultiSearchTask,
+    metrics: StepMetrics,
+    max_concurrency: int = 8,
+) -> Tuple[List[str], List[str], List[str]]:
+    """Async variant of `run_multi_search_task` bounded by a semaphore."""
+    if max_concurrency < 1:
+        raise ValueError("max_concurrency must be at least 1")
+    semaphore: Semaphore = Semaphore(max_concurrency)
+
+    async def run_timed_task(
+        task_name: str, func: Callable[..., Awaitable[Any]], **kwargs
+    ) -> Any:
+        async with semaphore:
+            start: float = perf_counter()
+            try:
+                return await func(**kwargs)
+            finally:
+                metrics.record_task(task_name, perf_counter() - start)
+
+    web_coroutines: List[Awaitable[str]] = []
+    if search_task.should_search_web:
+        for index, web_task in enumerate(search_task.web_tasks):
+            web_coroutines.append(
+                run_timed_task(
+                    f"web_search[{index}]",
+                    addg_text_search,
+                    query=web_task.query,
+                    query_count=web_task.query_count,
+                )
+            )
+
+    async def run_weather_search() -> List[str]:
+        if not (search_task.should_search_weather and search_task.weather_tasks):
+            return []
+        return await run_timed_task(
+            "weather_search",
+            aget_bulk_weather_data,
+            locations=[task.location for task in search_task.weather_tasks],
+        )
+
+    async def run_knowledge_base_search() -> List[str]:
+        if not (
+            search_task.should_search_knowledge_base
+            and search_task.knowledge_base_tasks
+        ):
+            return []
+        return await run_timed_task(
+            "knowledge_base_search",
+            asearch_knowledge_base,
+            queries=[task.query for task in search_task.knowledge_base_tasks],
+        )
+
+    *web_results, weather_results, knowledge_base_results = await gather(
+        *web_coroutines, run_weather_search(), run_knowledge_base_search()
+    )
+    return web_results, weather_results, knowledge_base_results
@@ -1,16 +1,39 @@
 from dataclasses import dataclass
+from typing import Optional
 
 from langchain_core.runnables import Runnable
 
+from chains.router import RouteClassifier
+
 
 @dataclass(frozen=True)
 class ChainConfig:
     orchestrator_llm: Runnable
     summarizer_llm: Runnable
     track_metrics: bool = True
+    # Upper bound on tool calls (web/weather searches) running at once
+    max_tool_concurrency: int = 8
+    # Start multi-task searches while the orchestrator is still generating
+    stream_orchestration: bool = False
+    # Confidence a local routing decision needs to skip the orchestrator LLM,
+    # None disables the fast path
+    fast_path_threshold: Optional[float] = None
+    route_classifier: Optional[RouteClassifier] = None
+    # Reuse orchestrator decisions for repeated queries in the same context
+    use_orchestrator_cache: bool = True
+    # Token budget for tool results in the summarizer prompt, None sends
+    # them unpacked
+    summarizer_context_budget: Optional[int] = 1500
 
 
 @dataclass(frozen=True)
 class ChainInputs:
     user_query: str
     chat_history: str
+    # Shorter history for the orchestrator prompt, defaults to chat_history
+    orchestrator_chat_history: Optional[str] = None
+
+    def get_orchestrator_chat_history(self) -> str:
+        if self.orchestrator_chat_history is None:
+            return self.chat_history
+        return self.orchestrator_chat_history
@@ -1,119 +1,347 @@
-from typing import Iterator, Generator, Optional, Dict
+import logging
+from typing import Iterator, AsyncIterator, Optional, Tuple
 from time import perf_counter
-from pprint import pprint
-from contextlib import contextmanager
-from dataclasses import dataclass, field
 
-from langchain_core.output_parsers import StrOutputParser
 from langchain_core.runnables import Runnable
 
-from tools.web_search import ddg_text_search
-from tools.weather import get_weather_data
+from tools.web_search import ddg_text_search, addg_text_search
+from tools.weather import get_weather_data, aget_weather_data
 from tasks.search import SingleSearchTask, MultiSearchTask
-from prompts.single_task import (
-    single_task_orchestrator_prompt,
-    single_task_orchestrator_parser,
-)
-from prompts.multi_task import (
-    multi_task_orchestrator_prompt,
-    multi_task_orchestrator_parser,
-)
-from prompts.summarizer import summarizer_prompt, simple_summarizer_prompt
 from chains.types import ChainConfig, ChainInputs
+from chains.registry import CompiledChains, get_compiled_chains
+from chains.metrics import StepMetrics, time_block, metrics_registry
+from chains.tool_stage import run_multi_search_task, arun_multi_search_task
+from chains.streaming_orchestrator import run_streaming_multi_search_orchestration
+from chains.router import RouteDecision, route_query
+from chains.context_packer import PackedContext, pack_summarizer_context
+from chains.orchestrator_cache import (
+    SINGLE_TASK_NAMESPACE,
+    MULTI_TASK_NAMESPACE,
+    get_cached_decision,
+    cache_decision,
+)
 
+logger = logging.getLogger(__name__)
+
+SIMPLE_CHAIN: str = "simple"
+SINGLE_TASK_CHAIN: str = "single_task"
+MULTI_TASK_CHAIN: str = "multi_task"
+
+
+def record_ttfb(
+    metrics: StepMetrics,
+    summarizer_start: float,
+    chain_start: Optional[float],
+) -> None:
+    ttfb_summarizer = perf_counter() - summarizer_start
+    ttfb_invocation = perf_counter() - chain_start if chain_start else 0
+    metrics.record_step("ttfb_summarizer", ttfb_summarizer)
+    metrics.record_step("ttfb_invocation", ttfb_invocation)
+    logger.debug(
+        "TTFB since summarizer %.4fs, since invocation %.4fs",
+        ttfb_summarizer,
+        ttfb_invocation,
+    )
 
-@dataclass
-class StepMetrics:
-    step_times: Dict[str, float] = field(default_factory=dict)
-    start_time: Optional[float] = None
-    enabled: bool = True
 
-    def record_step(self, step_name: str, duration: float) -> None:
-        if self.enabled:
-            self.step_times[step_name] = duration
+def get_model_name(llm: Runnable) -> str:
+    return str(
+        getattr(llm, "model_name", None)
+        or getattr(llm, "model", None)
+        or type(llm).__name__
+    )
 
-    def get_total_time(self) -> float:
-        return sum(self.step_times.values())
 
+def get_orchestrator_identity(config: ChainConfig) -> str:
+    # The class tells fakes from real clients that report the same model name
+    llm: Runnable = config.orchestrator_llm
+    return f"{type(llm).__name__}:{get_model_name(llm)}"
 
-@contextmanager
-def time_block(metrics: StepMetrics, step_name: str) -> Generator[None, None, None]:
+
+def publish_metrics(config: ChainConfig, metrics: StepMetrics, chain: str) -> None:
     if not metrics.enabled:
-        yield
         return
+    metrics.record_stat("stream_total", perf_counter() - metrics.start_time)
+    metrics_registry.observe_step_metrics(
+        metrics,
+        chain=chain,
+        orchestrator_model=get_model_name(config.orchestrator_llm),
+        summarizer_model=get_model_name(config.summarizer_llm),
+    )
+    logger.info(
+        "%s chain finished in %.4fs, steps %s, tasks %s",
+        chain,
+        metrics.stats["stream_total"],
+        metrics.step_times,
+        metrics.task_times,
+    )
+
 
-    start: float = perf_counter()
+def stream_with_metrics(
+    config: ChainConfig,
+    metrics: StepMetrics,
+    chain: str,
+    result_stream: Iterator[str],
+) -> Iterator[str]:
+    """Yield the summarizer's chunks, recording TTFB and publishing metrics."""
+    summarizer_start: Optional[float] = perf_counter() if metrics.enabled else None
+    try:
+        for chunk in result_stream:
+            if summarizer_start is not None:
+                record_ttfb(metrics, summarizer_start, metrics.start_time)
+                summarizer_start = None
+            yield chunk
+    finally:
+        # Also runs when the consumer stops early and closes the stream
+        publish_metrics(config, metrics, chain)
+
+
+async def astream_with_metrics(
+    config: ChainConfig,
+    metrics: StepMetrics,
+    chain: str,
+    result_stream: AsyncIterator[str],
+) -> AsyncIterator[str]:
+    summarizer_start: Optional[float] = perf_counter() if metrics.enabled else None
     try:
-        yield
+        async for chunk in result_stream:
+            if summarizer_start is not None:
+                record_ttfb(metrics, summarizer_start, metrics.start_time)
+                summarizer_start = None
+            yield chunk
     finally:
-        duration: float = perf_counter() - start
-        metrics.record_step(step_name, duration)
+        publish_metrics(config, metrics, chain)
+
+
+def pack_tool_results(
+    config: ChainConfig,
+    user_query: str,
+    web_search_results: Optional[list[str] | str],
+    weather_search_results: Optional[list[str] | str],
+    metrics: StepMetrics,
+    knowledge_base_results: Optional[list[str] | str] = None,
+) -> Tuple[
+    Optional[list[str] | str], Optional[list[str] | str], Optional[list[str] | str]
+]:
+    if config.summarizer_context_budget is None:
+        return web_search_results, weather_search_results, knowledge_base_results
+
+    with time_block(metrics, "context_packing"):
+        packed: PackedContext = pack_summarizer_context(
+            user_query,
+            web_search_results,
+            weather_search_results,
+            token_budget=config.summarizer_context_budget,
+            knowledge_base_results=knowledge_base_results,
+        )
+    metrics.record_stat("context_tokens_before", packed.tokens_before)
+    metrics.record_stat("context_tokens_after", packed.tokens_after)
+    logger.debug(
+        "Summarizer context tokens: %d -> %d",
+        packed.tokens_before,
+        packed.tokens_after,
+    )
+    return (
+        packed.web_search_results,
+        packed.weather_search_results,
+        packed.knowledge_base_results,
+    )
+
+
+def resolve_local_search_task(
+    config: ChainConfig,
+    inputs: ChainInputs,
+    metrics: StepMetrics,
+    namespace: str,
+) -> Optional[SingleSearchTask | MultiSearchTask]:
+    """
+    Find a search task without calling the orchestrator LLM.
+
+    Tries the fast-path router first, then the orchestrator decision cache.
+    `namespace` selects the task type: SINGLE_TASK_NAMESPACE or
+    MULTI_TASK_NAMESPACE. Returns None when the LLM has to decide.
+    """
+    if config.fast_path_threshold is not None:
+        with time_block(metrics, "fast_path"):
+            route: Optional[RouteDecision] = route_query(
+                inputs.user_query,
+                inputs.get_orchestrator_chat_history(),
+                threshold=config.fast_path_threshold,
+                classifier=config.route_classifier,
+            )
+        if route is not None:
+            logger.debug("Fast path route: %s (%.2f)", route.rule, route.confidence)
+            if namespace == SINGLE_TASK_NAMESPACE:
+                return route.to_single_search_task()
+            return route.to_multi_search_task()
+
+    if config.use_orchestrator_cache:
+        cached_task = get_cached_decision(
+            namespace,
+            inputs.user_query,
+            inputs.get_orchestrator_chat_history(),
+            model=get_orchestrator_identity(config),
+        )
+        if cached_task is not None:
+            logger.debug("Orchestrator decision cache hit")
+            return cached_task
+
+    return None
+
+
+def store_search_task(
+    config: ChainConfig,
+    inputs: ChainInputs,
+    namespace: str,
+    search_task: SingleSearchTask | MultiSearchTask,
+) -> None:
+    if config.use_orchestrator_cache:
+        cache_decision(
+            namespace,
+            inputs.user_query,
+            inputs.get_orchestrator_chat_history(),
+            search_task,
+            model=get_orchestrator_identity(config),
+        )
 
 
 def get_multi_web_search_chain_response_stream(
     config: ChainConfig,
     inputs: ChainInputs,
 ) -> Iterator[str]:
-    orchestrator_llm: Runnable = config.orchestrator_llm
-    summarizer_llm: Runnable = config.summarizer_llm
+    chains: CompiledChains = get_compiled_chains(config)
     track_metrics: bool = config.track_metrics
     user_query: str = inputs.user_query
     chat_history: str = inputs.chat_history
 
     metrics: StepMetrics = StepMetrics(enabled=track_metrics)
 
-    orchestrator_chain: Runnable = (
-        multi_task_orchestrator_prompt
-        | orchestrator_llm
-        | multi_task_orchestrator_parser
+    orchestrator_inputs: dict = {
+        "user_query": user_query,
+        "chat_history": inputs.get_orchestrator_chat_history(),
+    }
+
+    search_task: Optional[MultiSearchTask] = resolve_local_search_task(
+        config, inputs, metrics, MULTI_TASK_NAMESPACE
     )
+    if search_task is None and config.stream_orchestration:
+        # Orchestration and tool steps overlap: searches start as soon as
+        # their task is complete in the orchestrator's token stream
+        (
+            search_task,
+            web_search_results,
+            weather_search_results,
+            knowledge_base_results,
+        ) = run_streaming_multi_search_orchestration(
+            chains.multi_task_orchestrator_text,
+            orchestrator_inputs,
+            metrics=metrics,
+            max_concurrency=config.max_tool_concurrency,
+        )
+        store_search_task(config, inputs, MULTI_TASK_NAMESPACE, search_task)
+    else:
+        if search_task is None:
+            # Orchestration step
+            with time_block(metrics, "orchestration"):
+                search_task = chains.multi_task_orchestrator.invoke(
+                    orchestrator_inputs
+                )
+            store_search_task(config, inputs, MULTI_TASK_NAMESPACE, search_task)
+
+        # Tool step: web, weather and knowledge base tasks run concurrently
+        with time_block(metrics, "tool_stage"):
+            web_search_results, weather_search_results, knowledge_base_results = (
+                run_multi_search_task(
+                    search_task,
+                    metrics=metrics,
+                    max_concurrency=config.max_tool_concurrency,
+                )
+            )
 
-    # Orchestration step
-    with time_block(metrics, "orchestration"):
-        search_task: MultiSearchTask = orchestrator_chain.invoke(
-            {
-                "user_query": user_query,
-                "chat_history": chat_history,
-            }
+    logger.debug("Search task: %s", search_task)
+    if "tool_time_hidden" in metrics.stats:
+        logger.debug(
+            "Tool time hidden behind orchestration: %.4fs of %.4fs",
+            metrics.stats["tool_time_hidden"],
+            metrics.stats["tool_time_total"],
+        )
+
+    # Context packing step
+    web_search_results, weather_search_results, knowledge_base_results = (
+        pack_tool_results(
+            config,
+            user_query,
+            web_search_results,
+            weather_search_results,
+            metrics,
+            knowledge_base_results,
         )
-    pprint(f"Search task: {search_task}")
-    pprint(
-        f"Orchestration step time: {metrics.step_times.get('orchestration', 0):.4f}s"
     )
 
+    # Summarization step, TTFB tracking and metrics publishing
+    result_stream: Iterator[str] = chains.summarizer.stream(
+        {
+            "user_query": user_query,
+            "chat_history": chat_history,
+            "web_search_results": web_search_results,
+            "weather_search_results": weather_search_results,
+            "knowledge_base_results": knowledge_base_results,
+        }
+    )
+
+    yield from stream_with_metrics(config, metrics, MULTI_TASK_CHAIN, result_stream)
+
+
+def get_single_web_search_chain_response_stream(
+    config: ChainConfig,
+    inputs: ChainInputs,
+) -> Iterator[str]:
+    chains: CompiledChains = get_compiled_chains(config)
+    track_metrics: bool = config.track_metrics
+    user_query: str = inputs.user_query
+    chat_history: str = inputs.chat_history
+
+    metrics: StepMetrics = StepMetrics(enabled=track_metrics)
+
+    # Orchestration step, skipped when the task is known locally
+    search_task: Optional[SingleSearchTask] = resolve_local_search_task(
+        config, inputs, metrics, SINGLE_TASK_NAMESPACE
+    )
+    if search_task is None:
+        with time_block(metrics, "orchestration"):
+            search_task = chains.single_task_orchestrator.invoke(
+                {
+                    "user_query": user_query,
+                    "chat_history": inputs.get_orchestrator_chat_history(),
+                }
+            )
+        store_search_task(config, inputs, SINGLE_TASK_NAMESPACE, search_task)
+    logger.debug("Search task: %s", search_task)
+
     # Web search step
-    web_search_results: list[str] = []
-    with time_block(metrics, "web_search"):
-        if search_task.should_search_web:
-            for web_task in search_task.web_tasks:
-                web_search_results.append(
-                    ddg_text_search(
-                        query=web_task.query,
-                        query_count=web_task.query_count,
-                    )
-                )
-    pprint(f"Web search step time: {metrics.step_times.get('web_search', 0):.4f}s")
+    web_search_results: str | None = None
+    if search_task.should_search_web:
+        with time_block(metrics, "web_search"):
+            web_search_results = ddg_text_search(
+                query=search_task.web_query,
+                query_count=search_task.web_query_count,
+            )
 
     # Weather search step
-    weather_search_results: list[str] = []
-    with time_block(metrics, "weather_search"):
-        if search_task.should_search_weather:
-            for weather_task in search_task.weather_tasks:
-                weather_search_results.append(
-                    get_weather_data(
-                        location=weather_task.location,
-                    )
-                )
-    pprint(
-        f"Weather search step time: {metrics.step_times.get('weather_search', 0):.4f}s"
-    )
+    weather_search_results: str | None = None
+    if search_task.should_search_weather:
+        with time_block(metrics, "weather_search"):
+            weather_search_results = get_weather_data(
+                location=search_task.weather_query,
+            )
 
-    # Summarization step and TTFB tracking
-    summarizer_chain: Runnable = summarizer_prompt | summarizer_llm | StrOutputParser()
-    chain_start: float = metrics.start_time if track_metrics else None
-    summarizer_start: float = perf_counter() if track_metrics else None
+    # Context packing step
+    web_search_results, weather_search_results, _ = pack_tool_results(
+        config, user_query, web_search_results, weather_search_results, metrics
+    )
 
-    result_stream: Iterator[str] = summarizer_chain.stream(
+    # Summarization step, TTFB tracking and metrics publishing
+    result_stream: Iterator[str] = chains.summarizer.stream(
         {
             "user_query": user_query,
             "chat_history": chat_history,
@@ -122,77 +350,151 @@ def get_multi_web_search_chain_response_stream(
         }
     )
 
-    for chunk in result_stream:
-        if track_metrics and summarizer_start:
-            ttfb_summarizer = perf_counter() - summarizer_start
-            ttfb_invocation = perf_counter() - chain_start if chain_start else 0
-            metrics.record_step("ttfb_summarizer", ttfb_summarizer)
-            metrics.record_step("ttfb_invocation", ttfb_invocation)
-            pprint(f"Time to first byte since summarizer: {ttfb_summarizer:.4f}s")
-            pprint(f"Time to first byte since invocation: {ttfb_invocation:.4f}s")
-            pprint(f"Total step times: {metrics.get_total_time():.4f}s")
-            summarizer_start = None
-        yield chunk
+    yield from stream_with_metrics(config, metrics, SINGLE_TASK_CHAIN, result_stream)
 
 
-def get_single_web_search_chain_response_stream(
+def get_simple_chain_response_stream(
     config: ChainConfig,
     inputs: ChainInputs,
 ) -> Iterator[str]:
-    orchestrator_llm: Runnable = config.orchestrator_llm
-    summarizer_llm: Runnable = config.summarizer_llm
+    chains: CompiledChains = get_compiled_chains(config)
     track_metrics: bool = config.track_metrics
     user_query: str = inputs.user_query
     chat_history: str = inputs.chat_history
 
     metrics: StepMetrics = StepMetrics(enabled=track_metrics)
 
-    orchestrator_chain: Runnable = (
-        single_task_orchestrator_prompt
-        | orchestrator_llm
-        | single_task_orchestrator_parser
+    # Summarization step, TTFB tracking and metrics publishing
+    result_stream: Iterator[str] = chains.simple_summarizer.stream(
+        {
+            "user_query": user_query,
+            "chat_history": chat_history,
+        }
+    )
+
+    yield from stream_with_metrics(config, metrics, SIMPLE_CHAIN, result_stream)
+
+
+async def aget_multi_web_search_chain_response_stream(
+    config: ChainConfig,
+    inputs: ChainInputs,
+) -> AsyncIterator[str]:
+    chains: CompiledChains = get_compiled_chains(config)
+    track_metrics: bool = config.track_metrics
+    user_query: str = inputs.user_query
+    chat_history: str = inputs.chat_history
+
+    metrics: StepMetrics = StepMetrics(enabled=track_metrics)
+
+    # Orchestration step, skipped when the task is known locally
+    search_task: Optional[MultiSearchTask] = resolve_local_search_task(
+        config, inputs, metrics, MULTI_TASK_NAMESPACE
     )
+    if search_task is None:
+        with time_block(metrics, "orchestration"):
+            search_task = await chains.multi_task_orchestrator.ainvoke(
+                {
+                    "user_query": user_query,
+                    "chat_history": inputs.get_orchestrator_chat_history(),
+                }
+            )
+        store_search_task(config, inputs, MULTI_TASK_NAMESPACE, search_task)
+    logger.debug("Search task: %s", search_task)
+
+    # Tool step: web, weather and knowledge base tasks run concurrently
+    web_search_results: list[str] = []
+    weather_search_results: list[str] = []
+    knowledge_base_results: list[str] = []
+    with time_block(metrics, "tool_stage"):
+        (
+            web_search_results,
+            weather_search_results,
+            knowledge_base_results,
+        ) = await arun_multi_search_task(
+            search_task,
+            metrics=metrics,
+            max_concurrency=config.max_tool_concurrency,
+        )
 
-    # Orchestration step
-    with time_block(metrics, "orchestration"):
-        search_task: SingleSearchTask = orchestrator_chain.invoke(
-            {
-                "user_query": user_query,
-                "chat_history": chat_history,
-            }
+    # Context packing step
+    web_search_results, weather_search_results, knowledge_base_results = (
+        pack_tool_results(
+            config,
+            user_query,
+            web_search_results,
+            weather_search_results,
+            metrics,
+            knowledge_base_results,
         )
-    pprint(f"Search task: {search_task}")
-    pprint(
-        f"Orchestration step time: {metrics.step_times.get('orchestration', 0):.4f}s"
     )
 
+    # Summarization step, TTFB tracking and metrics publishing
+    result_stream: AsyncIterator[str] = chains.summarizer.astream(
+        {
+            "user_query": user_query,
+            "chat_history": chat_history,
+            "web_search_results": web_search_results,
+            "weather_search_results": weather_search_results,
+            "knowledge_base_results": knowledge_base_results,
+        }
+    )
+
+    async for chunk in astream_with_metrics(
+        config, metrics, MULTI_TASK_CHAIN, result_stream
+    ):
+        yield chunk
+
+
+async def aget_single_web_search_chain_response_stream(
+    config: ChainConfig,
+    inputs: ChainInputs,
+) -> AsyncIterator[str]:
+    chains: CompiledChains = get_compiled_chains(config)
+    track_metrics: bool = config.track_metrics
+    user_query: str = inputs.user_query
+    chat_history: str = inputs.chat_history
+
+    metrics: StepMetrics = StepMetrics(enabled=track_metrics)
+
+    # Orchestration step, skipped when the task is known locally
+    search_task: Optional[SingleSearchTask] = resolve_local_search_task(
+        config, inputs, metrics, SINGLE_TASK_NAMESPACE
+    )
+    if search_task is None:
+        with time_block(metrics, "orchestration"):
+            search_task = await chains.single_task_orchestrator.ainvoke(
+                {
+                    "user_query": user_query,
+                    "chat_history": inputs.get_orchestrator_chat_history(),
+                }
+            )
+        store_search_task(config, inputs, SINGLE_TASK_NAMESPACE, search_task)
+    logger.debug("Search task: %s", search_task)
+
     # Web search step
     web_search_results: str | None = None
-    with time_block(metrics, "web_search"):
-        if search_task.should_search_web:
-            web_search_results = ddg_text_search(
+    if search_task.should_search_web:
+        with time_block(metrics, "web_search"):
+            web_search_results = await addg_text_search(
                 query=search_task.web_query,
                 query_count=search_task.web_query_count,
             )
-    pprint(f"Web search step time: {metrics.step_times.get('web_search', 0):.4f}s")
 
     # Weather search step
     weather_search_results: str | None = None
-    with time_block(metrics, "weather_search"):
-        if search_task.should_search_weather:
-            weather_search_results = get_weather_data(
+    if search_task.should_search_weather:
+        with time_block(metrics, "weather_search"):
+            weather_search_results = await aget_weather_data(
                 location=search_task.weather_query,
             )
-    pprint(
-        f"Weather search step time: {metrics.step_times.get('weather_search', 0):.4f}s"
-    )
 
-    # Summarization step and TTFB tracking
-    summarizer_chain: Runnable = summarizer_prompt | summarizer_llm | StrOutputParser()
-    chain_start: float = metrics.start_time if track_metrics else None
-    summarizer_start: float = perf_counter() if track_metrics else None
+    # Context packing step
+    web_search_results, weather_search_results, _ = pack_tool_results(
+        config, user_query, web_search_results, weather_search_results, metrics
+    )
 
-    result_stream: Iterator[str] = summarizer_chain.stream(
+    # Summarization step, TTFB tracking and metrics publishing
+    result_stream: AsyncIterator[str] = chains.summarizer.astream(
         {
             "user_query": user_query,
             "chat_history": chat_history,
@@ -201,52 +503,32 @@ def get_single_web_search_chain_response_stream(
         }
     )
 
-    for chunk in result_stream:
-        if track_metrics and summarizer_start:
-            ttfb_summarizer = perf_counter() - summarizer_start
-            ttfb_invocation = perf_counter() - chain_start if chain_start else 0
-            metrics.record_step("ttfb_summarizer", ttfb_summarizer)
-            metrics.record_step("ttfb_invocation", ttfb_invocation)
-            pprint(f"Time to first byte since summarizer: {ttfb_summarizer:.4f}s")
-            pprint(f"Time to first byte since invocation: {ttfb_invocation:.4f}s")
-            pprint(f"Total step times: {metrics.get_total_time():.4f}s")
-            summarizer_start = None
+    async for chunk in astream_with_metrics(
+        config, metrics, SINGLE_TASK_CHAIN, result_stream
+    ):
         yield chunk
 
 
-def get_simple_chain_response_stream(
+async def aget_simple_chain_response_stream(
     config: ChainConfig,
     inputs: ChainInputs,
-) -> Iterator[str]:
-    summarizer_llm: Runnable = config.summarizer_llm
+) -> AsyncIterator[str]:
+    chains: CompiledChains = get_compiled_chains(config)
     track_metrics: bool = config.track_metrics
     user_query: str = inputs.user_query
     chat_history: str = inputs.chat_history
 
     metrics: StepMetrics = StepMetrics(enabled=track_metrics)
 
-    # Summarization step and TTFB tracking
-    simple_summarizer_chain: Runnable = (
-        simple_summarizer_prompt | summarizer_llm | StrOutputParser()
-    )
-    chain_start: float = metrics.start_time if track_metrics else None
-    summarizer_start: float = perf_counter() if track_metrics else None
-
-    result_stream: Iterator[str] = simple_summarizer_chain.stream(
+    # Summarization step, TTFB tracking and metrics publishing
+    result_stream: AsyncIterator[str] = chains.simple_summarizer.astream(
         {
             "user_query": user_query,
             "chat_history": chat_history,
         }
     )
 
-    for chunk in result_stream:
-        if track_metrics and summarizer_start:
-            ttfb_summarizer = perf_counter() - summarizer_start
-            ttfb_invocation = perf_counter() - chain_start if chain_start else 0
-            metrics.record_step("ttfb_summarizer", ttfb_summarizer)
-            metrics.record_step("ttfb_invocation", ttfb_invocation)
-            pprint(f"Time to first byte since summarizer: {ttfb_summarizer:.4f}s")
-            pprint(f"Time to first byte since invocation: {ttfb_invocation:.4f}s")
-            pprint(f"Total step times: {metrics.get_total_time():.4f}s")
-            summarizer_start = None
+    async for chunk in astream_with_metrics(
+        config, metrics, SIMPLE_CHAIN, result_stream
+    ):
         yield chunk
@@ -4,6 +4,18 @@ import streamlit as st
 from langchain_core.messages import HumanMessage, AIMessage
 
 from chains.types import ChainInputs
+from chains.history import (
+    ChatHistoryManager,
+    HistoryBudget,
+    ORCHESTRATOR_HISTORY_BUDGET,
+    SUMMARIZER_HISTORY_BUDGET,
+)
+from components.history_ui import HistoryRenderer, get_history_renderer
+from factories.response_stream import (
+    DEFAULT_COALESCE_DELAY_MS,
+    DEFAULT_COALESCE_MAX_CHARS,
+    coalesce_stream,
+)
 
 
 def init_chat_history(history_key: str = "chat_history") -> None:
@@ -11,6 +23,30 @@ def init_chat_history(history_key: str = "chat_history") -> None:
         st.session_state[history_key] = []
 
 
+def get_history_manager(history_key: str = "chat_history") -> ChatHistoryManager:
+    # One manager per history, so pages never share a rolling summary
+    manager_key: str = f"{history_key}_manager"
+    if manager_key not in st.session_state:
+        st.session_state[manager_key] = ChatHistoryManager()
+    return st.session_state[manager_key]
+
+
+def build_chain_inputs(
+    user_query: str,
+    chat_history: List[HumanMessage | AIMessage],
+    history_manager: ChatHistoryManager,
+    orchestrator_budget: HistoryBudget = ORCHESTRATOR_HISTORY_BUDGET,
+    summarizer_budget: HistoryBudget = SUMMARIZER_HISTORY_BUDGET,
+) -> ChainInputs:
+    return ChainInputs(
+        user_query=user_query,
+        chat_history=history_manager.render(chat_history, summarizer_budget),
+        orchestrator_chat_history=history_manager.render(
+            chat_history, orchestrator_budget
+        ),
+    )
+
+
 def render_chat_messages(messages: List[HumanMessage | AIMessage]) -> None:
     for message in messages:
         if isinstance(message, HumanMessage):
@@ -28,16 +64,34 @@ def is_valid_query(user_query: str) -> bool:
 
 def setup_simple_chat(
     response_stream: Callable[[ChainInputs], Iterator[str]],
+    orchestrator_budget: HistoryBudget = ORCHESTRATOR_HISTORY_BUDGET,
+    summarizer_budget: HistoryBudget = SUMMARIZER_HISTORY_BUDGET,
+    coalesce_delay_ms: float = DEFAULT_COALESCE_DELAY_MS,
+    coalesce_max_chars: int = DEFAULT_COALESCE_MAX_CHARS,
 ) -> None:
     init_chat_history()
+    history_manager: ChatHistoryManager = get_history_manager()
+    history_renderer: HistoryRenderer = get_history_renderer()
 
     # Alias the chat history from the session state
     chat_history: List[HumanMessage | AIMessage] = st.session_state.chat_history
-    render_chat_messages(chat_history)
+    # Trimmed messages were folded into the prompt summary long ago; the
+    # history manager notices the change and rebuilds that summary once
+    history_renderer.trim_history(chat_history)
+    history_renderer.render(chat_history)
 
     # Use the valid user query to get a LangChain response stream
     user_query: str = st.chat_input("I have a question about...")
     if is_valid_query(user_query):
+        # Render the prior turns under budget before adding the new query
+        inputs: ChainInputs = build_chain_inputs(
+            user_query,
+            chat_history,
+            history_manager,
+            orchestrator_budget=orchestrator_budget,
+            summarizer_budget=summarizer_budget,
+        )
+
         # Append the user query to the chat history
         chat_history.append(HumanMessage(user_query))
 
@@ -45,13 +99,15 @@ def setup_simple_chat(
             st.markdown(user_query)
 
         with st.chat_message("ai"):
-            response_stream = response_stream(
-                inputs=ChainInputs(
-                    user_query=user_query,
-                    chat_history=chat_history,
-                ),
+            # Batch per-token chunks so the page re-renders a few times a
+            # second instead of once per token
+            ai_response = st.write_stream(
+                coalesce_stream(
+                    response_stream(inputs=inputs),
+                    max_delay_ms=coalesce_delay_ms,
+                    max_chars=coalesce_max_chars,
+                )
             )
-            ai_response = st.write_stream(response_stream)
 
         # Append the full AI response to the chat history
         chat_history.append(AIMessage(ai_response))
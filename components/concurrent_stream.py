@@ -0,0 +1,148 @@
+import asyncio
+from dataclasses import dataclass
+from queue import Queue
+from threading import Event, Thread
+from time import perf_counter
+from typing import Iterator, List, Optional, Sequence
+
+import streamlit as st
+
+from factories.response_stream import ResponseStream
+
+
+@dataclass(frozen=True)
+class StreamEvent:
+    """A chunk, completion or failure of one of several multiplexed streams."""
+
+    index: int
+    elapsed: float
+    chunk: Optional[str] = None
+    done: bool = False
+    error: Optional[BaseException] = None
+
+
+@dataclass
+class StreamProgress:
+    text: str = ""
+    ttfb: Optional[float] = None
+    total_time: Optional[float] = None
+    error: Optional[BaseException] = None
+
+
+def drain_stream(
+    index: int,
+    stream: ResponseStream,
+    events: Queue,
+    stopped: Event,
+    start_time: float,
+) -> None:
+    def put_chunk(chunk: str) -> None:
+        events.put(StreamEvent(index, perf_counter() - start_time, chunk=chunk))
+
+    async def drain_async_stream() -> None:
+        async for chunk in stream:
+            if stopped.is_set():
+                break
+            put_chunk(chunk)
+
+    try:
+        if hasattr(stream, "__aiter__"):
+            # Each async stream gets its own event loop on its worker thread
+            asyncio.run(drain_async_stream())
+        else:
+            for chunk in stream:
+                if stopped.is_set():
+                    break
+                put_chunk(chunk)
+    except Exception as error:
+        events.put(
+            StreamEvent(index, perf_counter() - start_time, done=True, error=error)
+        )
+    else:
+        events.put(StreamEvent(index, perf_counter() - start_time, done=True))
+
+
+def multiplex_streams(streams: Sequence[ResponseStream]) -> Iterator[StreamEvent]:
+    """
+    Drain every stream on its own worker thread and yield their events as
+    they arrive.
+
+    Chunks of one stream keep their order, and every stream ends with
+    exactly one `done` event carrying its error, if any. Closing the
+    returned generator early stops the workers at their next chunk.
+    """
+    events: Queue = Queue()
+    stopped: Event = Event()
+    start_time: float = perf_counter()
+    workers: List[Thread] = [
+        Thread(
+            target=drain_stream,
+            args=(index, stream, events, stopped, start_time),
+            name=f"response-stream-{index}",
+            daemon=True,
+        )
+        for index, stream in enumerate(streams)
+    ]
+    for worker in workers:
+        worker.start()
+
+    remaining: int = len(workers)
+    try:
+        while remaining:
+            event: StreamEvent = events.get()
+            if event.done:
+                remaining -= 1
+            yield event
+    finally:
+        stopped.set()
+
+
+def format_latency_badge(progress: StreamProgress) -> str:
+    badge: str = (
+        f"TTFB {progress.ttfb:.2f}s" if progress.ttfb is not None else "TTFB n/a"
+    )
+    if progress.total_time is not None:
+        badge += f" · total {progress.total_time:.2f}s"
+    return badge
+
+
+def write_streams_concurrently(
+    streams: Sequence[ResponseStream],
+    containers: Sequence,
+) -> List[StreamProgress]:
+    """
+    Stream several responses at once, each into its own Streamlit container.
+
+    Only the script thread touches Streamlit; the worker threads just pull
+    chunks. Every container shows the streamed text and a latency badge
+    with its own time to first chunk, measured from a shared start.
+    """
+    text_placeholders = []
+    badge_placeholders = []
+    for container in containers:
+        with container:
+            text_placeholders.append(st.empty())
+            badge_placeholders.append(st.empty())
+
+    progresses: List[StreamProgress] = [StreamProgress() for _ in streams]
+    for event in multiplex_streams(streams):
+        progress: StreamProgress = progresses[event.index]
+        if event.chunk is not None:
+            if progress.ttfb is None:
+                progress.ttfb = event.elapsed
+                badge_placeholders[event.index].caption(
+                    format_latency_badge(progress)
+                )
+            progress.text += event.chunk
+            text_placeholders[event.index].markdown(progress.text + "▌")
+        if event.done:
+            progress.total_time = event.elapsed
+            progress.error = event.error
+            if event.error is not None:
+                text_placeholders[event.index].error(
+                    f"The chain failed: {event.error}"
+                )
+            else:
+                text_placeholders[event.index].markdown(progress.text)
+            badge_placeholders[event.index].caption(format_latency_badge(progress))
+    return progresses
@@ -0,0 +1,126 @@
+from typing import Any, List, MutableSequence, Sequence, Tuple
+
+import streamlit as st
+from langchain_core.messages import BaseMessage
+
+from chains.history import CHARS_PER_TOKEN, truncate_to_tokens
+
+RENDERED_ROLES: Tuple[str, ...] = ("human", "ai")
+
+
+def get_message_markdown(message: BaseMessage) -> str:
+    content: Any = message.content
+    if isinstance(content, str):
+        return content
+    # Multimodal messages carry a list of strings and typed content blocks
+    return "\n\n".join(
+        part if isinstance(part, str) else str(part.get("text", ""))
+        for part in content
+        if isinstance(part, str) or part.get("type") == "text"
+    )
+
+
+def render_message(message: BaseMessage) -> None:
+    if message.type not in RENDERED_ROLES:
+        return
+    with st.chat_message(message.type):
+        st.markdown(get_message_markdown(message))
+
+
+class HistoryRenderer:
+    """
+    Renders the tail of a chat history and bounds the content it retains.
+
+    Only the last `window_size` messages are emitted on a rerun. Older ones
+    sit in a collapsed "Earlier messages" section that stays empty until
+    the user loads them, `page_size` at a time. `trim_history` caps the
+    session's retained message content at `max_retained_chars`: once over
+    it, the oldest messages outside the window are cut to
+    `trimmed_message_chars` until the history is back under three quarters
+    of the cap, so trimming happens every few turns rather than on each one.
+    """
+
+    def __init__(
+        self,
+        window_size: int = 20,
+        page_size: int = 20,
+        max_retained_chars: int = 200_000,
+        trimmed_message_chars: int = 500,
+    ) -> None:
+        if window_size < 1 or page_size < 1:
+            raise ValueError("window_size and page_size must be at least 1")
+        self.window_size: int = window_size
+        self.page_size: int = page_size
+        self.max_retained_chars: int = max_retained_chars
+        self.trimmed_message_chars: int = trimmed_message_chars
+        self.visible_count: int = window_size
+
+    def trim_history(self, messages: MutableSequence[BaseMessage]) -> int:
+        """Trim old message content in place, returning the characters freed."""
+        sizes: List[int] = [len(get_message_markdown(message)) for message in messages]
+        retained_chars: int = sum(sizes)
+        if retained_chars <= self.max_retained_chars:
+            return 0
+
+        target_chars: int = self.max_retained_chars * 3 // 4
+        freed_chars: int = 0
+        for index in range(max(len(messages) - self.window_size, 0)):
+            if retained_chars - freed_chars <= target_chars:
+                break
+            if sizes[index] <= self.trimmed_message_chars:
+                continue
+            trimmed: str = truncate_to_tokens(
+                get_message_markdown(messages[index]),
+                self.trimmed_message_chars // CHARS_PER_TOKEN,
+            )
+            messages[index] = messages[index].model_copy(update={"content": trimmed})
+            freed_chars += sizes[index] - len(trimmed)
+        return freed_chars
+
+    def get_visible_messages(
+        self, messages: Sequence[BaseMessage]
+    ) -> Tuple[int, Sequence[BaseMessage]]:
+        hidden_count: int = max(len(messages) - self.visible_count, 0)
+        return hidden_count, messages[hidden_count:]
+
+    def load_earlier(self) -> None:
+        self.visible_count += self.page_size
+
+    def render(self, messages: Sequence[BaseMessage]) -> None:
+        hidden_count, visible_messages = self.get_visible_messages(messages)
+        recent_start: int = max(len(visible_messages) - self.window_size, 0)
+        earlier_messages = visible_messages[:recent_start]
+
+        if hidden_count or earlier_messages:
+            earlier_count: int = hidden_count + len(earlier_messages)
+            with st.expander(
+                f"Earlier messages ({earlier_count})",
+                expanded=bool(earlier_messages),
+            ):
+                if hidden_count:
+                    st.button(
+                        f"Load earlier messages ({hidden_count} hidden)",
+                        on_click=self.load_earlier,
+                        key=f"load_earlier_{id(self)}",
+                    )
+                # Nothing is emitted here until the user loads a page
+                for message in earlier_messages:
+                    render_message(message)
+
+        for message in visible_messages[recent_start:]:
+            render_message(message)
+
+
+def get_history_renderer(
+    renderer_key: str = "chat_history_renderer",
+    window_size: int = 20,
+    page_size: int = 20,
+    max_retained_chars: int = 200_000,
+) -> HistoryRenderer:
+    if renderer_key not in st.session_state:
+        st.session_state[renderer_key] = HistoryRenderer(
+            window_size=window_size,
+            page_size=page_size,
+            max_retained_chars=max_retained_chars,
+        )
+    return st.session_state[renderer_key]
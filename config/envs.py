@@ -1,4 +1,6 @@
+from functools import cache
 from os import getenv
+from typing import FrozenSet, Optional
 from warnings import warn
 
 from dotenv import load_dotenv
@@ -28,18 +30,71 @@ def validate_env(env_name: str) -> str:
     return value
 
 
-# Verify .env file is correctly loaded
-if not load_dotenv():
-    warn("No .env file found, assuming environment variables are injected")
+REQUIRED_ENV_NAMES: FrozenSet[str] = frozenset(
+    {
+        # OpenAI configuration
+        "OPENAI_API_KEY",
+        "OPENAI_LITE_MODEL_ID",
+        "OPENAI_REGULAR_MODEL_ID",
+        # Pinecone configuration
+        "PINECONE_API_KEY",
+        "PINECONE_INDEX_NAME",
+        # WeatherAPI configuration
+        "WEATHERAPI_API_KEY",
+    }
+)
 
-# OpenAI configuration
-OPENAI_API_KEY = validate_env("OPENAI_API_KEY")
-OPENAI_LITE_MODEL_ID = validate_env("OPENAI_LITE_MODEL_ID")
-OPENAI_REGULAR_MODEL_ID = validate_env("OPENAI_REGULAR_MODEL_ID")
+OPTIONAL_ENV_NAMES: FrozenSet[str] = frozenset(
+    {
+        # Cache files, in-memory only when unset
+        "WEATHER_CACHE_PATH",
+        "SEARCH_CACHE_PATH",
+        "EMBEDDING_CACHE_PATH",
+        # Metrics exposition, disabled when unset
+        "METRICS_PORT",
+        "METRICS_FILE_PATH",
+        # Vector store backend, "pinecone" (default) or "local"
+        "VECTOR_STORE_BACKEND",
+        "LOCAL_VECTOR_INDEX_PATH",
+        # BM25 index written by the ingestion CLI, enables hybrid retrieval
+        "LEXICAL_INDEX_PATH",
+        # What the knowledge base covers, shown to the multi-task orchestrator
+        "KNOWLEDGE_BASE_DESCRIPTION",
+    }
+)
 
-# Pinecone configuration
-PINECONE_API_KEY = validate_env("PINECONE_API_KEY")
-PINECONE_INDEX_NAME = validate_env("PINECONE_INDEX_NAME")
 
-# WeatherAPI configuration
-WEATHERAPI_API_KEY = validate_env("WEATHERAPI_API_KEY")
+@cache
+def load_env_file() -> bool:
+    # Verify .env file is correctly loaded
+    loaded: bool = load_dotenv()
+    if not loaded:
+        warn("No .env file found, assuming environment variables are injected")
+    return loaded
+
+
+@cache
+def get_env(env_name: str) -> str:
+    """
+    Load and validate a required environment variable on first use.
+
+    Only the variables a code path actually reads are validated, so a
+    weather-only page does not fail on missing OpenAI or Pinecone settings.
+    """
+    load_env_file()
+    return validate_env(env_name)
+
+
+def get_optional_env(env_name: str) -> Optional[str]:
+    load_env_file()
+    return getenv(env_name)
+
+
+def __getattr__(name: str) -> Optional[str]:
+    # Keeps `from config.envs import OPENAI_API_KEY` working, but resolves
+    # the value when it is imported rather than when this module is
+    if name in REQUIRED_ENV_NAMES:
+        return get_env(name)
+    if name in OPTIONAL_ENV_NAMES:
+        return get_optional_env(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,19 @@
+import streamlit as st
+
+from chains.types import ChainConfig
+from llms.openai import get_openai_lite_model, get_openai_regular_model
+
+
+@st.cache_resource(show_spinner=False)
+def get_default_chain_config() -> ChainConfig:
+    """
+    The pages' chain configuration, shared across reruns and sessions.
+
+    Returning the same ChainConfig, and so the same LLM clients, lets the
+    chain registry hand every request the pipelines it compiled first.
+    """
+    return ChainConfig(
+        orchestrator_llm=get_openai_regular_model(),
+        summarizer_llm=get_openai_lite_model(),
+        track_metrics=True,
+    )
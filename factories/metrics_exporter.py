@@ -0,0 +1,16 @@
+import streamlit as st
+
+from config.envs import get_optional_env
+from chains.metrics_exporter import start_metrics_server, start_metrics_file_writer
+
+
+@st.cache_resource(show_spinner=False)
+def start_metrics_exporters() -> None:
+    """Start the exporters configured by env vars, once per process."""
+    metrics_port = get_optional_env("METRICS_PORT")
+    if metrics_port:
+        start_metrics_server(int(metrics_port))
+
+    metrics_file_path = get_optional_env("METRICS_FILE_PATH")
+    if metrics_file_path:
+        start_metrics_file_writer(metrics_file_path)
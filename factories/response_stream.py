@@ -1,12 +1,207 @@
-from typing import Iterator, Callable
+import asyncio
+from contextlib import suppress
+from typing import AsyncIterator, Awaitable, Iterator, Callable, List
 from functools import partial
+from queue import Empty, Queue
+from threading import Event, Thread
+from time import perf_counter
 
 from chains.types import ChainConfig, ChainInputs
 
+ResponseStream = Iterator[str] | AsyncIterator[str]
+
+# At most 20 UI updates per second, each carrying a few lines of text
+DEFAULT_COALESCE_DELAY_MS: float = 50
+DEFAULT_COALESCE_MAX_CHARS: int = 256
+
 
 def prepare_chain_response_stream(
-    config: ChainConfig,
-    get_chain_response_stream: Callable[[ChainConfig, ChainInputs], Iterator[str]],
-) -> Callable[[ChainInputs], Iterator[str]]:
-    """Creates a configured response stream function that only needs inputs."""
-    return partial(get_chain_response_stream, config=config)
+    config: ChainConfig | Callable[[], ChainConfig],
+    get_chain_response_stream: Callable[[ChainConfig, ChainInputs], ResponseStream],
+) -> Callable[[ChainInputs], ResponseStream]:
+    """
+    Creates a configured response stream function that only needs inputs.
+
+    Works with both the sync generators (`get_*_chain_response_stream`) and
+    their async counterparts (`aget_*_chain_response_stream`); the returned
+    callable yields the same kind of stream as the one it wraps. `config`
+    may also be a provider, called on each response, so pages can defer
+    building LLM clients until the first query.
+    """
+    if isinstance(config, ChainConfig):
+        return partial(get_chain_response_stream, config=config)
+
+    def get_response_stream(inputs: ChainInputs) -> ResponseStream:
+        return get_chain_response_stream(config=config(), inputs=inputs)
+
+    return get_response_stream
+
+
+class _StreamFailure:
+    def __init__(self, error: BaseException) -> None:
+        self.error: BaseException = error
+
+
+_STREAM_END = object()
+
+
+def coalesce_stream(
+    stream: Iterator[str],
+    max_delay_ms: float = DEFAULT_COALESCE_DELAY_MS,
+    max_chars: int = DEFAULT_COALESCE_MAX_CHARS,
+) -> Iterator[str]:
+    """
+    Batch the chunks of a token stream before they reach the UI.
+
+    The first chunk is passed through as soon as it arrives, so the time to
+    first chunk is unchanged. Later chunks are joined until `max_chars`
+    characters are buffered or the oldest buffered chunk has waited
+    `max_delay_ms`, whichever comes first. The source is read on a worker
+    thread, so a stalled source never holds back buffered text for longer
+    than the delay. A non-positive delay disables coalescing. When the
+    consumer stops early, the source is closed as soon as the reader gets
+    control back, so its cleanup, such as publishing metrics, still runs.
+    """
+    if max_delay_ms <= 0:
+        yield from stream
+        return
+
+    chunks: Queue = Queue()
+    stopped: Event = Event()
+
+    def read_stream() -> None:
+        try:
+            for chunk in stream:
+                if stopped.is_set():
+                    break
+                chunks.put(chunk)
+        except BaseException as error:
+            chunks.put(_StreamFailure(error))
+        finally:
+            # Closing from the consumer would race with a `next` in progress
+            close: Callable[[], None] | None = getattr(stream, "close", None)
+            if close is not None:
+                close()
+            chunks.put(_STREAM_END)
+
+    Thread(target=read_stream, name="coalesce-stream", daemon=True).start()
+
+    max_delay: float = max_delay_ms / 1000
+    buffer: List[str] = []
+    buffered_chars: int = 0
+    flush_deadline: float = 0.0
+    first_chunk: bool = True
+    try:
+        while True:
+            timeout: float | None = (
+                max(flush_deadline - perf_counter(), 0) if buffer else None
+            )
+            try:
+                item = chunks.get(timeout=timeout)
+            except Empty:
+                yield "".join(buffer)
+                buffer, buffered_chars = [], 0
+                continue
+
+            if item is _STREAM_END or isinstance(item, _StreamFailure):
+                if buffer:
+                    yield "".join(buffer)
+                if isinstance(item, _StreamFailure):
+                    raise item.error
+                return
+
+            if first_chunk:
+                first_chunk = False
+                yield item
+                continue
+
+            if not buffer:
+                flush_deadline = perf_counter() + max_delay
+            buffer.append(item)
+            buffered_chars += len(item)
+            if buffered_chars >= max_chars or perf_counter() >= flush_deadline:
+                yield "".join(buffer)
+                buffer, buffered_chars = [], 0
+    finally:
+        # Stop reading the source if the consumer goes away early
+        stopped.set()
+
+
+async def aclose_stream(stream: AsyncIterator[str]) -> None:
+    aclose: Callable[[], Awaitable[None]] | None = getattr(stream, "aclose", None)
+    if aclose is not None:
+        await aclose()
+
+
+async def acoalesce_stream(
+    stream: AsyncIterator[str],
+    max_delay_ms: float = DEFAULT_COALESCE_DELAY_MS,
+    max_chars: int = DEFAULT_COALESCE_MAX_CHARS,
+) -> AsyncIterator[str]:
+    """
+    Async variant of `coalesce_stream` for the `aget_*_chain_response_stream`
+    generators. The source is read on a task of the same event loop, which
+    is cancelled and the source closed when the consumer stops early.
+    """
+    if max_delay_ms <= 0:
+        try:
+            async for chunk in stream:
+                yield chunk
+        finally:
+            await aclose_stream(stream)
+        return
+
+    chunks: asyncio.Queue = asyncio.Queue()
+
+    async def read_stream() -> None:
+        try:
+            async for chunk in stream:
+                chunks.put_nowait(chunk)
+        except Exception as error:
+            chunks.put_nowait(_StreamFailure(error))
+        finally:
+            chunks.put_nowait(_STREAM_END)
+
+    reader: asyncio.Task = asyncio.create_task(read_stream())
+
+    max_delay: float = max_delay_ms / 1000
+    buffer: List[str] = []
+    buffered_chars: int = 0
+    flush_deadline: float = 0.0
+    first_chunk: bool = True
+    try:
+        while True:
+            timeout: float | None = (
+                max(flush_deadline - perf_counter(), 0) if buffer else None
+            )
+            try:
+                item = await asyncio.wait_for(chunks.get(), timeout)
+            except asyncio.TimeoutError:
+                yield "".join(buffer)
+                buffer, buffered_chars = [], 0
+                continue
+
+            if item is _STREAM_END or isinstance(item, _StreamFailure):
+                if buffer:
+                    yield "".join(buffer)
+                if isinstance(item, _StreamFailure):
+                    raise item.error
+                return
+
+            if first_chunk:
+                first_chunk = False
+                yield item
+                continue
+
+            if not buffer:
+                flush_deadline = perf_counter() + max_delay
+            buffer.append(item)
+            buffered_chars += len(item)
+            if buffered_chars >= max_chars or perf_counter() >= flush_deadline:
+                yield "".join(buffer)
+                buffer, buffered_chars = [], 0
+    finally:
+        reader.cancel()
+        with suppress(asyncio.CancelledError):
+            await reader
+        await aclose_stream(stream)
@@ -0,0 +1,138 @@
+"""
+Ingest a sitemap or a local directory into the vector store.
+
+Only pages that are new or changed since the last run are fetched,
+embedded and upserted; the ingestion state records what was written.
+The backend follows VECTOR_STORE_BACKEND unless --backend is given, and
+`--fake-embeddings` runs without OpenAI, e.g. to measure throughput.
+
+Usage:
+    python -m ingestion (--sitemap URL | --directory PATH)
+        [--backend pinecone|local] [--index-path DIR] [--state-path FILE]
+        [--lexical-index-path DIR]
+        [--embed-batch-size 256] [--upsert-batch-size 100]
+        [--fetch-concurrency 8] [--embed-concurrency 4] [--fake-embeddings 1536]
+"""
+
+import logging
+from argparse import ArgumentParser, Namespace
+from typing import Iterable, Optional
+
+from langchain_core.embeddings import DeterministicFakeEmbedding, Embeddings
+
+from config.envs import get_env, get_optional_env
+from ingestion.pipeline import (
+    DEFAULT_CHUNK_OVERLAP,
+    DEFAULT_CHUNK_SIZE,
+    DEFAULT_EMBED_BATCH_SIZE,
+    DEFAULT_EMBED_CONCURRENCY,
+    DEFAULT_FETCH_CONCURRENCY,
+    DEFAULT_UPSERT_BATCH_SIZE,
+    IngestionPipeline,
+)
+from ingestion.sources import (
+    SourceDocument,
+    iter_directory_documents,
+    iter_sitemap_documents,
+)
+from ingestion.state import IngestionState
+from ingestion.writers import (
+    CompositeIndexWriter,
+    LexicalIndexWriter,
+    LocalIndexWriter,
+    PineconeIndexWriter,
+    VectorIndexWriter,
+)
+from tools.vecterstore import LOCAL_BACKEND, PINECONE_BACKEND
+
+DEFAULT_STATE_PATH: str = "ingestion_state.sqlite"
+
+
+def make_writer(
+    backend: str, embeddings: Embeddings, index_path: Optional[str]
+) -> VectorIndexWriter:
+    if backend == LOCAL_BACKEND:
+        return LocalIndexWriter(
+            embeddings, index_path or get_env("LOCAL_VECTOR_INDEX_PATH")
+        )
+
+    from pinecone import Pinecone
+
+    pc = Pinecone(api_key=get_env("PINECONE_API_KEY"))
+    return PineconeIndexWriter(pc.Index(name=get_env("PINECONE_INDEX_NAME")))
+
+
+def main() -> None:
+    parser = ArgumentParser(description=__doc__.strip().splitlines()[0])
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--sitemap", help="Sitemap or sitemap index URL")
+    source.add_argument("--directory", help="Directory of .md, .txt and .html files")
+    parser.add_argument(
+        "--backend",
+        choices=(PINECONE_BACKEND, LOCAL_BACKEND),
+        default=get_optional_env("VECTOR_STORE_BACKEND") or PINECONE_BACKEND,
+    )
+    parser.add_argument("--index-path", help="Local index directory")
+    parser.add_argument("--state-path", default=DEFAULT_STATE_PATH)
+    parser.add_argument(
+        "--lexical-index-path",
+        default=get_optional_env("LEXICAL_INDEX_PATH"),
+        help="Also keep a BM25 index of the chunks here, for hybrid retrieval",
+    )
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--chunk-overlap", type=int, default=DEFAULT_CHUNK_OVERLAP)
+    parser.add_argument(
+        "--embed-batch-size", type=int, default=DEFAULT_EMBED_BATCH_SIZE
+    )
+    parser.add_argument(
+        "--upsert-batch-size", type=int, default=DEFAULT_UPSERT_BATCH_SIZE
+    )
+    parser.add_argument(
+        "--fetch-concurrency", type=int, default=DEFAULT_FETCH_CONCURRENCY
+    )
+    parser.add_argument(
+        "--embed-concurrency", type=int, default=DEFAULT_EMBED_CONCURRENCY
+    )
+    parser.add_argument(
+        "--fake-embeddings",
+        type=int,
+        metavar="DIMENSIONS",
+        help="Use deterministic fake embeddings instead of OpenAI",
+    )
+    args: Namespace = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    embeddings: Embeddings
+    if args.fake_embeddings:
+        embeddings = DeterministicFakeEmbedding(size=args.fake_embeddings)
+    else:
+        from llms.openai import get_openai_embeddings
+
+        embeddings = get_openai_embeddings()
+
+    documents: Iterable[SourceDocument] = (
+        iter_sitemap_documents(args.sitemap)
+        if args.sitemap
+        else iter_directory_documents(args.directory)
+    )
+    writer: VectorIndexWriter = make_writer(args.backend, embeddings, args.index_path)
+    if args.lexical_index_path:
+        writer = CompositeIndexWriter(
+            [writer, LexicalIndexWriter(args.lexical_index_path)]
+        )
+    pipeline = IngestionPipeline(
+        embeddings,
+        writer,
+        IngestionState(args.state_path),
+        chunk_size=args.chunk_size,
+        chunk_overlap=args.chunk_overlap,
+        embed_batch_size=args.embed_batch_size,
+        upsert_batch_size=args.upsert_batch_size,
+        fetch_concurrency=args.fetch_concurrency,
+        embed_concurrency=args.embed_concurrency,
+    )
+    print(pipeline.run(documents).format())
+
+
+if __name__ == "__main__":
+    main()
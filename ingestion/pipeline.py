@@ -0,0 +1,306 @@
+import logging
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from hashlib import sha256
+from time import perf_counter, sleep
+from typing import (
+    Callable,
+    Deque,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    TypeVar,
+)
+
+from langchain_core.embeddings import Embeddings
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from ingestion.sources import SourceDocument, load_document_text
+from ingestion.state import DocumentState, IngestionState
+from ingestion.writers import VectorIndexWriter, VectorRecord
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+DEFAULT_CHUNK_SIZE: int = 1000
+DEFAULT_CHUNK_OVERLAP: int = 100
+# OpenAI accepts up to 2048 inputs per request; larger batches mean fewer
+# round trips, the limit here keeps one batch's vectors a few MB
+DEFAULT_EMBED_BATCH_SIZE: int = 256
+# Pinecone caps requests at 2 MB, about 100 vectors of 1536 dimensions
+DEFAULT_UPSERT_BATCH_SIZE: int = 100
+DEFAULT_FETCH_CONCURRENCY: int = 8
+DEFAULT_EMBED_CONCURRENCY: int = 4
+DEFAULT_RETRIES: int = 3
+DEFAULT_RETRY_BACKOFF: float = 1.0
+
+
+# A document, its state from the last run, and its text, None if loading failed
+LoadedDocument = Tuple[SourceDocument, Optional[DocumentState], Optional[str]]
+
+
+def bounded_map(
+    executor: ThreadPoolExecutor,
+    function: Callable[[T], R],
+    items: Iterable[T],
+    max_in_flight: int,
+) -> Iterator[R]:
+    """
+    Like `executor.map`, but pulls `items` lazily.
+
+    At most `max_in_flight` calls are pending at a time, so a long or
+    unbounded input is never materialized. Results keep the input order.
+    """
+    pending: Deque[Future] = deque()
+    for item in items:
+        pending.append(executor.submit(function, item))
+        if len(pending) >= max_in_flight:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def call_with_retries(
+    function: Callable[[], R],
+    retries: int = DEFAULT_RETRIES,
+    backoff: float = DEFAULT_RETRY_BACKOFF,
+) -> R:
+    for attempt in range(retries + 1):
+        try:
+            return function()
+        except Exception:
+            if attempt == retries:
+                raise
+            logger.warning("Attempt %d failed, retrying", attempt + 1, exc_info=True)
+            sleep(backoff * 2**attempt)
+
+
+def get_text_hash(text: str) -> str:
+    return sha256(text.encode("utf-8")).hexdigest()
+
+
+def get_chunk_id(source: str, index: int) -> str:
+    # Deterministic, so re-ingesting a page overwrites its previous chunks
+    return f"{sha256(source.encode('utf-8')).hexdigest()[:32]}#{index}"
+
+
+@dataclass
+class ChunkBatch:
+    records: List[VectorRecord] = field(default_factory=list)
+    # Chunks of these documents are all in this batch; their state is saved
+    # once it is written, along with ids of chunks they no longer have
+    documents: List[DocumentState] = field(default_factory=list)
+    stale_ids: List[str] = field(default_factory=list)
+
+
+@dataclass
+class IngestionReport:
+    seen: int = 0
+    skipped_lastmod: int = 0
+    skipped_content: int = 0
+    ingested: int = 0
+    failed: int = 0
+    chunks: int = 0
+    deleted_chunks: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def docs_per_second(self) -> float:
+        return self.seen / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def chunks_per_second(self) -> float:
+        return self.chunks / self.elapsed if self.elapsed else 0.0
+
+    def format(self) -> str:
+        return (
+            f"{self.seen} documents in {self.elapsed:.2f}s "
+            f"({self.docs_per_second:.1f} docs/s): "
+            f"{self.ingested} ingested as {self.chunks} chunks "
+            f"({self.chunks_per_second:.1f} chunks/s), "
+            f"{self.skipped_lastmod} unchanged lastmod, "
+            f"{self.skipped_content} unchanged content, "
+            f"{self.deleted_chunks} stale chunks deleted, {self.failed} failed"
+        )
+
+
+class IngestionPipeline:
+    """
+    Incremental ingestion of documents into a vector index.
+
+    Documents stream through four stages: a `lastmod` check against the
+    ingestion state, concurrent fetching, chunking with a content-hash
+    check, and batched embedding with bounded concurrency, after which
+    batches are upserted with retries. Every stage holds a bounded number
+    of documents, so memory does not grow with the corpus. A document's
+    state is saved only after its chunks are written, so an interrupted
+    run picks up where it stopped.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        writer: VectorIndexWriter,
+        state: IngestionState,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        chunk_overlap: int = DEFAULT_CHUNK_OVERLAP,
+        embed_batch_size: int = DEFAULT_EMBED_BATCH_SIZE,
+        upsert_batch_size: int = DEFAULT_UPSERT_BATCH_SIZE,
+        fetch_concurrency: int = DEFAULT_FETCH_CONCURRENCY,
+        embed_concurrency: int = DEFAULT_EMBED_CONCURRENCY,
+        retries: int = DEFAULT_RETRIES,
+        retry_backoff: float = DEFAULT_RETRY_BACKOFF,
+        load_text: Callable[[SourceDocument], str] = load_document_text,
+    ) -> None:
+        self.embeddings: Embeddings = embeddings
+        self.writer: VectorIndexWriter = writer
+        self.state: IngestionState = state
+        self.splitter = RecursiveCharacterTextSplitter(
+            chunk_size=chunk_size, chunk_overlap=chunk_overlap
+        )
+        self.embed_batch_size: int = embed_batch_size
+        self.upsert_batch_size: int = upsert_batch_size
+        self.fetch_concurrency: int = fetch_concurrency
+        self.embed_concurrency: int = embed_concurrency
+        self.retries: int = retries
+        self.retry_backoff: float = retry_backoff
+        self.load_text: Callable[[SourceDocument], str] = load_text
+
+    def _retry(self, function: Callable[[], R]) -> R:
+        return call_with_retries(function, self.retries, self.retry_backoff)
+
+    def _iter_changed(
+        self, documents: Iterable[SourceDocument], report: IngestionReport
+    ) -> Iterator[Tuple[SourceDocument, Optional[DocumentState]]]:
+        for document in documents:
+            report.seen += 1
+            previous: Optional[DocumentState] = self.state.get(document.source)
+            if (
+                previous is not None
+                and previous.lastmod is not None
+                and document.lastmod is not None
+                and document.lastmod <= previous.lastmod
+            ):
+                report.skipped_lastmod += 1
+                continue
+            yield document, previous
+
+    def _load(
+        self, item: Tuple[SourceDocument, Optional[DocumentState]]
+    ) -> LoadedDocument:
+        document, previous = item
+        try:
+            return document, previous, self._retry(lambda: self.load_text(document))
+        except Exception:
+            logger.exception("Could not load %s", document.source)
+            return document, previous, None
+
+    def _iter_batches(
+        self,
+        loaded: Iterable[LoadedDocument],
+        report: IngestionReport,
+    ) -> Iterator[ChunkBatch]:
+        batch = ChunkBatch()
+        for document, previous, text in loaded:
+            if text is None:
+                report.failed += 1
+                continue
+            # Pages without a lastmod are dated by when they were crawled
+            lastmod: datetime = document.lastmod or datetime.now(timezone.utc)
+            content_hash: str = get_text_hash(text)
+            if previous is not None and previous.content_hash == content_hash:
+                # Only the state moves forward; the indexed chunks keep the
+                # lastmod of when their content last changed
+                self.state.set(
+                    DocumentState(
+                        document.source, lastmod, content_hash, previous.chunk_count
+                    )
+                )
+                report.skipped_content += 1
+                continue
+
+            chunks: List[str] = self.splitter.split_text(text)
+            for index, chunk in enumerate(chunks):
+                batch.records.append(
+                    VectorRecord(
+                        id=get_chunk_id(document.source, index),
+                        values=[],
+                        metadata={
+                            "text": chunk,
+                            "source": document.source,
+                            "chunk": index,
+                            "lastmod": lastmod.isoformat(),
+                            "lastmod_year": lastmod.year,
+                        },
+                    )
+                )
+            previous_count: int = previous.chunk_count if previous else 0
+            batch.stale_ids.extend(
+                get_chunk_id(document.source, index)
+                for index in range(len(chunks), previous_count)
+            )
+            batch.documents.append(
+                DocumentState(document.source, lastmod, content_hash, len(chunks))
+            )
+            if len(batch.records) >= self.embed_batch_size:
+                yield batch
+                batch = ChunkBatch()
+        if batch.documents:
+            yield batch
+
+    def _embed(self, batch: ChunkBatch) -> ChunkBatch:
+        if not batch.records:
+            return batch
+        texts: List[str] = [record.metadata["text"] for record in batch.records]
+        vectors: List[List[float]] = self._retry(
+            lambda: self.embeddings.embed_documents(texts)
+        )
+        batch.records = [
+            VectorRecord(record.id, vector, record.metadata)
+            for record, vector in zip(batch.records, vectors)
+        ]
+        return batch
+
+    def _write(self, batch: ChunkBatch, report: IngestionReport) -> None:
+        for start in range(0, len(batch.records), self.upsert_batch_size):
+            records = batch.records[start : start + self.upsert_batch_size]
+            self._retry(lambda: self.writer.upsert(records))
+        if batch.stale_ids:
+            self._retry(lambda: self.writer.delete(batch.stale_ids))
+        for document in batch.documents:
+            self.state.set(document)
+        report.ingested += len(batch.documents)
+        report.chunks += len(batch.records)
+        report.deleted_chunks += len(batch.stale_ids)
+
+    def run(self, documents: Iterable[SourceDocument]) -> IngestionReport:
+        report = IngestionReport()
+        start: float = perf_counter()
+        try:
+            with ThreadPoolExecutor(
+                max_workers=self.fetch_concurrency, thread_name_prefix="ingest-fetch"
+            ) as fetch_executor, ThreadPoolExecutor(
+                max_workers=self.embed_concurrency, thread_name_prefix="ingest-embed"
+            ) as embed_executor:
+                changed = self._iter_changed(documents, report)
+                loaded = bounded_map(
+                    fetch_executor, self._load, changed, self.fetch_concurrency
+                )
+                batches = self._iter_batches(loaded, report)
+                # Writes stay on this thread and in input order, so a document's
+                # state is never saved ahead of an earlier batch that failed
+                for batch in bounded_map(
+                    embed_executor, self._embed, batches, self.embed_concurrency
+                ):
+                    self._write(batch, report)
+        finally:
+            # Keeps what was written before a failure, matching the state
+            self.writer.flush()
+            report.elapsed = perf_counter() - start
+        return report
@@ -0,0 +1,142 @@
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from html.parser import HTMLParser
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+from xml.etree.ElementTree import Element, XMLPullParser
+
+from httpx import Client
+
+from tools.http_client import get_http_client
+
+SITEMAP_CHUNK_SIZE: int = 64 * 1024
+DEFAULT_FILE_PATTERNS: Tuple[str, ...] = ("*.md", "*.txt", "*.html", "*.htm")
+
+# Tags whose text never belongs in a document
+SKIPPED_HTML_TAGS: Tuple[str, ...] = ("script", "style", "noscript", "template")
+# Tags that end a line of text, so words from separate blocks do not merge
+BLOCK_HTML_TAGS: Tuple[str, ...] = (
+    "p", "div", "br", "li", "tr", "section", "article", "header", "footer",
+    "h1", "h2", "h3", "h4", "h5", "h6", "pre", "blockquote", "title",
+)  # fmt: skip
+
+
+@dataclass(frozen=True)
+class SourceDocument:
+    # URL, or path for documents read from a directory
+    source: str
+    lastmod: Optional[datetime] = None
+
+
+def parse_lastmod(value: Optional[str]) -> Optional[datetime]:
+    """Parse a sitemap W3C datetime ("2024-05-01", "2024-05-01T10:00Z", ...)."""
+    if not value or not value.strip():
+        return None
+    try:
+        parsed: datetime = datetime.fromisoformat(value.strip())
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+def get_local_name(element: Element) -> str:
+    # "{http://www.sitemaps.org/schemas/sitemap/0.9}url" -> "url"
+    return element.tag.rsplit("}", 1)[-1]
+
+
+def iter_sitemap_documents(
+    url: str, client: Optional[Client] = None
+) -> Iterator[SourceDocument]:
+    """
+    Stream the pages listed in a sitemap, following sitemap indexes.
+
+    The response is parsed incrementally and each entry is released once
+    yielded, so memory stays flat however many URLs a sitemap lists.
+    """
+    client = client or get_http_client()
+    nested_sitemaps: List[str] = []
+    parser = XMLPullParser(events=("end",))
+    with client.stream("GET", url) as response:
+        response.raise_for_status()
+        for chunk in response.iter_bytes(SITEMAP_CHUNK_SIZE):
+            parser.feed(chunk)
+            for _, element in parser.read_events():
+                name: str = get_local_name(element)
+                if name not in ("url", "sitemap"):
+                    continue
+                fields = {get_local_name(child): child.text for child in element}
+                element.clear()
+                location: str = (fields.get("loc") or "").strip()
+                if not location:
+                    continue
+                if name == "sitemap":
+                    nested_sitemaps.append(location)
+                else:
+                    yield SourceDocument(location, parse_lastmod(fields.get("lastmod")))
+        parser.close()
+
+    for nested_url in nested_sitemaps:
+        yield from iter_sitemap_documents(nested_url, client)
+
+
+def iter_directory_documents(
+    directory: str | Path, patterns: Tuple[str, ...] = DEFAULT_FILE_PATTERNS
+) -> Iterator[SourceDocument]:
+    for path in sorted(Path(directory).rglob("*")):
+        if path.is_file() and any(path.match(pattern) for pattern in patterns):
+            lastmod = datetime.fromtimestamp(path.stat().st_mtime, tz=timezone.utc)
+            yield SourceDocument(str(path), lastmod)
+
+
+class HTMLTextExtractor(HTMLParser):
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=True)
+        self.parts: List[str] = []
+        self._skipped_depth: int = 0
+
+    def handle_starttag(self, tag: str, attrs) -> None:
+        if tag in SKIPPED_HTML_TAGS:
+            self._skipped_depth += 1
+        elif tag in BLOCK_HTML_TAGS:
+            self.parts.append("\n")
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag in SKIPPED_HTML_TAGS:
+            self._skipped_depth = max(self._skipped_depth - 1, 0)
+        elif tag in BLOCK_HTML_TAGS:
+            self.parts.append("\n")
+
+    def handle_data(self, data: str) -> None:
+        if not self._skipped_depth:
+            self.parts.append(data)
+
+
+def html_to_text(html: str) -> str:
+    extractor = HTMLTextExtractor()
+    extractor.feed(html)
+    extractor.close()
+    lines = (" ".join(line.split()) for line in "".join(extractor.parts).splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+def is_url(source: str) -> bool:
+    return source.startswith(("http://", "https://"))
+
+
+def load_document_text(
+    document: SourceDocument, client: Optional[Client] = None
+) -> str:
+    if is_url(document.source):
+        response = (client or get_http_client()).get(
+            document.source, follow_redirects=True
+        )
+        response.raise_for_status()
+        if "html" in response.headers.get("content-type", "text/html"):
+            return html_to_text(response.text)
+        return response.text
+
+    path = Path(document.source)
+    text: str = path.read_text(encoding="utf-8", errors="replace")
+    return html_to_text(text) if path.suffix in (".html", ".htm") else text
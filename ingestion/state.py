@@ -0,0 +1,70 @@
+import sqlite3
+from dataclasses import dataclass
+from datetime import datetime
+from threading import Lock
+from typing import Optional
+
+from ingestion.sources import parse_lastmod
+
+
+@dataclass(frozen=True)
+class DocumentState:
+    source: str
+    lastmod: Optional[datetime]
+    content_hash: str
+    chunk_count: int
+
+
+class IngestionState:
+    """
+    SQLite record of what each source looked like when it was last ingested.
+
+    Lets a re-run skip pages whose `lastmod` did not move without fetching
+    them, and pages whose content hash did not change without embedding them.
+    """
+
+    def __init__(self, path: str = ":memory:") -> None:
+        self._lock: Lock = Lock()
+        self._connection: sqlite3.Connection = sqlite3.connect(
+            path, check_same_thread=False
+        )
+        with self._lock, self._connection:
+            self._connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS ingested_documents (
+                    source TEXT PRIMARY KEY,
+                    lastmod TEXT,
+                    content_hash TEXT NOT NULL,
+                    chunk_count INTEGER NOT NULL
+                )
+                """
+            )
+
+    def get(self, source: str) -> Optional[DocumentState]:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT lastmod, content_hash, chunk_count "
+                "FROM ingested_documents WHERE source = ?",
+                (source,),
+            ).fetchone()
+        if row is None:
+            return None
+        return DocumentState(source, parse_lastmod(row[0]), row[1], row[2])
+
+    def set(self, state: DocumentState) -> None:
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO ingested_documents VALUES (?, ?, ?, ?)",
+                (
+                    state.source,
+                    state.lastmod.isoformat() if state.lastmod else None,
+                    state.content_hash,
+                    state.chunk_count,
+                ),
+            )
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connection.execute(
+                "SELECT COUNT(*) FROM ingested_documents"
+            ).fetchone()[0]
@@ -0,0 +1,130 @@
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Protocol
+
+from langchain_core.embeddings import Embeddings
+
+from tools.lexical_index import BM25Index
+from tools.local_vectorstore import DOCUMENTS_FILE, LocalVectorStore
+
+
+@dataclass(frozen=True)
+class VectorRecord:
+    id: str
+    values: List[float]
+    # Includes the chunk text under "text", where PineconeVectorStore reads it
+    metadata: Dict[str, Any]
+
+
+class VectorIndexWriter(Protocol):
+    def upsert(self, records: List[VectorRecord]) -> None: ...
+
+    def delete(self, ids: List[str]) -> None: ...
+
+    def flush(self) -> None: ...
+
+
+class PineconeIndexWriter:
+    def __init__(self, index: Any, namespace: Optional[str] = None) -> None:
+        # A pinecone.Index; typed loosely to keep pinecone an optional import
+        self.index: Any = index
+        self.namespace: Optional[str] = namespace
+
+    def upsert(self, records: List[VectorRecord]) -> None:
+        self.index.upsert(
+            vectors=[
+                {"id": record.id, "values": record.values, "metadata": record.metadata}
+                for record in records
+            ],
+            namespace=self.namespace,
+        )
+
+    def delete(self, ids: List[str]) -> None:
+        self.index.delete(ids=ids, namespace=self.namespace)
+
+    def flush(self) -> None:
+        # Pinecone writes are durable once acknowledged
+        pass
+
+
+class LocalIndexWriter:
+    """
+    Writes into a LocalVectorStore, the offline stand-in for Pinecone.
+
+    The index is loaded fully into memory, not memory-mapped, because
+    `flush` saves it back over the same files.
+    """
+
+    def __init__(
+        self,
+        embedding: Embeddings,
+        path: Optional[str | Path] = None,
+        quantize: bool = False,
+    ) -> None:
+        self.path: Optional[Path] = Path(path) if path else None
+        if self.path is not None and (self.path / DOCUMENTS_FILE).exists():
+            self.store = LocalVectorStore.load(self.path, embedding, mmap=False)
+        else:
+            self.store = LocalVectorStore(embedding, quantize=quantize)
+
+    def upsert(self, records: List[VectorRecord]) -> None:
+        texts: List[str] = []
+        metadatas: List[Dict[str, Any]] = []
+        for record in records:
+            metadata: Dict[str, Any] = dict(record.metadata)
+            texts.append(metadata.pop(LocalVectorStore.TEXT_KEY, ""))
+            metadatas.append(metadata)
+        self.store.add_embeddings(
+            texts,
+            [record.values for record in records],
+            metadatas,
+            ids=[record.id for record in records],
+        )
+
+    def delete(self, ids: List[str]) -> None:
+        self.store.delete(ids)
+
+    def flush(self) -> None:
+        if self.path is not None:
+            self.store.save(self.path)
+
+
+class LexicalIndexWriter:
+    """Keeps a BM25Index of the same chunks, for hybrid retrieval."""
+
+    def __init__(self, path: str | Path) -> None:
+        self.path: Path = Path(path)
+        self.index: BM25Index = BM25Index.load(self.path)
+
+    def upsert(self, records: List[VectorRecord]) -> None:
+        texts: List[str] = []
+        metadatas: List[Dict[str, Any]] = []
+        for record in records:
+            metadata: Dict[str, Any] = dict(record.metadata)
+            texts.append(metadata.pop(LocalVectorStore.TEXT_KEY, ""))
+            metadatas.append(metadata)
+        self.index.add_documents([record.id for record in records], texts, metadatas)
+
+    def delete(self, ids: List[str]) -> None:
+        self.index.delete(ids)
+
+    def flush(self) -> None:
+        self.index.save(self.path)
+
+
+class CompositeIndexWriter:
+    # Sends every write to each writer in turn
+    def __init__(self, writers: List[VectorIndexWriter]) -> None:
+        self.writers: List[VectorIndexWriter] = writers
+
+    def upsert(self, records: List[VectorRecord]) -> None:
+        for writer in self.writers:
+            writer.upsert(records)
+
+    def delete(self, ids: List[str]) -> None:
+        for writer in self.writers:
+            writer.delete(ids)
+
+    def flush(self) -> None:
+        for writer in self.writers:
+            writer.flush()
@@ -0,0 +1,126 @@
+import asyncio
+import math
+import re
+import time
+from hashlib import blake2b
+from threading import Lock
+from typing import Any, AsyncIterator, Iterator, List, Optional
+
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForLLMRun,
+    CallbackManagerForLLMRun,
+)
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models import FakeListChatModel
+from langchain_core.messages import AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGenerationChunk
+from pydantic import PrivateAttr
+
+# Words with their trailing whitespace, roughly how chat models chunk text
+TOKEN_PATTERN = re.compile(r"\S+\s*|\s+")
+
+
+def split_tokens(text: str) -> List[str]:
+    return TOKEN_PATTERN.findall(text)
+
+
+class LatencyFakeChatModel(FakeListChatModel):
+    """
+    Fake chat model that streams canned responses with realistic timing.
+
+    Each response is delayed by `ttfb` seconds before its first token and by
+    `inter_token_latency` seconds between tokens, for streaming and
+    non-streaming calls alike. Responses cycle in order like
+    FakeListChatModel's, also when one model serves several threads.
+    """
+
+    ttfb: float = 0.0
+    inter_token_latency: float = 0.0
+    model_name: str = "fake-latency-model"
+    _response_lock: Lock = PrivateAttr(default_factory=Lock)
+
+    @property
+    def _llm_type(self) -> str:
+        return "latency-fake-chat-model"
+
+    def _next_response(self) -> str:
+        with self._response_lock:
+            response: str = self.responses[self.i]
+            self.i = (self.i + 1) % len(self.responses)
+        return response
+
+    def _call(self, *args: Any, **kwargs: Any) -> str:
+        response: str = self._next_response()
+        time.sleep(
+            self.ttfb
+            + self.inter_token_latency * max(len(split_tokens(response)) - 1, 0)
+        )
+        return response
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        response: str = self._next_response()
+        time.sleep(self.ttfb)
+        for index, token in enumerate(split_tokens(response)):
+            if index:
+                time.sleep(self.inter_token_latency)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token))
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        response: str = self._next_response()
+        await asyncio.sleep(self.ttfb)
+        for index, token in enumerate(split_tokens(response)):
+            if index:
+                await asyncio.sleep(self.inter_token_latency)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token))
+
+
+class HashingFakeEmbeddings(Embeddings):
+    """
+    Offline embeddings from hashed words and character trigrams.
+
+    Unlike DeterministicFakeEmbedding, texts sharing words or word stems get
+    similar vectors, so dense retrieval over them ranks meaningfully in
+    benchmarks. Each call sleeps `latency` seconds, like an embeddings API.
+    """
+
+    def __init__(self, size: int = 256, latency: float = 0.0) -> None:
+        self.size: int = size
+        self.latency: float = latency
+
+    def _get_features(self, text: str) -> List[str]:
+        words: List[str] = re.findall(r"\w+", text.casefold())
+        trigrams: List[str] = [
+            padded[index : index + 3]
+            for padded in (f"<{word}>" for word in words)
+            for index in range(len(padded) - 2)
+        ]
+        return words + trigrams
+
+    def _embed(self, text: str) -> List[float]:
+        vector: List[float] = [0.0] * self.size
+        for feature in self._get_features(text):
+            digest: int = int.from_bytes(
+                blake2b(feature.encode("utf-8"), digest_size=8).digest(), "big"
+            )
+            vector[digest % self.size] += 1.0 if digest >> 63 else -1.0
+        norm: float = math.sqrt(sum(value * value for value in vector)) or 1.0
+        return [value / norm for value in vector]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        time.sleep(self.latency)
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
@@ -1,20 +1,58 @@
-from langchain_openai import ChatOpenAI, OpenAIEmbeddings
+from functools import cache
+
+from langchain_core.embeddings import Embeddings
 from langchain_core.runnables import Runnable
 
-from config.envs import (
-    OPENAI_API_KEY,
-    OPENAI_LITE_MODEL_ID,
-    OPENAI_REGULAR_MODEL_ID,
-)
-
-openai_embeddings = OpenAIEmbeddings(api_key=OPENAI_API_KEY)
-openai_lite_model: Runnable = ChatOpenAI(
-    api_key=OPENAI_API_KEY,
-    model=OPENAI_LITE_MODEL_ID,
-    temperature=0,
-)
-openai_regular_model: Runnable = ChatOpenAI(
-    api_key=OPENAI_API_KEY,
-    model=OPENAI_REGULAR_MODEL_ID,
-    temperature=0,
-)
+from config.envs import get_env, get_optional_env
+
+# langchain_openai takes seconds to import, so it is only imported, and the
+# clients only constructed, once a code path asks for them
+
+
+@cache
+def get_openai_embeddings() -> Embeddings:
+    from langchain_openai import OpenAIEmbeddings
+
+    from caches.embeddings import CachedEmbeddings, SqliteEmbeddingStore
+
+    embeddings = OpenAIEmbeddings(api_key=get_env("OPENAI_API_KEY"))
+    cache_path = get_optional_env("EMBEDDING_CACHE_PATH")
+    return CachedEmbeddings(
+        embeddings,
+        model=embeddings.model,
+        store=SqliteEmbeddingStore(cache_path) if cache_path else None,
+    )
+
+
+@cache
+def get_openai_lite_model() -> Runnable:
+    from langchain_openai import ChatOpenAI
+
+    return ChatOpenAI(
+        api_key=get_env("OPENAI_API_KEY"),
+        model=get_env("OPENAI_LITE_MODEL_ID"),
+        temperature=0,
+    )
+
+
+@cache
+def get_openai_regular_model() -> Runnable:
+    from langchain_openai import ChatOpenAI
+
+    return ChatOpenAI(
+        api_key=get_env("OPENAI_API_KEY"),
+        model=get_env("OPENAI_REGULAR_MODEL_ID"),
+        temperature=0,
+    )
+
+
+def __getattr__(name: str):
+    # Backwards-compatible module attributes, built on first access
+    providers = {
+        "openai_embeddings": get_openai_embeddings,
+        "openai_lite_model": get_openai_lite_model,
+        "openai_regular_model": get_openai_regular_model,
+    }
+    if name in providers:
+        return providers[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
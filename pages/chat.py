@@ -4,24 +4,20 @@ from components.page_ui import setup_page
 from components.chat_ui import setup_simple_chat
 from factories.response_stream import prepare_chain_response_stream
 from chains.web_search import get_multi_web_search_chain_response_stream
-from llms.openai import openai_lite_model, openai_regular_model
-from chains.types import ChainConfig, ChainInputs
+from factories.chain_config import get_default_chain_config
+from factories.metrics_exporter import start_metrics_exporters
+from chains.types import ChainInputs
 
 setup_page(
     page_title="(Multi-Task) Web Search Chatbot",
     page_description="This chatbot can perform multi-topic web search and provide relevant information to the user.",
 )
+start_metrics_exporters()
 
-# Configure the chain
-config = ChainConfig(
-    orchestrator_llm=openai_regular_model,
-    summarizer_llm=openai_lite_model,
-    track_metrics=True,
-)
-
-# Prepare the response stream with configuration
+# Prepare the response stream with configuration; the cached config and its
+# LLM clients are built on the first query
 response_stream: Callable[[ChainInputs], Iterator[str]] = prepare_chain_response_stream(
-    config=config,
+    config=get_default_chain_config,
     get_chain_response_stream=get_multi_web_search_chain_response_stream,
 )
 
@@ -0,0 +1,43 @@
+from typing import Sequence
+
+from langchain_core.messages import BaseMessage
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.runnables import Runnable
+
+from chains.history import Summarize, render_message
+
+history_summary_template: str = """
+You maintain a running summary of a conversation between a user and an AI assistant.
+
+Update the summary below with the new messages. Keep names, places, dates, numbers and open questions the user may refer back to. Drop greetings and filler. Write plain sentences, no more than {max_words} words.
+
+Current summary:
+{summary}
+
+New messages:
+{messages}
+
+Updated summary:
+"""
+
+history_summary_prompt = ChatPromptTemplate.from_template(history_summary_template)
+
+
+def make_llm_summarize(llm: Runnable) -> Summarize:
+    """Build a `ChatHistoryManager` summarize function backed by an LLM."""
+    summary_chain: Runnable = history_summary_prompt | llm | StrOutputParser()
+
+    def summarize(
+        previous_summary: str, messages: Sequence[BaseMessage], max_tokens: int
+    ) -> str:
+        return summary_chain.invoke(
+            {
+                "summary": previous_summary or "(empty)",
+                "messages": "\n".join(render_message(message) for message in messages),
+                # Roughly three quarters of a word per token
+                "max_words": max_tokens * 3 // 4,
+            }
+        ).strip()
+
+    return summarize
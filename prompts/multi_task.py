@@ -1,8 +1,21 @@
 from langchain_core.output_parsers import PydanticOutputParser
 from langchain_core.prompts import ChatPromptTemplate
 
+from config.envs import get_optional_env
 from tasks.search import MultiSearchTask
 
+# What the knowledge base covers, so the orchestrator knows when to search it;
+# set KNOWLEDGE_BASE_DESCRIPTION to describe a deployment's own documents
+DEFAULT_KNOWLEDGE_BASE_DESCRIPTION: str = "internal documentation indexed for this app"
+
+
+def get_knowledge_base_description() -> str:
+    return (
+        get_optional_env("KNOWLEDGE_BASE_DESCRIPTION")
+        or DEFAULT_KNOWLEDGE_BASE_DESCRIPTION
+    )
+
+
 multi_task_orchestrator_parser = PydanticOutputParser(pydantic_object=MultiSearchTask)
 
 multi_task_orchestrator_template: str = """
@@ -19,6 +32,8 @@ RESPONSE FORMAT:
 - Empty arrays should be [] if no searches needed
 - Avoid redundant searches if information exists in chat history
 - Skip searches for common knowledge questions
+- The knowledge base holds: {knowledge_base_description}
+- Use knowledge base searches, not web searches, for questions the knowledge base covers
 
 Example Responses:
 1. User Query: "What's happening with SpaceX Starship and how's the weather at the launch site?"
@@ -70,6 +85,20 @@ Example Responses:
           "weather_tasks": []
      }}
 
+5. User Query: "What does <error code> mean and how do I set up <feature>?" (both covered by the knowledge base)
+    Chat History: []
+    Response: {{
+          "should_search_web": false,
+          "should_search_weather": false,
+          "should_search_knowledge_base": true,
+          "web_tasks": [],
+          "weather_tasks": [],
+          "knowledge_base_tasks": [
+                {{"query": "<error code> meaning"}},
+                {{"query": "<feature> setup"}}
+          ]
+     }}
+
 Rules for Field Values:
 1. should_search_web: Set true only if factual information needs to be searched
 2. should_search_weather: Set true only if weather information is requested
@@ -78,6 +107,9 @@ Rules for Field Values:
     - query_count: Results to return (3-10)
 4. weather_tasks: Array of locations (0-3 items)
     - location: Specific city/region (2-100 chars)
+5. should_search_knowledge_base: Set true only if the query is about topics the knowledge base covers; may be omitted when false
+6. knowledge_base_tasks: Array of knowledge base searches (0-5 items); may be omitted when empty
+    - query: Specific search string using the documentation's own terms (3-200 chars)
 
 Input:
 - User query: {user_query}
@@ -97,4 +129,8 @@ multi_task_messages = [("system", multi_task_orchestrator_template)]
 # Create the chat prompt template and add format instructions
 multi_task_orchestrator_prompt = ChatPromptTemplate.from_messages(
     multi_task_messages
-).partial(format_instructions=multi_task_format_instructions)
+).partial(
+    format_instructions=multi_task_format_instructions,
+    # Resolved on each format, so the env is read on first use, not on import
+    knowledge_base_description=get_knowledge_base_description,
+)
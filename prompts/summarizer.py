@@ -8,6 +8,7 @@ User Message: {user_query}
 Conversation History: {chat_history}
 Web Search Results: {web_search_results}
 Weather Data: {weather_search_results}
+Knowledge Base Results: {knowledge_base_results}
 
 CITATION GUIDELINES:
 1. Web Sources:
@@ -29,7 +30,14 @@ CITATION GUIDELINES:
     - Discuss general weather patterns or trends
     - Suggest checking official sources
 
-3. General Knowledge:
+3. Knowledge Base:
+    When knowledge base results are available:
+    - They come from internal documentation; prefer them over web results on the topics they cover
+    - Cite using format: "[Source Name](URL)" with the result's source
+    When knowledge base results are not available:
+    - Do not guess details of internal topics; suggest checking the documentation
+
+4. General Knowledge:
     - Acknowledge when information is general knowledge
     - Still cite reputable sources when available
     - Be transparent about source limitations
@@ -76,8 +84,11 @@ Output: "While I don't have access to the latest medical studies or current weat
 Begin your response now, ensuring all factual claims are properly cited:
 """
 
-summarizer_prompt = ChatPromptTemplate.from_template(summarizer_template)
+# Only the multi-task chain searches the knowledge base
+summarizer_prompt = ChatPromptTemplate.from_template(summarizer_template).partial(
+    knowledge_base_results=""
+)
 
 simple_summarizer_prompt = ChatPromptTemplate.from_template(
     summarizer_template
-).partial(web_search_results="", weather_search_results="")
+).partial(web_search_results="", weather_search_results="", knowledge_base_results="")
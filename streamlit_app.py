@@ -1,21 +1,29 @@
 import streamlit as st
 from langchain_core.messages import HumanMessage, AIMessage
 
-from llms.openai import openai_lite_model, openai_regular_model
-from components.chat_ui import init_chat_history, is_valid_query
-from chains.types import ChainInputs, ChainConfig
+from components.chat_ui import (
+    init_chat_history,
+    is_valid_query,
+    get_history_manager,
+    build_chain_inputs,
+)
+from factories.chain_config import get_default_chain_config
+from factories.metrics_exporter import start_metrics_exporters
 from chains.web_search import (
     get_simple_chain_response_stream,
     get_single_web_search_chain_response_stream,
     get_multi_web_search_chain_response_stream,
 )
 from components.page_ui import setup_page
+from components.concurrent_stream import write_streams_concurrently
+from factories.response_stream import coalesce_stream
 
 setup_page(
     app_layout="wide",
     page_title="Chat Comparison",
     page_description="This page demonstrates the difference between a basic chatbot, a single-task web search chatbot, and a multi-task web search chatbot.",
 )
+start_metrics_exporters()
 
 init_chat_history("simple_chat_history")
 simple_chat_history = st.session_state.simple_chat_history
@@ -26,69 +34,77 @@ single_web_search_chat_history = st.session_state.single_web_search_chat_history
 init_chat_history("multi_web_search_chat_history")
 multi_web_search_chat_history = st.session_state.multi_web_search_chat_history
 
-# Configure the chain
-config = ChainConfig(
-    orchestrator_llm=openai_regular_model,
-    summarizer_llm=openai_lite_model,
-    track_metrics=True,
-)
+# Concurrent mode starts all three chains at once, so each column shows its
+# own latency instead of waiting for the columns before it
+run_concurrently = st.toggle("Run chains concurrently", value=True)
 
 demo_container = st.container()
 with demo_container:
     user_query = st.chat_input("I have a question about...")
     if is_valid_query(user_query):
+        # Configure the chain; the LLM clients are built on the first query
+        config = get_default_chain_config()
+
+        # All three chains answer from the same budgeted rendering of the
+        # basic chat's history, taken before the new query is added
+        inputs = build_chain_inputs(
+            user_query,
+            simple_chat_history,
+            get_history_manager("simple_chat_history"),
+        )
+
         # Add user message to chat histories
         simple_chat_history.append(HumanMessage(user_query))
         single_web_search_chat_history.append(HumanMessage(user_query))
         multi_web_search_chat_history.append(HumanMessage(user_query))
 
         # Create columns for displaying streaming responses
-        simple_res_col, single_web_res_col, multi_web_res_col = st.columns(3)
+        response_columns = st.columns(3)
+        column_headers = [
+            "Basic Chat",
+            "(Single-Task) Web Search Chat",
+            "(Multi-Task) Web Search Chat",
+        ]
+        chat_histories = [
+            simple_chat_history,
+            single_web_search_chat_history,
+            multi_web_search_chat_history,
+        ]
+        chain_response_streams = [
+            get_simple_chain_response_stream,
+            get_single_web_search_chain_response_stream,
+            get_multi_web_search_chain_response_stream,
+        ]
 
-        with simple_res_col:
-            st.header("Basic Chat")
-            with st.chat_message("human"):
-                st.markdown(user_query)
-            with st.chat_message("ai"):
-                simple_response = st.write_stream(
-                    get_simple_chain_response_stream(
-                        config=config,
-                        inputs=ChainInputs(
-                            user_query=user_query,
-                            chat_history=simple_chat_history,
-                        ),
-                    )
-                )
-                simple_chat_history.append(AIMessage(simple_response))
-
-        with single_web_res_col:
-            st.header("(Single-Task) Web Search Chat")
-            with st.chat_message("human"):
-                st.markdown(user_query)
-            with st.chat_message("ai"):
-                web_response = st.write_stream(
-                    get_single_web_search_chain_response_stream(
-                        config=config,
-                        inputs=ChainInputs(
-                            user_query=user_query,
-                            chat_history=simple_chat_history,
-                        ),
-                    )
-                )
-                single_web_search_chat_history.append(AIMessage(web_response))
+        ai_containers = []
+        for column, header in zip(response_columns, column_headers):
+            with column:
+                st.header(header)
+                with st.chat_message("human"):
+                    st.markdown(user_query)
+                ai_containers.append(st.chat_message("ai"))
 
-        with multi_web_res_col:
-            st.header("(Multi-Task) Web Search Chat")
-            with st.chat_message("human"):
-                st.markdown(user_query)
-            with st.chat_message("ai"):
-                multi_web_response = st.write_stream(
-                    get_multi_web_search_chain_response_stream(
-                        config=config,
-                        inputs=ChainInputs(
-                            user_query=user_query,
-                            chat_history=simple_chat_history,
-                        ),
+        if run_concurrently:
+            progresses = write_streams_concurrently(
+                [
+                    coalesce_stream(get_response_stream(config=config, inputs=inputs))
+                    for get_response_stream in chain_response_streams
+                ],
+                ai_containers,
+            )
+            for chat_history, progress in zip(chat_histories, progresses):
+                # Like a raising stream in sequential mode, a failed or cut
+                # short response never becomes part of the history
+                if progress.error is None:
+                    chat_history.append(AIMessage(progress.text))
+        else:
+            for ai_container, chat_history, get_response_stream in zip(
+                ai_containers, chat_histories, chain_response_streams
+            ):
+                with ai_container:
+                    response = st.write_stream(
+                        coalesce_stream(
+                            get_response_stream(config=config, inputs=inputs)
+                        )
                     )
-                )
-                multi_web_search_chat_history.append(AIMessage(multi_web_response))
+                    chat_history.append(AIMessage(response))
@@ -41,6 +41,14 @@ class WeatherSearchTask(BaseModel):
     )
 
 
+class KnowledgeBaseSearchTask(BaseModel):
+    query: str = Field(
+        description="Search query for the knowledge base of internal documentation. Use the documentation's own terms, such as feature names and error codes. Example: '<feature> setup' or '<error code> meaning'",
+        min_length=3,
+        max_length=200,
+    )
+
+
 class MultiSearchTask(BaseModel):
     should_search_web: bool = Field(
         description="Set to true if factual or real-time information needs to be searched online"
@@ -58,3 +66,12 @@ class MultiSearchTask(BaseModel):
         description="List of locations to get weather information from. Must be empty if should_search_weather is false. Each task should be for a unique location",
         max_length=3,
     )
+    should_search_knowledge_base: bool = Field(
+        default=False,
+        description="Set to true if the question is about topics the knowledge base of internal documentation covers",
+    )
+    knowledge_base_tasks: list[KnowledgeBaseSearchTask] = Field(
+        default=[],
+        description="List of distinct knowledge base searches. Must be empty if should_search_knowledge_base is false. Each task should focus on a single specific topic",
+        max_length=5,
+    )
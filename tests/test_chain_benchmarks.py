@@ -0,0 +1,263 @@
+"""
+Offline chain benchmarks with latency-simulating fake LLMs and tools.
+
+Every latency is fixed or seeded, so step timings only move when the chains
+themselves change. Each benchmark stores TTFB, total stream time and the
+per-step p50 breakdown in the pytest-benchmark `extra_info`.
+"""
+
+import asyncio
+import json
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from chains.context_packer import extract_snippets
+from chains.metrics import STEP_METRIC, STREAM_METRIC, metrics_registry
+from chains.orchestrator_cache import orchestrator_cache
+from chains.types import ChainConfig, ChainInputs
+from chains.web_search import (
+    MULTI_TASK_CHAIN,
+    SIMPLE_CHAIN,
+    SINGLE_TASK_CHAIN,
+    aget_multi_web_search_chain_response_stream,
+    get_multi_web_search_chain_response_stream,
+    get_simple_chain_response_stream,
+    get_single_web_search_chain_response_stream,
+)
+from llms.fake import LatencyFakeChatModel
+from tools.fake import FakeSearchTools, LatencyDistribution
+
+WEB_QUERIES = ["SpaceX Starship latest launch", "Starship flight test results"]
+WEATHER_LOCATIONS = ["Boca Chica, Texas", "Austin, Texas"]
+
+MULTI_TASK_RESPONSE = json.dumps(
+    {
+        "should_search_web": True,
+        "web_tasks": [{"query": query, "query_count": 3} for query in WEB_QUERIES],
+        "should_search_weather": True,
+        "weather_tasks": [{"location": location} for location in WEATHER_LOCATIONS],
+    }
+)
+SINGLE_TASK_RESPONSE = json.dumps(
+    {
+        "should_search_web": True,
+        "should_search_weather": True,
+        "web_query": WEB_QUERIES[0],
+        "web_query_count": 3,
+        "weather_query": WEATHER_LOCATIONS[0],
+    }
+)
+SUMMARY_RESPONSE = " ".join(["Starship", "launched", "in", "clear", "weather."] * 8)
+
+ORCHESTRATOR_TTFB = 0.05
+SUMMARIZER_TTFB = 0.03
+BENCHMARK_ROUNDS = 5
+
+
+@pytest.fixture(autouse=True)
+def isolate_chain_state():
+    metrics_registry.clear()
+    orchestrator_cache.clear()
+    yield
+    metrics_registry.clear()
+    orchestrator_cache.clear()
+
+
+@pytest.fixture
+def fake_tools(mocker):
+    tools = FakeSearchTools(
+        web_latency=LatencyDistribution(median=0.04, sigma=0.25),
+        weather_latency=LatencyDistribution(median=0.03, sigma=0.25),
+        seed=7,
+    )
+    for target, fake in tools.get_patch_targets().items():
+        mocker.patch(target, fake)
+    return tools
+
+
+def make_config(orchestrator_response: str, **overrides) -> ChainConfig:
+    return ChainConfig(
+        orchestrator_llm=LatencyFakeChatModel(
+            responses=[orchestrator_response],
+            ttfb=ORCHESTRATOR_TTFB,
+            inter_token_latency=0.001,
+            model_name="fake-orchestrator",
+        ),
+        summarizer_llm=LatencyFakeChatModel(
+            responses=[SUMMARY_RESPONSE],
+            ttfb=SUMMARIZER_TTFB,
+            inter_token_latency=0.001,
+            model_name="fake-summarizer",
+        ),
+        use_orchestrator_cache=False,
+        **overrides,
+    )
+
+
+@pytest.fixture
+def chain_inputs():
+    return ChainInputs(
+        user_query="Did Starship launch today, and what's the weather at the pad?",
+        chat_history="",
+    )
+
+
+def test_fake_web_results_are_shaped_like_ddg_results(fake_tools):
+    results = [
+        fake_tools.ddg_text_search("starship launch"),
+        fake_tools.ddg_text_search("pad weather", query_count=4),
+    ]
+
+    snippets = extract_snippets(results)
+
+    assert len(snippets) == 7
+    assert snippets[0].title == "Result 1 for starship launch"
+    assert snippets[0].body == "Canned snippet about starship launch."
+
+
+def test_latency_fake_chat_model_cycles_responses_across_threads():
+    llm = LatencyFakeChatModel(responses=["a", "b", "c"])
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        responses = list(executor.map(lambda _: llm._next_response(), range(3000)))
+
+    assert Counter(responses) == {"a": 1000, "b": 1000, "c": 1000}
+
+
+def get_step_p50(chain: str, step: str) -> float:
+    return metrics_registry.get_histogram(
+        STEP_METRIC, chain=chain, step=step
+    ).quantile(0.5)
+
+
+def report_latencies(benchmark, chain: str) -> None:
+    ttfb = metrics_registry.quantiles(
+        STEP_METRIC, chain=chain, step="ttfb_invocation"
+    )
+    stream_total = metrics_registry.quantiles(STREAM_METRIC, chain=chain)
+    steps = metrics_registry.get_label_values(STEP_METRIC, "step")
+    benchmark.extra_info.update(
+        {
+            "ttfb_invocation": {str(q): value for q, value in ttfb.items()},
+            "stream_total": {str(q): value for q, value in stream_total.items()},
+            "steps_p50": {step: get_step_p50(chain, step) for step in steps},
+        }
+    )
+
+
+def run_chain(get_response_stream, config: ChainConfig, inputs: ChainInputs):
+    return "".join(get_response_stream(config=config, inputs=inputs))
+
+
+@pytest.mark.benchmark(group="offline-chains")
+def test_simple_chain_offline_benchmark(benchmark, fake_tools, chain_inputs):
+    config = make_config(SINGLE_TASK_RESPONSE)
+
+    result = benchmark.pedantic(
+        run_chain,
+        args=(get_simple_chain_response_stream, config, chain_inputs),
+        rounds=BENCHMARK_ROUNDS,
+    )
+    report_latencies(benchmark, SIMPLE_CHAIN)
+
+    assert result == SUMMARY_RESPONSE
+    assert get_step_p50(SIMPLE_CHAIN, "ttfb_summarizer") >= SUMMARIZER_TTFB
+    assert get_step_p50(SIMPLE_CHAIN, "ttfb_invocation") < SUMMARIZER_TTFB * 2
+
+
+@pytest.mark.benchmark(group="offline-chains")
+def test_single_task_chain_offline_benchmark(benchmark, fake_tools, chain_inputs):
+    config = make_config(SINGLE_TASK_RESPONSE)
+
+    benchmark.pedantic(
+        run_chain,
+        args=(get_single_web_search_chain_response_stream, config, chain_inputs),
+        rounds=BENCHMARK_ROUNDS,
+    )
+    report_latencies(benchmark, SINGLE_TASK_CHAIN)
+
+    web_latency = fake_tools.sample_latency(
+        fake_tools.web_latency, f"web:{WEB_QUERIES[0]}"
+    )
+    weather_latency = fake_tools.sample_latency(
+        fake_tools.weather_latency, f"weather:{WEATHER_LOCATIONS[0]}"
+    )
+    # Tool steps cost their simulated latency plus little overhead
+    assert get_step_p50(SINGLE_TASK_CHAIN, "web_search") == pytest.approx(
+        web_latency, rel=0.15, abs=0.01
+    )
+    assert get_step_p50(SINGLE_TASK_CHAIN, "weather_search") == pytest.approx(
+        weather_latency, rel=0.15, abs=0.01
+    )
+    assert get_step_p50(SINGLE_TASK_CHAIN, "ttfb_invocation") >= (
+        ORCHESTRATOR_TTFB + web_latency + weather_latency + SUMMARIZER_TTFB
+    )
+
+
+@pytest.mark.benchmark(group="offline-chains")
+def test_multi_task_chain_offline_benchmark(benchmark, fake_tools, chain_inputs):
+    config = make_config(MULTI_TASK_RESPONSE)
+
+    benchmark.pedantic(
+        run_chain,
+        args=(get_multi_web_search_chain_response_stream, config, chain_inputs),
+        rounds=BENCHMARK_ROUNDS,
+    )
+    report_latencies(benchmark, MULTI_TASK_CHAIN)
+
+    web_latencies = [
+        fake_tools.sample_latency(fake_tools.web_latency, f"web:{query}")
+        for query in WEB_QUERIES
+    ]
+    weather_latency = fake_tools.bulk_weather_latency(WEATHER_LOCATIONS)
+    slowest_tool = max(*web_latencies, weather_latency)
+    # Tools run concurrently, so the stage takes about as long as the slowest
+    assert get_step_p50(MULTI_TASK_CHAIN, "tool_stage") == pytest.approx(
+        slowest_tool, rel=0.15, abs=0.01
+    )
+    assert get_step_p50(MULTI_TASK_CHAIN, "orchestration") >= ORCHESTRATOR_TTFB
+
+
+@pytest.mark.benchmark(group="offline-chains")
+def test_streaming_multi_task_chain_offline_benchmark(
+    benchmark, fake_tools, chain_inputs
+):
+    config = make_config(MULTI_TASK_RESPONSE, stream_orchestration=True)
+
+    benchmark.pedantic(
+        run_chain,
+        args=(get_multi_web_search_chain_response_stream, config, chain_inputs),
+        rounds=BENCHMARK_ROUNDS,
+    )
+    report_latencies(benchmark, MULTI_TASK_CHAIN)
+
+    # Searches start while the orchestrator is still streaming its JSON, so
+    # the tool stage finishes soon after orchestration does
+    assert get_step_p50(MULTI_TASK_CHAIN, "tool_stage") < 0.05
+
+
+@pytest.mark.benchmark(group="offline-chains")
+def test_async_multi_task_chain_offline_benchmark(
+    benchmark, fake_tools, chain_inputs
+):
+    config = make_config(MULTI_TASK_RESPONSE)
+
+    async def consume_stream():
+        return "".join(
+            [
+                chunk
+                async for chunk in aget_multi_web_search_chain_response_stream(
+                    config=config, inputs=chain_inputs
+                )
+            ]
+        )
+
+    result = benchmark.pedantic(
+        lambda: asyncio.run(consume_stream()), rounds=BENCHMARK_ROUNDS
+    )
+    report_latencies(benchmark, MULTI_TASK_CHAIN)
+
+    assert result == SUMMARY_RESPONSE
+    assert get_step_p50(MULTI_TASK_CHAIN, "tool_stage") < 0.1
@@ -0,0 +1,89 @@
+import pytest
+from langchain_core.language_models import FakeListChatModel
+
+from chains.registry import ChainRegistry, compile_chains, chain_registry
+from chains.types import ChainConfig, ChainInputs
+from chains.web_search import get_simple_chain_response_stream
+
+
+@pytest.fixture(autouse=True)
+def clear_chain_registry():
+    chain_registry.clear()
+    yield
+    chain_registry.clear()
+
+
+@pytest.fixture
+def chain_config():
+    return ChainConfig(
+        orchestrator_llm=FakeListChatModel(responses=["{}"]),
+        summarizer_llm=FakeListChatModel(responses=["hello"]),
+        track_metrics=False,
+    )
+
+
+def test_registry_reuses_chains_for_configs_sharing_llms(chain_config):
+    registry = ChainRegistry()
+
+    first = registry.get(chain_config)
+    # Other settings do not change the pipelines
+    second = registry.get(
+        ChainConfig(
+            orchestrator_llm=chain_config.orchestrator_llm,
+            summarizer_llm=chain_config.summarizer_llm,
+            max_tool_concurrency=2,
+        )
+    )
+
+    assert first is second
+    assert len(registry) == 1
+
+
+def test_registry_compiles_separately_for_other_llms(chain_config):
+    registry = ChainRegistry()
+    other_config = ChainConfig(
+        orchestrator_llm=chain_config.orchestrator_llm,
+        summarizer_llm=FakeListChatModel(responses=["other"]),
+    )
+
+    assert registry.get(chain_config) is not registry.get(other_config)
+    assert len(registry) == 2
+
+
+def test_registry_evicts_least_recently_used_llms(chain_config):
+    registry = ChainRegistry(max_entries=2)
+    shared = registry.get(chain_config)
+    for index in range(3):
+        # Per-request LLMs, as a caller building clients on every query would
+        registry.get(
+            ChainConfig(
+                orchestrator_llm=FakeListChatModel(responses=["{}"]),
+                summarizer_llm=FakeListChatModel(responses=[str(index)]),
+            )
+        )
+        # Keeps the shared config's entry recently used
+        registry.get(chain_config)
+
+    assert len(registry) == 2
+    assert registry.get(chain_config) is shared
+
+
+def test_response_streams_use_registered_chains(chain_config):
+    inputs = ChainInputs(user_query="hi", chat_history="")
+
+    assert "".join(get_simple_chain_response_stream(chain_config, inputs)) == "hello"
+    assert "".join(get_simple_chain_response_stream(chain_config, inputs)) == "hello"
+    assert len(chain_registry) == 1
+
+
+@pytest.mark.benchmark(group="chain-construction", min_rounds=50, warmup=False)
+def test_compile_chains_per_request_benchmark(benchmark, chain_config):
+    benchmark(
+        compile_chains, chain_config.orchestrator_llm, chain_config.summarizer_llm
+    )
+
+
+@pytest.mark.benchmark(group="chain-construction", min_rounds=50, warmup=False)
+def test_registry_lookup_benchmark(benchmark, chain_config):
+    chain_registry.get(chain_config)
+    benchmark(chain_registry.get, chain_config)
@@ -0,0 +1,88 @@
+import asyncio
+from time import sleep, perf_counter
+
+from components.concurrent_stream import (
+    StreamProgress,
+    format_latency_badge,
+    multiplex_streams,
+)
+
+
+def slow_stream(first_chunk_delay: float, *chunks: str):
+    sleep(first_chunk_delay)
+    for chunk in chunks:
+        yield chunk
+        sleep(0.05)
+
+
+def collect_text(events, stream_count: int):
+    texts = [""] * stream_count
+    for event in events:
+        if event.chunk is not None:
+            texts[event.index] += event.chunk
+    return texts
+
+
+def test_multiplex_streams_runs_streams_concurrently():
+    start = perf_counter()
+    events = list(
+        multiplex_streams(
+            [
+                slow_stream(0.2, "a", "b"),
+                slow_stream(0.2, "c", "d"),
+                slow_stream(0.2, "e", "f"),
+            ]
+        )
+    )
+    elapsed = perf_counter() - start
+
+    # Sequential draining would take 0.9s
+    assert elapsed < 0.6
+    assert collect_text(events, 3) == ["ab", "cd", "ef"]
+    assert sum(event.done for event in events) == 3
+
+
+def test_multiplex_streams_reports_per_stream_first_chunk_time():
+    events = list(
+        multiplex_streams([slow_stream(0.3, "slow"), slow_stream(0, "fast")])
+    )
+    first_chunks = {}
+    for event in events:
+        if event.chunk is not None:
+            first_chunks.setdefault(event.index, event.elapsed)
+
+    # The fast stream is not queued behind the slow one
+    assert first_chunks[1] < 0.1
+    assert first_chunks[0] >= 0.3
+
+
+def test_multiplex_streams_forwards_errors():
+    def failing_stream():
+        yield "partial"
+        raise RuntimeError("boom")
+
+    events = list(multiplex_streams([failing_stream(), slow_stream(0, "ok")]))
+    done_events = {event.index: event for event in events if event.done}
+
+    assert isinstance(done_events[0].error, RuntimeError)
+    assert done_events[1].error is None
+    assert collect_text(events, 2) == ["partial", "ok"]
+
+
+def test_multiplex_streams_drains_async_streams():
+    async def async_stream():
+        for chunk in ("x", "y"):
+            await asyncio.sleep(0.01)
+            yield chunk
+
+    events = list(multiplex_streams([async_stream(), slow_stream(0, "z")]))
+
+    assert collect_text(events, 2) == ["xy", "z"]
+
+
+def test_format_latency_badge():
+    assert format_latency_badge(StreamProgress()) == "TTFB n/a"
+    assert (
+        format_latency_badge(StreamProgress(ttfb=0.5, total_time=2.25))
+        == "TTFB 0.50s · total 2.25s"
+    )
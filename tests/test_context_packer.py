@@ -0,0 +1,169 @@
+import json
+
+from chains.context_packer import pack_summarizer_context
+from chains.history import estimate_tokens
+
+
+def make_search_response(query, results):
+    return json.dumps(
+        {"status": "success", "query": query, "results": results}, indent=2
+    )
+
+
+def make_result(title, href, body):
+    return {"title": title, "href": href, "body": body}
+
+
+WEB_RESULTS = [
+    make_search_response(
+        "starship launch",
+        [
+            make_result(
+                "Starship flight test",
+                "https://www.spacex.com/launches/starship/",
+                "SpaceX completed the latest Starship launch and booster catch.",
+            ),
+            make_result(
+                "Rocket history",
+                "https://example.com/history",
+                "A long history of rockets unrelated to the question. " * 5,
+            ),
+        ],
+    ),
+    make_search_response(
+        "starship news",
+        [
+            # Same page as above with a different URL spelling
+            make_result(
+                "Starship | SpaceX",
+                "https://spacex.com/launches/starship",
+                "SpaceX Starship launch page.",
+            ),
+            make_result(
+                "Starship launch recap",
+                "https://news.example.com/starship-launch",
+                "Recap of the Starship launch and what comes next.",
+            ),
+        ],
+    ),
+]
+WEATHER_RESULTS = [
+    json.dumps(
+        {"location": {"name": "Boca Chica"}, "current": {"temp_c": 28.1}}, indent=2
+    )
+]
+
+
+def test_pack_drops_duplicate_urls_across_tasks():
+    packed = pack_summarizer_context(
+        "Starship launch", WEB_RESULTS, WEATHER_RESULTS, token_budget=1000
+    )
+
+    assert packed.web_search_results.count("spacex.com/launches/starship") == 1
+    assert len(packed.web_search_results.splitlines()) == 3
+
+
+def test_pack_ranks_relevant_snippets_first():
+    packed = pack_summarizer_context(
+        "latest Starship launch", WEB_RESULTS, None, token_budget=1000
+    )
+
+    lines = packed.web_search_results.splitlines()
+    assert "Starship flight test" in lines[0]
+    assert "Rocket history" in lines[-1]
+
+
+def test_pack_serializes_weather_compactly():
+    packed = pack_summarizer_context("weather", None, WEATHER_RESULTS, 1000)
+
+    assert packed.weather_search_results == (
+        '{"location":{"name":"Boca Chica"},"current":{"temp_c":28.1}}'
+    )
+
+
+def test_pack_truncates_weather_at_record_boundaries():
+    report = {
+        "location": "Boca Chica, Texas",
+        "current": {"temp_c": 28.1, "condition": "Sunny"},
+        "daily": [{"date": f"2025-02-{day}", "max_c": 30.0} for day in (18, 19)],
+        "hourly": [
+            {"time": f"2025-02-18 {hour:02d}:00", "temp_c": 25.0 + hour / 10}
+            for hour in range(24)
+        ],
+    }
+
+    packed = pack_summarizer_context("weather", None, [json.dumps(report)], 200)
+    weather = json.loads(packed.weather_search_results)
+
+    assert estimate_tokens(packed.weather_search_results) <= 100
+    assert weather["location"] == report["location"]
+    assert weather["current"] == report["current"]
+    # Later hours go first, and the ones kept are whole records
+    assert weather["hourly"] == report["hourly"][: len(weather["hourly"])]
+
+
+def test_pack_keeps_a_note_for_failed_searches():
+    failed = json.dumps(
+        {"status": "error", "message": "202 Ratelimit", "query": "starship news"}
+    )
+
+    packed = pack_summarizer_context(
+        "Starship launch", [WEB_RESULTS[0], failed], None, token_budget=1000
+    )
+
+    lines = packed.web_search_results.splitlines()
+    assert lines[0] == '- Search for "starship news" failed: 202 Ratelimit'
+    assert "Starship flight test" in packed.web_search_results
+
+
+def test_pack_fits_token_budget_and_reports_savings():
+    packed = pack_summarizer_context(
+        "Starship launch", WEB_RESULTS, WEATHER_RESULTS, token_budget=60
+    )
+
+    assert packed.tokens_after <= 60
+    assert packed.tokens_after < packed.tokens_before
+    assert estimate_tokens(packed.web_search_results) > 0
+
+
+def test_pack_accepts_single_task_results():
+    packed = pack_summarizer_context(
+        "Starship launch", WEB_RESULTS[0], None, token_budget=1000
+    )
+
+    assert packed.weather_search_results == ""
+    assert "Starship flight test" in packed.web_search_results
+
+
+def test_pack_puts_knowledge_base_chunks_before_web_results():
+    knowledge_base_results = [
+        json.dumps(
+            {
+                "status": "success",
+                "query": query,
+                "results": [
+                    {
+                        "id": "docs/starship#0",
+                        "source": "https://docs.example.com/starship",
+                        "text": "Starship launch windows open every Tuesday.",
+                    }
+                ],
+            }
+        )
+        for query in ("starship launch", "starship schedule")
+    ]
+
+    packed = pack_summarizer_context(
+        "Starship launch",
+        WEB_RESULTS,
+        None,
+        token_budget=40,
+        knowledge_base_results=knowledge_base_results,
+    )
+
+    # The chunk both queries retrieved is packed once, ahead of web results
+    assert packed.knowledge_base_results == (
+        "- [https://docs.example.com/starship](https://docs.example.com/starship)"
+        " Starship launch windows open every Tuesday."
+    )
+    assert packed.tokens_after <= 40
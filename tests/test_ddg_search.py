@@ -0,0 +1,159 @@
+import json
+from threading import Event, Thread
+from time import sleep
+
+import pytest
+from duckduckgo_search.exceptions import RatelimitException
+
+from tools.rate_limit import RateLimiter
+import tools.web_search
+from tools.web_search import (
+    EMPTY_RESULTS_TTL,
+    SEARCH_CACHE_TTLS,
+    ddg_text_search,
+    search_cache,
+)
+
+
+@pytest.fixture(autouse=True)
+def clear_search_cache():
+    search_cache.clear()
+    yield
+    search_cache.clear()
+
+
+@pytest.fixture
+def mock_ddgs(mocker):
+    mocker.patch("tools.web_search.ddg_rate_limiter")
+
+    def fake_text(keywords, max_results, **kwargs):
+        return [
+            {"title": f"{keywords} {index}", "href": f"https://example.com/{index}"}
+            for index in range(max_results)
+        ]
+
+    mock_ddgs_cls = mocker.patch("tools.web_search.DDGS")
+    mock_ddgs_cls.return_value.text.side_effect = fake_text
+    return mock_ddgs_cls.return_value
+
+
+def test_ddg_text_search_caches_normalized_queries(mock_ddgs):
+    first = json.loads(ddg_text_search("SpaceX Starship latest launch status 2024"))
+    second = json.loads(ddg_text_search("  spacex starship LATEST launch status 2024? "))
+
+    assert first["results"] == second["results"]
+    assert mock_ddgs.text.call_count == 1
+
+
+def test_ddg_text_search_serves_fewer_results_from_larger_entry(mock_ddgs):
+    ddg_text_search("python asyncio", query_count=5)
+    smaller = json.loads(ddg_text_search("python asyncio", query_count=3))
+    larger = json.loads(ddg_text_search("python asyncio", query_count=8))
+
+    assert len(smaller["results"]) == 3
+    assert len(larger["results"]) == 8
+    assert mock_ddgs.text.call_count == 2
+
+
+def test_ddg_text_search_keys_on_region_and_time_limit(mock_ddgs):
+    ddg_text_search("election results")
+    ddg_text_search("election results", region="us-en")
+    ddg_text_search("election results", time_limit="d")
+
+    assert mock_ddgs.text.call_count == 3
+
+
+def test_ddg_text_search_expiry_follows_time_limit(mocker, mock_ddgs):
+    mock_set = mocker.spy(search_cache, "set")
+
+    ddg_text_search("breaking news", time_limit="d")
+    ddg_text_search("history of rome", time_limit=None)
+
+    assert mock_set.call_args_list[0].kwargs["ttl"] == SEARCH_CACHE_TTLS["d"]
+    assert mock_set.call_args_list[1].kwargs["ttl"] == SEARCH_CACHE_TTLS[None]
+    assert SEARCH_CACHE_TTLS["d"] < SEARCH_CACHE_TTLS["y"]
+
+
+def test_ddg_text_search_keeps_empty_results_briefly(mocker, mock_ddgs):
+    mock_set = mocker.spy(search_cache, "set")
+    mock_ddgs.text.side_effect = lambda **kwargs: []
+
+    ddg_text_search("soft blocked query", time_limit=None)
+
+    assert mock_set.call_args.kwargs["ttl"] == EMPTY_RESULTS_TTL
+    assert EMPTY_RESULTS_TTL < min(SEARCH_CACHE_TTLS.values())
+
+
+def test_ddg_text_search_retries_rate_limit_errors(mocker, mock_ddgs):
+    mocker.patch("tools.web_search.sleep")
+    results = [{"title": "ok", "href": "https://example.com"}]
+    mock_ddgs.text.side_effect = [RatelimitException("202 Ratelimit"), results]
+
+    response = json.loads(ddg_text_search("rate limited query"))
+
+    assert response["status"] == "success"
+    assert response["results"] == results
+
+
+def test_ddg_text_search_does_not_cache_errors(mocker, mock_ddgs):
+    mocker.patch("tools.web_search.sleep")
+    mock_ddgs.text.side_effect = RatelimitException("202 Ratelimit")
+
+    response = json.loads(ddg_text_search("rate limited query"))
+
+    assert response["status"] == "error"
+    assert len(search_cache) == 0
+
+
+def test_ddg_text_search_deduplicates_concurrent_searches(mock_ddgs):
+    fake_text = mock_ddgs.text.side_effect
+
+    def slow_text(**kwargs):
+        sleep(0.1)
+        return fake_text(**kwargs)
+
+    mock_ddgs.text.side_effect = slow_text
+    threads = [Thread(target=ddg_text_search, args=("same query",)) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert mock_ddgs.text.call_count == 1
+
+
+def test_inflight_search_outlives_its_first_caller(mock_ddgs):
+    fake_text = mock_ddgs.text.side_effect
+    release = Event()
+
+    def blocking_text(**kwargs):
+        release.wait(timeout=1)
+        return fake_text(**kwargs)
+
+    mock_ddgs.text.side_effect = blocking_text
+    threads = [Thread(target=ddg_text_search, args=("same query",)) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    while mock_ddgs.text.call_count == 0:
+        sleep(0.01)
+    sleep(0.05)
+
+    inflight = tools.web_search._inflight_searches[("same query", "wt-wt", None)]
+    assert inflight.callers == 2
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    # Removed only once the waiting caller was done with it too
+    assert inflight.callers == 0
+    assert tools.web_search._inflight_searches == {}
+
+
+def test_rate_limiter_waits_once_burst_is_spent():
+    waits = []
+    limiter = RateLimiter(rate=2.0, burst=2, clock=lambda: 0.0, sleeper=waits.append)
+
+    for _ in range(4):
+        limiter.acquire()
+
+    assert waits == [0.5, 1.0]
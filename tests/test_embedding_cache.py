@@ -0,0 +1,97 @@
+from time import sleep
+
+import pytest
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from caches.embeddings import CachedEmbeddings, SqliteEmbeddingStore
+from chains.metrics import (
+    EMBEDDING_CACHE_LOOKUPS_METRIC,
+    EMBEDDING_CACHE_SAVED_METRIC,
+    MetricsRegistry,
+)
+
+
+class CountingEmbeddings(DeterministicFakeEmbedding):
+    calls: list = []
+    latency: float = 0.0
+
+    def embed_documents(self, texts):
+        self.calls.append(list(texts))
+        sleep(self.latency)
+        return super().embed_documents(texts)
+
+
+@pytest.fixture
+def embeddings():
+    return CountingEmbeddings(size=16, calls=[])
+
+
+@pytest.fixture
+def registry():
+    return MetricsRegistry()
+
+
+def test_cache_batches_and_deduplicates_misses(embeddings, registry):
+    cached = CachedEmbeddings(embeddings, model="fake", registry=registry)
+
+    vectors = cached.embed_documents(["a", "b", "a"])
+    assert embeddings.calls == [["a", "b"]]
+    assert vectors[0] == vectors[2]
+    assert vectors[0] == pytest.approx(embeddings.embed_query("a"), abs=1e-6)
+
+    embeddings.calls.clear()
+    cached.embed_documents(["b", "c"])
+    assert cached.embed_query("a") == vectors[0]
+    assert embeddings.calls == [["c"]]
+    assert cached.stats.misses == 3
+    assert cached.stats.memory_hits == 2
+
+
+def test_cache_persists_across_instances(embeddings, registry, tmp_path):
+    path = str(tmp_path / "embeddings.sqlite")
+    first = CachedEmbeddings(
+        embeddings, model="fake", store=SqliteEmbeddingStore(path), registry=registry
+    )
+    expected = first.embed_documents(["a", "b"])
+
+    embeddings.calls.clear()
+    second = CachedEmbeddings(
+        embeddings, model="fake", store=SqliteEmbeddingStore(path), registry=registry
+    )
+    assert second.embed_documents(["b", "a"]) == expected[::-1]
+    assert embeddings.calls == []
+    assert second.stats.disk_hits == 2
+
+    # Vectors are keyed by model, so another model does not reuse them
+    other = CachedEmbeddings(
+        embeddings, model="other", store=SqliteEmbeddingStore(path), registry=registry
+    )
+    other.embed_query("a")
+    assert embeddings.calls == [["a"]]
+
+
+def test_cache_evicts_least_recently_used(embeddings, registry):
+    cached = CachedEmbeddings(embeddings, model="fake", max_size=2, registry=registry)
+    cached.embed_documents(["a", "b"])
+    cached.embed_query("a")
+    cached.embed_query("c")
+
+    embeddings.calls.clear()
+    cached.embed_documents(["a", "b"])
+    assert embeddings.calls == [["b"]]
+    assert len(cached) == 2
+
+
+def test_cache_publishes_hit_rate_and_saved_time(embeddings, registry):
+    embeddings.latency = 0.05
+    cached = CachedEmbeddings(embeddings, model="fake", registry=registry)
+    cached.embed_documents(["a", "b"])
+    cached.embed_documents(["a", "b", "c", "d"])
+
+    assert cached.stats.hit_rate == pytest.approx(2 / 6)
+    assert registry.get_counter(EMBEDDING_CACHE_LOOKUPS_METRIC, tier="memory") == 2
+    assert registry.get_counter(EMBEDDING_CACHE_LOOKUPS_METRIC, tier="miss") == 4
+    # Two hits at about 25ms per text embedded in the first call
+    saved = registry.get_counter(EMBEDDING_CACHE_SAVED_METRIC, model="fake")
+    assert saved == pytest.approx(cached.stats.saved_time)
+    assert 0.04 <= saved < 0.1
@@ -0,0 +1,119 @@
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+
+from chains.history import ChatHistoryManager, HistoryBudget, estimate_tokens
+
+
+def make_conversation(turns, words_per_message=20):
+    messages = []
+    for turn in range(turns):
+        messages.append(HumanMessage(f"Question {turn}. " + "word " * words_per_message))
+        messages.append(AIMessage(f"Answer {turn}. " + "word " * words_per_message))
+    return messages
+
+
+@pytest.fixture
+def budget():
+    return HistoryBudget(max_tokens=200, max_turns=2, summary_tokens=60)
+
+
+def test_render_keeps_recent_turns_verbatim(budget):
+    messages = make_conversation(6, words_per_message=5)
+
+    rendered = ChatHistoryManager().render(messages, budget)
+
+    assert "user: Question 5." in rendered
+    assert "assistant: Answer 4." in rendered
+    assert "user: Question 3. word" not in rendered
+    assert rendered.startswith("Summary of earlier conversation:")
+
+
+def test_render_stays_within_token_budget(budget):
+    messages = make_conversation(30, words_per_message=40)
+
+    rendered = ChatHistoryManager().render(messages, budget)
+
+    assert estimate_tokens(rendered) <= budget.max_tokens + 20
+
+
+def test_summary_is_updated_incrementally(budget):
+    calls = []
+
+    def summarize(previous_summary, messages, max_tokens):
+        calls.append(len(messages))
+        return (previous_summary + f" +{len(messages)}").strip()
+
+    manager = ChatHistoryManager(summarize=summarize)
+    messages = make_conversation(3, words_per_message=5)
+    manager.render(messages, budget)
+    messages.extend(make_conversation(1, words_per_message=5))
+    rendered = manager.render(messages, budget)
+
+    # Only the messages that left the window are folded on each turn
+    assert calls == [2, 2]
+    assert "+2 +2" in rendered
+
+
+def test_render_is_cached_between_turns(budget):
+    calls = []
+
+    def summarize(previous_summary, messages, max_tokens):
+        calls.append(len(messages))
+        return "summary"
+
+    manager = ChatHistoryManager(summarize=summarize)
+    messages = make_conversation(5)
+
+    first = manager.render(messages, budget)
+    second = manager.render(messages, budget)
+
+    assert first is second
+    assert len(calls) == 1
+
+
+def test_budgets_are_independent():
+    manager = ChatHistoryManager()
+    messages = make_conversation(8, words_per_message=5)
+    small = HistoryBudget(max_tokens=100, max_turns=1, summary_tokens=40)
+    large = HistoryBudget(max_tokens=2000, max_turns=10, summary_tokens=200)
+
+    small_render = manager.render(messages, small)
+    large_render = manager.render(messages, large)
+
+    assert "Summary of earlier conversation" in small_render
+    assert "Summary of earlier conversation" not in large_render
+    assert "user: Question 0." in large_render
+
+
+def test_render_empty_history():
+    assert ChatHistoryManager().render([], HistoryBudget()) == ""
+
+
+def test_summary_resets_when_history_is_replaced(budget):
+    manager = ChatHistoryManager()
+    manager.render(make_conversation(6, words_per_message=5), budget)
+
+    # Another page's conversation, rendered through the same manager
+    other = [
+        HumanMessage(message.content.replace("Question", "Other"))
+        if isinstance(message, HumanMessage)
+        else AIMessage(message.content.replace("Answer", "Reply"))
+        for message in make_conversation(6, words_per_message=5)
+    ]
+    rendered = manager.render(other, budget)
+
+    assert "Question" not in rendered
+    assert "user: Other 0" in rendered
+
+
+def test_render_cache_follows_content(budget):
+    manager = ChatHistoryManager()
+    messages = make_conversation(1, words_per_message=2)
+    first = manager.render(messages, budget)
+
+    # Same length and same last message object, different content
+    messages[0] = HumanMessage("Edited question")
+    second = manager.render(messages, budget)
+
+    assert first != second
+    assert "Edited question" in second
@@ -0,0 +1,84 @@
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+
+from components.history_ui import HistoryRenderer, get_message_markdown
+
+
+def make_history(turns: int):
+    history = []
+    for index in range(turns):
+        history.append(HumanMessage(f"question {index}"))
+        history.append(AIMessage(f"answer {index}"))
+    return history
+
+
+def test_renderer_shows_recent_window_and_loads_earlier_pages():
+    renderer = HistoryRenderer(window_size=4, page_size=6)
+    history = make_history(10)
+
+    hidden_count, visible = renderer.get_visible_messages(history)
+    assert hidden_count == 16
+    assert [message.content for message in visible] == [
+        "question 8",
+        "answer 8",
+        "question 9",
+        "answer 9",
+    ]
+
+    renderer.load_earlier()
+    hidden_count, visible = renderer.get_visible_messages(history)
+    assert hidden_count == 10
+    assert len(visible) == 10
+
+    renderer.load_earlier()
+    renderer.load_earlier()
+    assert renderer.get_visible_messages(history) == (0, history)
+
+
+def test_trim_history_bounds_retained_content_outside_window():
+    renderer = HistoryRenderer(
+        window_size=2, max_retained_chars=1000, trimmed_message_chars=40
+    )
+    history = [HumanMessage("x" * 300) for _ in range(5)]
+
+    freed = renderer.trim_history(history)
+
+    assert freed > 0
+    assert sum(len(message.content) for message in history) <= 750
+    # The oldest messages are trimmed first, the visible window never
+    assert len(history[0].content) <= 40
+    assert history[-1].content == "x" * 300
+    assert history[-2].content == "x" * 300
+    assert renderer.trim_history(history) == 0
+
+
+def test_render_emits_only_the_recent_window(mocker):
+    st = mocker.patch("components.history_ui.st")
+    renderer = HistoryRenderer(window_size=4, page_size=6)
+
+    renderer.render(make_history(10))
+    assert st.markdown.call_count == 4
+    st.expander.assert_called_once_with("Earlier messages (16)", expanded=False)
+
+    st.reset_mock()
+    renderer.load_earlier()
+    renderer.render(make_history(10))
+    assert st.markdown.call_count == 10
+    st.expander.assert_called_once_with("Earlier messages (16)", expanded=True)
+
+
+def test_get_message_markdown_joins_text_blocks():
+    message = HumanMessage(
+        content=[
+            "plain",
+            {"type": "text", "text": "typed"},
+            {"type": "image_url", "image_url": {"url": "https://example.com"}},
+        ]
+    )
+
+    assert get_message_markdown(message) == "plain\n\ntyped"
+
+
+def test_renderer_rejects_empty_window():
+    with pytest.raises(ValueError):
+        HistoryRenderer(window_size=0)
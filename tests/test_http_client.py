@@ -0,0 +1,18 @@
+import asyncio
+
+from tools.http_client import get_http_client, get_async_http_client
+
+
+def test_get_http_client_is_shared():
+    assert get_http_client() is get_http_client()
+
+
+def test_get_async_http_client_is_shared_per_event_loop():
+    async def get_clients():
+        return get_async_http_client(), get_async_http_client()
+
+    first_loop_clients = asyncio.run(get_clients())
+    second_loop_clients = asyncio.run(get_clients())
+
+    assert first_loop_clients[0] is first_loop_clients[1]
+    assert first_loop_clients[0] is not second_loop_clients[0]
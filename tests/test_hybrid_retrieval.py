@@ -0,0 +1,203 @@
+import json
+
+import pytest
+from langchain_core.documents import Document
+
+from benchmarks.retrieval_eval import (
+    DEFAULT_CORPUS_PATH,
+    DEFAULT_QUERIES_PATH,
+    build_indexes,
+    evaluate,
+    load_jsonl,
+    make_retrievers,
+)
+from chains.metrics import RETRIEVAL_METRIC, RETRIEVAL_REQUESTS_METRIC, MetricsRegistry
+from ingestion.writers import LexicalIndexWriter, VectorRecord
+from llms.fake import HashingFakeEmbeddings
+from tools.hybrid_retrieval import (
+    DENSE_PATH,
+    HYBRID_PATH,
+    LEXICAL_PATH,
+    HybridRetriever,
+    reciprocal_rank_fusion,
+)
+from tools.knowledge_base import search_knowledge_base
+from tools.lexical_index import BM25Index, tokenize
+
+
+class CountingEmbeddings(HashingFakeEmbeddings):
+    def __init__(self):
+        super().__init__(size=64)
+        self.calls = 0
+
+    def embed_documents(self, texts):
+        self.calls += 1
+        return super().embed_documents(texts)
+
+
+@pytest.fixture(scope="module")
+def corpus():
+    return load_jsonl(DEFAULT_CORPUS_PATH)
+
+
+@pytest.fixture
+def indexes(corpus):
+    embeddings = CountingEmbeddings()
+    store, lexical_index = build_indexes(corpus, embeddings)
+    embeddings.calls = 0
+    return embeddings, store, lexical_index
+
+
+def test_tokenize_keeps_codes_and_folds_plurals():
+    assert tokenize("Webhooks retried E-1042 on gpt-4o, v4.2") == [
+        "webhook",
+        "retry",
+        "e-1042",
+        "on",
+        "gpt-4o",
+        "v4.2",
+    ]
+
+
+def test_bm25_ranks_exact_terms_and_applies_filters():
+    index = BM25Index()
+    index.add_documents(
+        ["a", "b", "c"],
+        [
+            "Error E1042 means the key was rejected",
+            "Errors are logged for every request",
+            "Error E1042 was fixed in an old release",
+        ],
+        [{"lastmod_year": 2026}, {"lastmod_year": 2026}, {"lastmod_year": 2020}],
+    )
+
+    assert [id_ for id_, _ in index.search("error E1042")] == ["a", "c", "b"]
+    assert [
+        id_
+        for id_, _ in index.search("E1042", filter={"lastmod_year": {"$gte": 2025}})
+    ] == ["a"]
+
+    index.add_documents(["a"], ["Nothing to see"])
+    index.delete(["c"])
+    assert index.search("E1042") == []
+    assert len(index) == 2
+
+
+def test_lexical_index_round_trips_through_writer(tmp_path):
+    writer = LexicalIndexWriter(tmp_path)
+    writer.upsert(
+        [
+            VectorRecord("x#0", [], {"text": "Stormwatch alerts", "source": "x"}),
+            VectorRecord("y#0", [], {"text": "Nimbus plans", "source": "y"}),
+        ]
+    )
+    writer.delete(["y#0"])
+    writer.flush()
+
+    loaded = BM25Index.load(tmp_path)
+    assert len(loaded) == 1
+    document = loaded.get_document(loaded.search("stormwatch")[0][0])
+    assert document.page_content == "Stormwatch alerts"
+    assert document.metadata == {"source": "x"}
+
+
+def test_reciprocal_rank_fusion_rewards_agreement():
+    a, b, c = (Document(id=id_, page_content=id_) for id_ in "abc")
+
+    fused = reciprocal_rank_fusion([[a, b, c], [b, c]])
+
+    assert [document.id for document in fused] == ["b", "c", "a"]
+
+
+def test_fast_path_answers_exact_terms_without_embedding(indexes):
+    embeddings, store, lexical_index = indexes
+    registry = MetricsRegistry()
+    retriever = HybridRetriever(store, lexical_index, registry=registry)
+
+    result = retriever.retrieve("What does error E1042 mean?", k=1)
+    assert result.path == LEXICAL_PATH
+    assert [document.id for document in result.documents] == ["kb-01"]
+    assert embeddings.calls == 0
+
+    result = retriever.retrieve("how do I stop paying for my subscription", k=1)
+    assert result.path == HYBRID_PATH
+    assert set(result.stage_times) == {"lexical", "embed", "dense", "fusion"}
+    assert embeddings.calls == 1
+
+    assert registry.get_counter(RETRIEVAL_REQUESTS_METRIC, path=LEXICAL_PATH) == 1
+    assert registry.get_histogram(RETRIEVAL_METRIC, stage="embed").count == 1
+
+
+def test_retrieve_many_embeds_remaining_queries_in_one_call(indexes):
+    embeddings, store, lexical_index = indexes
+    retriever = HybridRetriever(store, lexical_index, registry=MetricsRegistry())
+    queries = [
+        "how do I stop paying for my subscription",
+        "What does error E1042 mean?",
+        "what do I get with the free plan",
+    ]
+
+    results = retriever.retrieve_many(queries, k=1)
+
+    assert [result.path for result in results] == [
+        HYBRID_PATH,
+        LEXICAL_PATH,
+        HYBRID_PATH,
+    ]
+    assert [document.id for document in results[1].documents] == ["kb-01"]
+    assert embeddings.calls == 1
+    assert retriever.retrieve_many([], k=1) == []
+
+
+def test_search_knowledge_base_formats_results_per_query(mocker):
+    mocker.patch(
+        "tools.knowledge_base.get_relevant_docs_many",
+        return_value=[
+            [Document(id="a#0", page_content="Alert  text", metadata={"source": "a"})],
+            [],
+        ],
+    )
+
+    results = [json.loads(result) for result in search_knowledge_base(["x", "y"])]
+
+    assert results[0]["results"] == [{"id": "a#0", "source": "a", "text": "Alert text"}]
+    assert results[1] == {"status": "success", "query": "y", "results": []}
+
+    mocker.patch(
+        "tools.knowledge_base.get_relevant_docs_many",
+        side_effect=RuntimeError("index unavailable"),
+    )
+    assert json.loads(search_knowledge_base(["x"])[0])["status"] == "error"
+
+
+def test_retriever_without_lexical_index_is_dense(indexes):
+    _, store, _ = indexes
+    retriever = HybridRetriever(store, registry=MetricsRegistry())
+
+    result = retriever.retrieve("Stormwatch", k=2, filter={"lastmod_year": 2026})
+
+    assert result.path == DENSE_PATH
+    assert all(doc.metadata["lastmod_year"] == 2026 for doc in result.documents)
+
+
+def test_hybrid_recall_on_fixture_corpus(indexes):
+    _, store, lexical_index = indexes
+    queries = load_jsonl(DEFAULT_QUERIES_PATH)
+    reports = {
+        mode: evaluate(mode, retrieve, queries, k=3)
+        for mode, retrieve in make_retrievers(store, lexical_index).items()
+    }
+
+    assert reports["hybrid"].recall >= reports["dense"].recall
+    assert reports["hybrid"].recall >= reports["lexical"].recall
+    assert reports["hybrid+fast_path"].recall >= reports["dense"].recall
+    assert reports["hybrid+fast_path"].fast_path_rate > 0.25
+
+
+@pytest.mark.benchmark(group="retrieval")
+@pytest.mark.parametrize("mode", ["lexical", "hybrid"])
+def test_retrieval_benchmark(benchmark, indexes, mode):
+    _, store, lexical_index = indexes
+    retrieve = make_retrievers(store, lexical_index)[mode]
+
+    benchmark(retrieve, "what do I get with the free plan", 3)
@@ -0,0 +1,235 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from threading import Lock
+from time import sleep
+
+import httpx
+import pytest
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from ingestion.pipeline import IngestionPipeline, bounded_map
+from ingestion.sources import (
+    SourceDocument,
+    html_to_text,
+    iter_directory_documents,
+    iter_sitemap_documents,
+)
+from ingestion.state import IngestionState
+from ingestion.writers import LocalIndexWriter
+
+SITEMAP_INDEX = b"""<?xml version="1.0" encoding="UTF-8"?>
+<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+  <sitemap><loc>https://example.com/pages.xml</loc></sitemap>
+</sitemapindex>"""
+
+PAGES_SITEMAP = b"""<?xml version="1.0" encoding="UTF-8"?>
+<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+  <url><loc>https://example.com/a</loc><lastmod>2025-03-01</lastmod></url>
+  <url><loc>https://example.com/b</loc><lastmod>2025-03-02T10:00:00Z</lastmod></url>
+  <url><loc>https://example.com/c</loc></url>
+</urlset>"""
+
+
+class CountingEmbeddings(DeterministicFakeEmbedding):
+    calls: list = []
+
+    def embed_documents(self, texts):
+        self.calls.append(len(texts))
+        return super().embed_documents(texts)
+
+
+@pytest.fixture
+def embeddings():
+    return CountingEmbeddings(size=16, calls=[])
+
+
+def make_pipeline(embeddings, writer, state, **kwargs):
+    return IngestionPipeline(
+        embeddings, writer, state, chunk_size=200, chunk_overlap=0, **kwargs
+    )
+
+
+def write_page(path, paragraphs, mtime):
+    path.write_text("\n\n".join(paragraphs))
+    os.utime(path, (mtime, mtime))
+
+
+def test_sitemap_is_streamed_through_indexes():
+    def handler(request):
+        if request.url.path == "/sitemap.xml":
+            return httpx.Response(200, content=SITEMAP_INDEX)
+        return httpx.Response(200, content=PAGES_SITEMAP)
+
+    client = httpx.Client(transport=httpx.MockTransport(handler))
+    documents = list(iter_sitemap_documents("https://example.com/sitemap.xml", client))
+
+    assert documents == [
+        SourceDocument(
+            "https://example.com/a", datetime(2025, 3, 1, tzinfo=timezone.utc)
+        ),
+        SourceDocument(
+            "https://example.com/b", datetime(2025, 3, 2, 10, tzinfo=timezone.utc)
+        ),
+        SourceDocument("https://example.com/c", None),
+    ]
+
+
+def test_html_to_text_drops_scripts_and_keeps_blocks():
+    html = (
+        "<html><head><style>p {}</style><title>Title</title></head><body>"
+        "<p>First   paragraph</p><script>var x;</script><p>Second</p></body></html>"
+    )
+
+    assert html_to_text(html) == "Title\nFirst paragraph\nSecond"
+
+
+def test_bounded_map_keeps_order_and_bounds_in_flight():
+    in_flight, peak, lock = 0, 0, Lock()
+    pulled = []
+
+    def work(item):
+        nonlocal in_flight, peak
+        with lock:
+            in_flight += 1
+            peak = max(peak, in_flight)
+        sleep(0.01 * (item % 3))
+        with lock:
+            in_flight -= 1
+        return item * 2
+
+    def items():
+        for item in range(20):
+            pulled.append(item)
+            yield item
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = bounded_map(executor, work, items(), max_in_flight=3)
+        assert next(results) == 0
+        # Items are pulled lazily rather than all submitted up front
+        assert len(pulled) == 3
+        assert [0] + list(results) == [item * 2 for item in range(20)]
+    assert peak <= 3
+
+
+def test_pipeline_ingests_only_new_and_changed_documents(embeddings, tmp_path):
+    pages = tmp_path / "pages"
+    pages.mkdir()
+    long_page = [f"Paragraph {index} " + "word " * 30 for index in range(4)]
+    write_page(pages / "a.md", long_page, 1_700_000_000)
+    write_page(pages / "b.txt", ["Short page"], 1_700_000_000)
+    writer = LocalIndexWriter(embeddings, tmp_path / "index")
+    state = IngestionState(str(tmp_path / "state.sqlite"))
+
+    report = make_pipeline(embeddings, writer, state).run(
+        iter_directory_documents(pages)
+    )
+    assert (report.ingested, report.chunks) == (2, 5)
+    assert report.docs_per_second > 0
+    assert len(writer.store.index) == 5
+
+    # Nothing changed: no fetch, no embedding
+    embeddings.calls.clear()
+    report = make_pipeline(embeddings, writer, state).run(
+        iter_directory_documents(pages)
+    )
+    assert report.skipped_lastmod == 2
+    assert embeddings.calls == []
+
+    # Touched but identical: fetched, but not embedded again
+    write_page(pages / "b.txt", ["Short page"], 1_800_000_000)
+    report = make_pipeline(embeddings, writer, state).run(
+        iter_directory_documents(pages)
+    )
+    assert (report.skipped_lastmod, report.skipped_content) == (1, 1)
+    assert embeddings.calls == []
+
+    # Shrunk page: its leftover chunks are deleted
+    write_page(pages / "a.md", long_page[:1], 1_800_000_000)
+    report = make_pipeline(embeddings, writer, state).run(
+        iter_directory_documents(pages)
+    )
+    assert (report.ingested, report.chunks, report.deleted_chunks) == (1, 1, 3)
+    assert embeddings.calls == [1]
+
+    reloaded = LocalIndexWriter(embeddings, tmp_path / "index").store
+    assert len(reloaded.index) == 2
+    # Chunks keep the date their content last changed, not the last touch
+    docs = reloaded.similarity_search(
+        "Short page", k=5, filter={"lastmod_year": {"$gte": 2027}}
+    )
+    assert [doc.page_content for doc in docs] == [long_page[0].strip()]
+    assert docs[0].metadata["source"] == str(pages / "a.md")
+
+
+def test_pipeline_batches_embeddings_and_retries_upserts(embeddings, tmp_path):
+    class FlakyWriter(LocalIndexWriter):
+        failures = 1
+        upserts = []
+
+        def upsert(self, records):
+            if self.failures:
+                self.failures -= 1
+                raise ConnectionError("upsert failed")
+            self.upserts.append(len(records))
+            super().upsert(records)
+
+    writer = FlakyWriter(embeddings)
+    texts = {f"doc{index}": f"Document number {index}" for index in range(25)}
+    pipeline = make_pipeline(
+        embeddings,
+        writer,
+        IngestionState(),
+        embed_batch_size=10,
+        upsert_batch_size=4,
+        retry_backoff=0,
+        load_text=lambda document: texts[document.source],
+    )
+
+    report = pipeline.run(SourceDocument(source) for source in texts)
+
+    assert report.ingested == 25
+    assert embeddings.calls == [10, 10, 5]
+    assert writer.upserts == [4, 4, 2, 4, 4, 2, 4, 1]
+    assert len(writer.store.index) == 25
+
+
+def test_pipeline_skips_documents_that_fail_to_load(embeddings):
+    def load_text(document):
+        if document.source == "broken":
+            raise OSError("unreachable")
+        return "Some text"
+
+    state = IngestionState()
+    pipeline = make_pipeline(
+        embeddings,
+        LocalIndexWriter(embeddings),
+        state,
+        retries=1,
+        retry_backoff=0,
+        load_text=load_text,
+    )
+
+    report = pipeline.run([SourceDocument("broken"), SourceDocument("ok")])
+
+    assert (report.failed, report.ingested) == (1, 1)
+    # Not recorded, so the next run tries it again
+    assert state.get("broken") is None
+
+
+@pytest.mark.benchmark(group="ingestion")
+def test_ingestion_throughput_benchmark(benchmark, embeddings):
+    texts = {f"doc{index}": "word " * 400 + str(index) for index in range(200)}
+
+    def ingest():
+        pipeline = make_pipeline(
+            embeddings,
+            LocalIndexWriter(embeddings),
+            IngestionState(),
+            load_text=lambda document: texts[document.source],
+        )
+        return pipeline.run(SourceDocument(source) for source in texts)
+
+    report = benchmark.pedantic(ingest, rounds=3)
+    benchmark.extra_info["docs_per_second"] = report.docs_per_second
+    assert report.ingested == len(texts)
@@ -0,0 +1,55 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from config import envs
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+
+def run_isolated(code: str, **env_overrides: str) -> subprocess.CompletedProcess:
+    env = {
+        name: value
+        for name, value in os.environ.items()
+        if name not in envs.REQUIRED_ENV_NAMES
+    }
+    env.update(env_overrides)
+    return subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=PROJECT_ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+
+
+def test_weather_tool_imports_without_llm_or_vector_store_settings():
+    completed = run_isolated(
+        "import sys, tools.weather, llms.openai, tools.vecterstore\n"
+        "print(sorted(m for m in ('langchain_openai', 'pinecone') if m in sys.modules))"
+    )
+
+    assert completed.returncode == 0, completed.stderr
+    assert completed.stdout.strip() == "[]"
+
+
+def test_missing_setting_fails_only_when_used():
+    completed = run_isolated(
+        "from tools.weather import build_weather_request\n"
+        "build_weather_request('London')",
+        OPENAI_API_KEY="key",
+    )
+
+    assert completed.returncode != 0
+    assert "WEATHERAPI_API_KEY" in completed.stderr
+
+
+def test_envs_module_attributes_resolve_lazily(monkeypatch):
+    monkeypatch.setenv("WEATHER_CACHE_PATH", "/tmp/weather.sqlite")
+
+    assert envs.WEATHER_CACHE_PATH == "/tmp/weather.sqlite"
+    with pytest.raises(AttributeError):
+        envs.NOT_A_SETTING
@@ -0,0 +1,58 @@
+from benchmarks.load_test import (
+    CHAIN_FUNCTIONS,
+    ResourceSampler,
+    get_percentiles,
+    make_fake_configs,
+    run_load_test,
+)
+from chains.orchestrator_cache import orchestrator_cache
+from tools.fake import FakeSearchTools, LatencyDistribution
+
+
+def test_run_load_test_with_fake_backends(mocker):
+    orchestrator_cache.clear()
+    fake_tools = FakeSearchTools(
+        web_latency=LatencyDistribution(median=0.01),
+        weather_latency=LatencyDistribution(median=0.01),
+    )
+    for target, fake in fake_tools.get_patch_targets().items():
+        mocker.patch(target, fake)
+    configs = make_fake_configs(
+        orchestrator_ttfb=0.01, summarizer_ttfb=0.01, inter_token_latency=0
+    )
+    assert not any(config.use_orchestrator_cache for config in configs.values())
+
+    report = run_load_test(
+        sessions=4, turns=2, chains=list(CHAIN_FUNCTIONS), configs=configs
+    )
+    summary = report.summarize()
+    cached_decisions = len(orchestrator_cache)
+    orchestrator_cache.clear()
+
+    assert summary["turns"] == 8
+    assert summary["error_rate"] == 0
+    assert summary["ttfb_s"]["p50"] <= summary["total_s"]["p50"]
+    assert summary["peak_rss_mb"] > 0
+    assert summary["peak_threads"] >= 4
+    assert cached_decisions == 0
+
+
+def test_get_percentiles_uses_nearest_rank():
+    values = [float(value) for value in range(1, 101)]
+
+    assert get_percentiles(values) == {"p50": 50.0, "p95": 95.0, "p99": 99.0}
+    assert get_percentiles([]) == {"p50": None, "p95": None, "p99": None}
+
+
+def test_resource_sampler_reports_its_own_peak_rss(mocker):
+    mocker.patch("benchmarks.load_test.get_peak_rss_mb", return_value=900.0)
+    mocker.patch("benchmarks.load_test.read_rss_mb", return_value=120.0)
+    with ResourceSampler(interval=0.01) as sampler:
+        pass
+    assert sampler.peak_rss_mb == 120.0
+
+    # Without a current RSS reading, the process peak is the fallback
+    mocker.patch("benchmarks.load_test.read_rss_mb", return_value=None)
+    with ResourceSampler(interval=0.01) as fallback_sampler:
+        pass
+    assert fallback_sampler.peak_rss_mb == 900.0
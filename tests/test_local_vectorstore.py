@@ -0,0 +1,217 @@
+import numpy as np
+import pytest
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from tools import vecterstore
+from tools.local_vectorstore import LocalVectorIndex, LocalVectorStore
+
+DIMENSIONS = 256
+CORPUS_SIZE = 20_000
+QUERY_COUNT = 32
+RECENT_FILTER = {"lastmod_year": {"$gte": 2025}}
+
+
+def brute_force_top_k(vectors, queries, k, mask=None):
+    # Exact float64 reference over the raw vectors
+    vectors = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    queries = queries / np.linalg.norm(queries, axis=1, keepdims=True)
+    scores = vectors.astype(np.float64) @ queries.T.astype(np.float64)
+    if mask is not None:
+        scores[~mask] = -np.inf
+    return [list(np.argsort(-column, kind="stable")[:k]) for column in scores.T]
+
+
+def recall_at_k(index, vectors, queries, k):
+    expected = brute_force_top_k(vectors, queries, k)
+    found = index.search(queries, k=k)
+    hits = sum(
+        len(set(exact) & {row for row, _ in approx})
+        for exact, approx in zip(expected, found)
+    )
+    return hits / (k * len(queries))
+
+
+@pytest.fixture(scope="module")
+def corpus():
+    rng = np.random.default_rng(7)
+    vectors = rng.standard_normal((CORPUS_SIZE, DIMENSIONS)).astype(np.float32)
+    # Queries near corpus rows, like real questions near their documents
+    queries = vectors[rng.choice(CORPUS_SIZE, QUERY_COUNT)] + 0.5 * (
+        rng.standard_normal((QUERY_COUNT, DIMENSIONS)).astype(np.float32)
+    )
+    metadatas = [{"lastmod_year": 2015 + row % 12} for row in range(CORPUS_SIZE)]
+    return vectors, queries, metadatas
+
+
+@pytest.mark.parametrize("quantize", [False, True])
+def test_search_matches_brute_force(corpus, quantize):
+    vectors, queries, metadatas = corpus
+    index = LocalVectorIndex.from_vectors(vectors, metadatas, quantize=quantize)
+
+    assert recall_at_k(index, vectors, queries, k=10) >= (0.9 if quantize else 1.0)
+
+
+def test_quantized_index_stores_int8(corpus):
+    vectors, _, metadatas = corpus
+    index = LocalVectorIndex.from_vectors(vectors, metadatas, quantize=True)
+
+    assert index.vectors.dtype == np.int8
+    assert index.vectors.nbytes == vectors.nbytes // 4
+
+
+def test_filter_is_applied_before_top_k(corpus):
+    vectors, queries, metadatas = corpus
+    index = LocalVectorIndex.from_vectors(vectors, metadatas)
+    recent = np.array([metadata["lastmod_year"] >= 2025 for metadata in metadatas])
+
+    found = index.search(queries, k=5, filter=RECENT_FILTER)
+
+    assert [[row for row, _ in matches] for matches in found] == brute_force_top_k(
+        vectors, queries, 5, mask=recent
+    )
+
+
+def test_filter_operators():
+    metadatas = [
+        {"lastmod_year": 2023, "source": "a"},
+        {"lastmod_year": 2024, "source": "b"},
+        {"lastmod_year": 2025},
+    ]
+    index = LocalVectorIndex.from_vectors(np.eye(3), metadatas)
+
+    def rows(filter):
+        return list(np.flatnonzero(index.build_filter_mask(filter)))
+
+    assert rows(None) == [0, 1, 2]
+    assert rows({"lastmod_year": {"$gt": 2023, "$lte": 2025}}) == [1, 2]
+    assert rows({"source": "b"}) == [1]
+    assert rows({"source": {"$in": ["a", "b"]}}) == [0, 1]
+    assert rows({"source": {"$ne": "a"}}) == [1, 2]
+    assert rows({"source": {"$gte": "b"}}) == [1]
+    assert rows({"$or": [{"source": "a"}, {"lastmod_year": 2025}]}) == [0, 2]
+    with pytest.raises(ValueError):
+        index.build_filter_mask({"source": {"$regex": "a"}})
+
+
+def test_store_round_trips_through_memory_mapped_files(tmp_path):
+    embedding = DeterministicFakeEmbedding(size=32)
+    texts = ["sunny in paris", "rain in london", "snow in oslo"]
+    store = LocalVectorStore.from_texts(
+        texts,
+        embedding,
+        metadatas=[{"lastmod_year": year} for year in (2020, 2025, 2026)],
+        quantize=True,
+    )
+    store.save(tmp_path)
+
+    loaded = LocalVectorStore.load(tmp_path, embedding)
+
+    assert isinstance(loaded.index.vectors, np.memmap)
+    assert loaded.index.quantized
+    docs = loaded.similarity_search(
+        "rain in london", k=2, filter={"lastmod_year": {"$gte": 2025}}
+    )
+    assert [doc.page_content for doc in docs] == ["rain in london", "snow in oslo"]
+
+    loaded.add_texts(["fog in sf"], [{"lastmod_year": 2026}])
+    assert len(loaded.index) == 4
+    assert loaded.similarity_search("fog in sf", k=1)[0].page_content == "fog in sf"
+
+
+def test_add_embeddings_overwrites_ids_in_place_and_dedupes_batches():
+    store = LocalVectorStore(DeterministicFakeEmbedding(size=4))
+    store.add_embeddings(["a", "b"], [[1, 0, 0, 0], [0, 1, 0, 0]], ids=["a", "b"])
+
+    store.add_embeddings(
+        ["a2", "c", "c2", "a3"],
+        [[0, 0, 1, 0], [0, 0, 0, 1], [1, 1, 0, 0], [0, 0, 1, 1]],
+        ids=["a", "c", "c", "a"],
+    )
+
+    assert [metadata["text"] for metadata in store.index.metadatas] == [
+        "a3",
+        "b",
+        "c2",
+    ]
+    matches = store.index.search(np.array([0, 0, 1, 1]), k=1)[0]
+    assert matches[0][0] == 0 and matches[0][1] == pytest.approx(1.0)
+
+
+def test_add_embeddings_grows_buffers_amortized():
+    store = LocalVectorStore(DeterministicFakeEmbedding(size=4))
+    store.add_embeddings(["first"], [[1, 0, 0, 0]])
+    buffer = store.index._vector_buffer
+
+    for row in range(100):
+        store.add_embeddings([f"text {row}"], [[0, 1, 0, row]])
+
+    assert len(store.index) == 101
+    # Appends fill the reserved capacity instead of copying the matrix
+    assert store.index._vector_buffer is buffer
+
+
+def test_upserting_a_loaded_index_leaves_saved_files_untouched(tmp_path):
+    embedding = DeterministicFakeEmbedding(size=8)
+    LocalVectorStore.from_texts(["a", "b"], embedding, ids=["a", "b"]).save(tmp_path)
+
+    loaded = LocalVectorStore.load(tmp_path, embedding)
+    loaded.add_texts(["new a"], ids=["a"])
+
+    assert [metadata["text"] for metadata in loaded.index.metadatas] == ["new a", "b"]
+    reloaded = LocalVectorStore.load(tmp_path, embedding)
+    assert reloaded.index.metadatas[0]["text"] == "a"
+    assert np.allclose(
+        reloaded.index.vectors[0],
+        LocalVectorIndex.from_vectors(
+            np.asarray([embedding.embed_query("a")]), [{}]
+        ).vectors[0],
+    )
+
+
+def test_get_relevant_docs_uses_local_backend(mocker, tmp_path, monkeypatch):
+    embedding = DeterministicFakeEmbedding(size=32)
+    LocalVectorStore.from_texts(
+        ["old news", "new news"],
+        embedding,
+        metadatas=[{"lastmod_year": 2000}, {"lastmod_year": 9999}],
+    ).save(tmp_path)
+    monkeypatch.setenv("VECTOR_STORE_BACKEND", "local")
+    monkeypatch.setenv("LOCAL_VECTOR_INDEX_PATH", str(tmp_path))
+    mocker.patch.object(vecterstore, "get_openai_embeddings", return_value=embedding)
+    caches = (
+        vecterstore.get_vector_store,
+        vecterstore.get_lexical_index,
+        vecterstore.get_retriever,
+        vecterstore.get_env,
+    )
+    for cached in caches:
+        cached.cache_clear()
+
+    try:
+        docs = vecterstore.get_relevant_docs("old news", k=2)
+    finally:
+        for cached in caches:
+            cached.cache_clear()
+
+    assert [doc.page_content for doc in docs] == ["new news"]
+
+
+@pytest.mark.benchmark(group="vector-search")
+@pytest.mark.parametrize("filtered", [False, True])
+def test_brute_force_search_benchmark(benchmark, corpus, filtered):
+    vectors, queries, metadatas = corpus
+    mask = None
+    if filtered:
+        mask = np.array([metadata["lastmod_year"] >= 2025 for metadata in metadatas])
+    benchmark(brute_force_top_k, vectors, queries, 10, mask)
+
+
+@pytest.mark.benchmark(group="vector-search")
+@pytest.mark.parametrize("filtered", [False, True])
+@pytest.mark.parametrize("quantize", [False, True])
+def test_local_index_search_benchmark(benchmark, corpus, quantize, filtered):
+    vectors, queries, metadatas = corpus
+    index = LocalVectorIndex.from_vectors(vectors, metadatas, quantize=quantize)
+    benchmark.extra_info["recall@10"] = recall_at_k(index, vectors, queries, k=10)
+
+    benchmark(index.search, queries, 10, RECENT_FILTER if filtered else None)
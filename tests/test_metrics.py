@@ -0,0 +1,169 @@
+import random
+from time import sleep
+from urllib.request import urlopen
+
+import pytest
+from langchain_core.language_models import FakeListChatModel
+
+from chains.metrics import (
+    LatencyHistogram,
+    MetricsRegistry,
+    StepMetrics,
+    STEP_METRIC,
+    STREAM_METRIC,
+    metrics_registry,
+)
+from chains.metrics_exporter import start_metrics_server, write_metrics_file
+from chains.types import ChainConfig, ChainInputs
+from chains.web_search import get_simple_chain_response_stream
+
+
+@pytest.fixture(autouse=True)
+def clear_metrics_registry():
+    metrics_registry.clear()
+    yield
+    metrics_registry.clear()
+
+
+def test_histogram_quantiles_are_close_to_exact():
+    rng = random.Random(0)
+    values = sorted(rng.lognormvariate(-1, 1) for _ in range(10_000))
+    histogram = LatencyHistogram()
+    for value in values:
+        histogram.observe(value)
+
+    for q in (0.5, 0.95, 0.99):
+        exact = values[int(q * len(values)) - 1]
+        assert histogram.quantile(q) == pytest.approx(exact, rel=0.1)
+    assert histogram.count == len(values)
+    assert histogram.sum == pytest.approx(sum(values))
+
+
+def test_histogram_merge_adds_counts():
+    fast, slow = LatencyHistogram(), LatencyHistogram()
+    for _ in range(50):
+        fast.observe(0.01)
+        slow.observe(1.0)
+
+    fast.merge(slow)
+
+    assert fast.count == 100
+    assert fast.quantile(0.25) < 0.02
+    assert fast.quantile(0.75) > 0.5
+    assert LatencyHistogram().quantile(0.5) is None
+    with pytest.raises(ValueError):
+        fast.merge(LatencyHistogram(buckets=(1.0,)))
+
+
+def test_registry_queries_merge_matching_labels():
+    registry = MetricsRegistry()
+    registry.observe(STEP_METRIC, 0.1, step="orchestration", chain="single_task")
+    registry.observe(STEP_METRIC, 0.3, step="orchestration", chain="multi_task")
+    registry.observe(STEP_METRIC, 5.0, step="web_search", chain="multi_task")
+
+    assert registry.get_histogram(STEP_METRIC, step="orchestration").count == 2
+    assert registry.get_histogram(STEP_METRIC, chain="multi_task").count == 2
+    assert registry.quantiles(STEP_METRIC, (0.5,), step="web_search")[0.5] > 1
+
+
+def test_registry_publishes_tool_tasks_per_tool():
+    registry = MetricsRegistry()
+    metrics = StepMetrics()
+    metrics.record_step("orchestration", 0.5)
+    metrics.record_task("web_search[0]", 0.2)
+    metrics.record_task("web_search[1]", 0.3)
+    # A re-submitted streamed task
+    metrics.record_task("web_search[2]#2", 0.3)
+    metrics.record_stat("stream_total", 2.0)
+
+    registry.observe_step_metrics(metrics, chain="multi_task")
+
+    assert registry.get_histogram(STEP_METRIC, step="web_search").count == 3
+    assert registry.get_histogram(STREAM_METRIC).count == 1
+    assert registry.get_label_values(STEP_METRIC, "step") == [
+        "orchestration",
+        "web_search",
+    ]
+
+
+def test_render_prometheus_text_format():
+    registry = MetricsRegistry(buckets=(0.1, 1.0))
+    registry.observe(STEP_METRIC, 0.5, step="ttfb_summarizer", model='gpt "x"')
+
+    text = registry.render_prometheus()
+
+    assert f"# TYPE {STEP_METRIC} histogram" in text
+    labels = 'model="gpt \\"x\\"",step="ttfb_summarizer"'
+    assert f'{STEP_METRIC}_bucket{{{labels},le="0.1"}} 0' in text
+    assert f'{STEP_METRIC}_bucket{{{labels},le="1"}} 1' in text
+    assert f'{STEP_METRIC}_bucket{{{labels},le="+Inf"}} 1' in text
+    assert f"{STEP_METRIC}_count{{{labels}}} 1" in text
+
+
+def test_registry_counters_sum_matching_labels():
+    registry = MetricsRegistry()
+    registry.increment("lookups_total", 2, model="a", tier="memory")
+    registry.increment("lookups_total", model="a", tier="miss")
+    registry.increment("lookups_total", 3, model="b", tier="memory")
+
+    assert registry.get_counter("lookups_total", tier="memory") == 5
+    assert registry.get_counter("lookups_total", model="a") == 3
+    assert registry.get_counter("missing_total") == 0
+
+    text = registry.render_prometheus()
+    assert "# TYPE lookups_total counter" in text
+    assert 'lookups_total{model="a",tier="memory"} 2.0' in text
+
+
+def test_chain_publishes_ttfb_since_invocation():
+    config = ChainConfig(
+        orchestrator_llm=FakeListChatModel(responses=["{}"]),
+        summarizer_llm=FakeListChatModel(responses=["hello"]),
+    )
+    stream = get_simple_chain_response_stream(
+        config, ChainInputs(user_query="hi", chat_history="")
+    )
+
+    next(stream)
+    sleep(0.05)
+    list(stream)
+
+    ttfb = metrics_registry.get_histogram(
+        STEP_METRIC, step="ttfb_invocation", chain="simple"
+    )
+    stream_total = metrics_registry.get_histogram(STREAM_METRIC, chain="simple")
+    assert ttfb.count == 1
+    # Measured from the chain start, not from the perf_counter epoch
+    assert 0 < ttfb.sum < 1
+    assert stream_total.sum >= 0.05
+
+
+def test_metrics_server_and_file_expose_registry(tmp_path):
+    metrics_registry.observe(STEP_METRIC, 0.2, step="orchestration")
+
+    server = start_metrics_server(0)
+    try:
+        port = server.server_address[1]
+        with urlopen(f"http://127.0.0.1:{port}/metrics") as response:
+            body = response.read().decode()
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    metrics_path = tmp_path / "chains.prom"
+    write_metrics_file(str(metrics_path))
+
+    assert f'{STEP_METRIC}_count{{step="orchestration"}} 1' in body
+    assert metrics_path.read_text() == body
+
+
+@pytest.mark.benchmark(group="metrics-overhead", min_rounds=100, warmup=False)
+def test_observe_step_metrics_benchmark(benchmark):
+    registry = MetricsRegistry()
+    metrics = StepMetrics()
+    for step_name in ("orchestration", "tool_stage", "ttfb_summarizer"):
+        metrics.record_step(step_name, 0.5)
+    metrics.record_task("web_search[0]", 0.2)
+    metrics.record_stat("stream_total", 2.0)
+
+    benchmark(registry.observe_step_metrics, metrics, chain="multi_task")
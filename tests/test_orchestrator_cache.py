@@ -0,0 +1,117 @@
+import pytest
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_core.messages import AIMessage, HumanMessage
+
+from chains.orchestrator_cache import (
+    MULTI_TASK_NAMESPACE,
+    SINGLE_TASK_NAMESPACE,
+    cache_decision,
+    get_cached_decision,
+    get_orchestrator_cache_key,
+    orchestrator_cache,
+)
+from chains.types import ChainConfig, ChainInputs
+from chains.web_search import get_single_web_search_chain_response_stream
+from tasks.search import MultiSearchTask, SingleSearchTask, WeatherSearchTask
+
+
+@pytest.fixture(autouse=True)
+def clear_orchestrator_cache():
+    orchestrator_cache.clear()
+    yield
+    orchestrator_cache.clear()
+
+
+@pytest.fixture
+def weather_task():
+    return MultiSearchTask(
+        should_search_web=False,
+        should_search_weather=True,
+        weather_tasks=[WeatherSearchTask(location="Paris, France")],
+    )
+
+
+def test_cache_key_uses_normalized_query_and_recent_history():
+    history = [HumanMessage("Hi"), AIMessage("Hello!"), HumanMessage("Weather?")]
+
+    key = get_orchestrator_cache_key(MULTI_TASK_NAMESPACE, "Weather in Paris?", history)
+
+    assert key == get_orchestrator_cache_key(
+        MULTI_TASK_NAMESPACE, "  weather in   PARIS ", list(history)
+    )
+    assert key != get_orchestrator_cache_key(
+        MULTI_TASK_NAMESPACE, "Weather in Paris?", history[:2]
+    )
+    # Messages outside the window do not change the key
+    older = [HumanMessage("Something long ago")] * 3 + history
+    assert get_orchestrator_cache_key(
+        MULTI_TASK_NAMESPACE, "Weather in Paris?", older, window=3
+    ) == get_orchestrator_cache_key(
+        MULTI_TASK_NAMESPACE, "Weather in Paris?", history, window=3
+    )
+
+
+def test_cached_decisions_are_copies(weather_task):
+    cache_decision(MULTI_TASK_NAMESPACE, "Weather in Paris?", [], weather_task)
+
+    cached = get_cached_decision(MULTI_TASK_NAMESPACE, "weather in paris", [])
+    cached.weather_tasks.append(WeatherSearchTask(location="Rome, Italy"))
+
+    assert cached is not weather_task
+    assert get_cached_decision(MULTI_TASK_NAMESPACE, "weather in paris", []) == (
+        weather_task
+    )
+
+
+def test_namespaces_are_separate(weather_task):
+    cache_decision(MULTI_TASK_NAMESPACE, "Weather in Paris?", [], weather_task)
+
+    assert get_cached_decision(SINGLE_TASK_NAMESPACE, "Weather in Paris?", []) is None
+
+
+def test_decisions_are_keyed_by_orchestrator_model(weather_task):
+    cache_decision(
+        MULTI_TASK_NAMESPACE, "Weather in Paris?", [], weather_task, model="a:gpt"
+    )
+
+    assert get_cached_decision(
+        MULTI_TASK_NAMESPACE, "Weather in Paris?", [], model="b:fake"
+    ) is None
+    assert get_cached_decision(
+        MULTI_TASK_NAMESPACE, "Weather in Paris?", [], model="a:gpt"
+    ) == weather_task
+
+
+def test_time_sensitive_queries_bypass_cache(weather_task):
+    cache_decision(MULTI_TASK_NAMESPACE, "Weather in Paris right now?", [], weather_task)
+
+    assert len(orchestrator_cache) == 0
+    assert get_cached_decision(MULTI_TASK_NAMESPACE, "Latest SpaceX news", []) is None
+
+
+def test_chain_skips_orchestrator_on_repeated_query():
+    orchestrator_llm = FakeListChatModel(
+        responses=[
+            SingleSearchTask(
+                should_search_web=False,
+                should_search_weather=False,
+                web_query="",
+                web_query_count=0,
+                weather_query="",
+            ).model_dump_json(),
+            "A second orchestrator call would fail to parse",
+        ]
+    )
+    config = ChainConfig(
+        orchestrator_llm=orchestrator_llm,
+        summarizer_llm=FakeListChatModel(responses=["Four."]),
+        track_metrics=False,
+    )
+    inputs = ChainInputs(user_query="What is 2+2?", chat_history="")
+
+    for _ in range(3):
+        assert "".join(get_single_web_search_chain_response_stream(config, inputs)) == (
+            "Four."
+        )
+
+    assert orchestrator_llm.i == 1
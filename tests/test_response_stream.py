@@ -0,0 +1,206 @@
+import asyncio
+from threading import Event
+from time import sleep, perf_counter
+
+import pytest
+
+from factories.response_stream import acoalesce_stream, coalesce_stream
+
+
+def token_stream(tokens, delay: float = 0.0, first_delay: float = 0.0):
+    sleep(first_delay)
+    for token in tokens:
+        yield token
+        if delay:
+            sleep(delay)
+
+
+def test_coalesce_stream_keeps_text_and_batches_chunks():
+    tokens = [f"tok{index} " for index in range(200)]
+
+    chunks = list(coalesce_stream(token_stream(tokens), max_delay_ms=50, max_chars=64))
+
+    assert "".join(chunks) == "".join(tokens)
+    assert chunks[0] == "tok0 "
+    assert len(chunks) < len(tokens) / 5
+    assert all(len(chunk) < 64 + len("tok199 ") for chunk in chunks)
+
+
+def test_coalesce_stream_does_not_delay_first_chunk():
+    stream = coalesce_stream(
+        token_stream(["first", "second"], delay=0.3, first_delay=0.1),
+        max_delay_ms=200,
+    )
+
+    start = perf_counter()
+    assert next(stream) == "first"
+    assert perf_counter() - start < 0.2
+    assert list(stream) == ["second"]
+
+
+def test_coalesce_stream_flushes_after_max_delay_when_source_stalls():
+    def stalling_stream():
+        yield "a"
+        yield "b"
+        sleep(0.5)
+        yield "c"
+
+    stream = coalesce_stream(stalling_stream(), max_delay_ms=50, max_chars=1000)
+    assert next(stream) == "a"
+
+    start = perf_counter()
+    assert next(stream) == "b"
+    # Held for at most the delay, not until the source resumes
+    assert perf_counter() - start < 0.3
+    assert list(stream) == ["c"]
+
+
+def test_coalesce_stream_flushes_buffer_before_raising():
+    def failing_stream():
+        yield "a"
+        yield "b"
+        raise RuntimeError("boom")
+
+    stream = coalesce_stream(failing_stream(), max_delay_ms=1000)
+
+    assert next(stream) == "a"
+    assert next(stream) == "b"
+    with pytest.raises(RuntimeError):
+        next(stream)
+
+
+def test_coalesce_stream_passes_through_without_delay():
+    tokens = ["a", "b", "c"]
+    assert list(coalesce_stream(iter(tokens), max_delay_ms=0)) == tokens
+
+
+def test_coalesce_stream_closes_source_when_consumer_stops():
+    closed = Event()
+
+    def endless_stream():
+        try:
+            while True:
+                yield "tok "
+                sleep(0.01)
+        finally:
+            closed.set()
+
+    # Held here so only an explicit close, not garbage collection, ends it
+    source = endless_stream()
+    stream = coalesce_stream(source, max_delay_ms=50)
+    assert next(stream) == "tok "
+    stream.close()
+
+    assert closed.wait(timeout=1)
+    assert source.gi_frame is None
+
+
+async def async_token_stream(tokens, delay: float = 0.0):
+    for token in tokens:
+        yield token
+        await asyncio.sleep(delay)
+
+
+async def collect(stream):
+    return [chunk async for chunk in stream]
+
+
+def test_acoalesce_stream_keeps_text_and_batches_chunks():
+    tokens = [f"tok{index} " for index in range(200)]
+
+    chunks = asyncio.run(
+        collect(
+            acoalesce_stream(async_token_stream(tokens), max_delay_ms=50, max_chars=64)
+        )
+    )
+
+    assert "".join(chunks) == "".join(tokens)
+    assert chunks[0] == "tok0 "
+    assert len(chunks) < len(tokens) / 5
+
+
+def test_acoalesce_stream_flushes_after_max_delay_when_source_stalls():
+    async def stalling_stream():
+        yield "a"
+        yield "b"
+        await asyncio.sleep(0.5)
+        yield "c"
+
+    async def consume():
+        stream = acoalesce_stream(stalling_stream(), max_delay_ms=50, max_chars=1000)
+        assert await anext(stream) == "a"
+        start = perf_counter()
+        assert await anext(stream) == "b"
+        elapsed = perf_counter() - start
+        return elapsed, await collect(stream)
+
+    elapsed, rest = asyncio.run(consume())
+
+    assert elapsed < 0.3
+    assert rest == ["c"]
+
+
+def test_acoalesce_stream_raises_source_errors_after_flushing():
+    async def failing_stream():
+        yield "a"
+        yield "b"
+        raise RuntimeError("boom")
+
+    async def consume():
+        stream = acoalesce_stream(failing_stream(), max_delay_ms=1000)
+        chunks = [await anext(stream), await anext(stream)]
+        with pytest.raises(RuntimeError):
+            await anext(stream)
+        return chunks
+
+    assert asyncio.run(consume()) == ["a", "b"]
+
+
+def test_acoalesce_stream_closes_source_when_consumer_stops():
+    closed = []
+
+    async def endless_stream():
+        try:
+            while True:
+                yield "tok "
+                await asyncio.sleep(0.01)
+        finally:
+            closed.append(True)
+
+    async def consume():
+        stream = acoalesce_stream(endless_stream(), max_delay_ms=50)
+        assert await anext(stream) == "tok "
+        await stream.aclose()
+
+    asyncio.run(consume())
+    assert closed == [True]
+
+
+def render_stream(stream) -> int:
+    # Mimics st.write_stream, which re-renders the whole text on every chunk
+    text = ""
+    updates = 0
+    for chunk in stream:
+        text += chunk
+        "".join(line.strip() for line in text.splitlines())
+        updates += 1
+    return updates
+
+
+@pytest.fixture
+def llm_tokens():
+    return [f"word{index % 50} " for index in range(3000)]
+
+
+@pytest.mark.benchmark(group="ui-stream-updates", min_rounds=5, warmup=False)
+def test_per_token_stream_benchmark(benchmark, llm_tokens):
+    updates = benchmark(lambda: render_stream(token_stream(llm_tokens)))
+    assert updates == len(llm_tokens)
+
+
+@pytest.mark.benchmark(group="ui-stream-updates", min_rounds=5, warmup=False)
+def test_coalesced_stream_benchmark(benchmark, llm_tokens):
+    updates = benchmark(
+        lambda: render_stream(coalesce_stream(token_stream(llm_tokens)))
+    )
+    assert updates < len(llm_tokens)
@@ -0,0 +1,113 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from chains.router import (
+    NaiveBayesRouteClassifier,
+    RouterStats,
+    route_query,
+    router_stats,
+)
+
+ROUTER_CASES_PATH = Path(__file__).parent / "fixtures" / "router_cases.jsonl"
+LABEL_FLAGS = {
+    "none": (False, False),
+    "web": (True, False),
+    "weather": (False, True),
+    "web+weather": (True, True),
+}
+
+
+@pytest.fixture
+def router_cases():
+    with open(ROUTER_CASES_PATH) as cases_file:
+        return [json.loads(line) for line in cases_file if line.strip()]
+
+
+def matches_label(decision, case):
+    flags = (decision.should_search_web, decision.should_search_weather)
+    if flags != LABEL_FLAGS[case["label"]]:
+        return False
+    if decision.weather_locations and "weather_locations" in case:
+        return [location.casefold() for location in decision.weather_locations] == [
+            location.casefold() for location in case["weather_locations"]
+        ]
+    return True
+
+
+def test_fast_path_agrees_with_llm_decisions(router_cases):
+    fired = [
+        (case, decision)
+        for case in router_cases
+        if (decision := route_query(case["query"], case["chat_history"])) is not None
+    ]
+    correct = [case for case, decision in fired if matches_label(decision, case)]
+
+    # Hard negatives are meant to fall back, so they only count for accuracy
+    answerable = sum(not case.get("hard_negative") for case in router_cases)
+    coverage = sum(not case.get("hard_negative") for case, _ in fired) / answerable
+    accuracy = len(correct) / len(fired)
+
+    assert accuracy == 1.0
+    assert coverage >= 0.35
+
+
+def test_fast_path_falls_back_on_hard_negatives(router_cases):
+    hard_negatives = [case for case in router_cases if case.get("hard_negative")]
+
+    assert len(hard_negatives) >= 6
+    for case in hard_negatives:
+        assert route_query(case["query"], case["chat_history"]) is None, case
+
+
+def test_classifier_accuracy_on_held_out_cases(router_cases):
+    # Leave-one-out over the labelled set, counting only confident answers
+    answered = correct = 0
+    for index, case in enumerate(router_cases):
+        training = [
+            (other["query"], other["label"])
+            for other_index, other in enumerate(router_cases)
+            if other_index != index
+        ]
+        decision = NaiveBayesRouteClassifier(training).classify(case["query"])
+        if decision is None or decision.confidence < 0.9:
+            continue
+        answered += 1
+        correct += matches_label(decision, case)
+
+    # Abstaining on everything must not pass as accurate
+    assert answered >= 3
+    assert correct / answered >= 0.8
+
+
+def test_route_query_respects_threshold():
+    assert route_query("How's the weather in New York and LA?", threshold=0.9) is None
+    decision = route_query("How's the weather in New York and LA?", threshold=0.8)
+    assert decision.weather_locations == ("New York", "LA")
+
+
+def test_route_query_builds_search_tasks():
+    decision = route_query("What's the weather like in Paris, France today?")
+
+    multi_task = decision.to_multi_search_task()
+    single_task = decision.to_single_search_task()
+
+    assert multi_task.should_search_weather and not multi_task.should_search_web
+    assert multi_task.weather_tasks[0].location == "Paris, France"
+    assert single_task.weather_query == "Paris, France"
+    assert single_task.web_query_count == 0
+
+
+def test_route_query_counts_fast_path_and_fallback(mocker):
+    mocker.patch("chains.router.router_stats", RouterStats())
+    from chains import router
+
+    route_query("thanks!")
+    route_query("What's 3 * 4?")
+    route_query("Who won the latest Super Bowl?")
+
+    assert router.router_stats.fast_path == 2
+    assert router.router_stats.fallback == 1
+    assert router.router_stats.by_rule == {"small_talk": 1, "arithmetic": 1}
+    assert router_stats is not router.router_stats
@@ -0,0 +1,173 @@
+import json
+from time import sleep
+
+import pytest
+
+from chains.metrics import StepMetrics
+from chains.streaming_orchestrator import (
+    StreamedTaskDispatcher,
+    TaskArrayScanner,
+    run_streaming_multi_search_orchestration,
+)
+from chains.tool_stage import ToolStage
+
+ORCHESTRATOR_OUTPUT = """```json
+{
+    "should_search_web": true,
+    "should_search_weather": true,
+    "web_tasks": [
+        {"query": "SpaceX Starship {latest} \\"launch\\" status", "query_count": 5},
+        {"query": "SpaceX Starship most recent test results", "query_count": 3}
+    ],
+    "weather_tasks": [
+        {"location": "Boca Chica, Texas"}
+    ]
+}
+```"""
+
+
+class FakeStreamingOrchestrator:
+    """Streams a canned orchestrator output in small chunks with a delay."""
+
+    def __init__(self, output: str, chunk_size: int = 8, delay: float = 0.01):
+        self.output = output
+        self.chunk_size = chunk_size
+        self.delay = delay
+
+    def stream(self, inputs):
+        for start in range(0, len(self.output), self.chunk_size):
+            sleep(self.delay)
+            yield self.output[start : start + self.chunk_size]
+
+
+def feed_in_chunks(scanner, text, chunk_size):
+    elements = []
+    for start in range(0, len(text), chunk_size):
+        elements.extend(scanner.feed(text[start : start + chunk_size]))
+    return elements
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 1000])
+def test_scanner_emits_complete_array_elements(chunk_size):
+    scanner = TaskArrayScanner(["web_tasks", "weather_tasks"])
+
+    elements = feed_in_chunks(scanner, ORCHESTRATOR_OUTPUT, chunk_size)
+
+    assert [(key, index) for key, index, _ in elements] == [
+        ("web_tasks", 0),
+        ("web_tasks", 1),
+        ("weather_tasks", 0),
+    ]
+    assert elements[0][2]["query"] == 'SpaceX Starship {latest} "launch" status'
+    assert elements[2][2] == {"location": "Boca Chica, Texas"}
+
+
+def test_scanner_emits_element_before_document_ends():
+    scanner = TaskArrayScanner(["web_tasks"])
+    partial = '{"should_search_web": true, "web_tasks": [{"query": "a b c"}, {"que'
+
+    assert scanner.feed(partial) == [("web_tasks", 0, {"query": "a b c"})]
+
+
+def test_scanner_ignores_untracked_and_nested_arrays():
+    scanner = TaskArrayScanner(["web_tasks"])
+    document = json.dumps(
+        {
+            "other_tasks": [{"query": "ignored"}],
+            "nested": {"web_tasks": [{"query": "also ignored"}]},
+            "web_tasks": [{"query": "kept", "tags": [{"x": 1}]}],
+        }
+    )
+
+    elements = scanner.feed(document)
+
+    assert elements == [("web_tasks", 0, {"query": "kept", "tags": [{"x": 1}]})]
+
+
+def fake_ddg_text_search(query, query_count=3, **kwargs):
+    sleep(0.2)
+    return f"web:{query}"
+
+
+def fake_get_bulk_weather_data(locations, forcast_days=0):
+    sleep(0.2)
+    return [f"weather:{location}" for location in locations]
+
+
+def test_streaming_orchestration_overlaps_tool_stage(mocker):
+    mocker.patch(
+        "chains.streaming_orchestrator.ddg_text_search", fake_ddg_text_search
+    )
+    mocker.patch(
+        "chains.streaming_orchestrator.get_bulk_weather_data",
+        fake_get_bulk_weather_data,
+    )
+    metrics = StepMetrics()
+
+    search_task, web_results, weather_results, _ = (
+        run_streaming_multi_search_orchestration(
+            FakeStreamingOrchestrator(ORCHESTRATOR_OUTPUT),
+            {"user_query": "", "chat_history": ""},
+            metrics=metrics,
+        )
+    )
+
+    assert len(search_task.web_tasks) == 2
+    assert web_results == [
+        'web:SpaceX Starship {latest} "launch" status',
+        "web:SpaceX Starship most recent test results",
+    ]
+    assert weather_results == ["weather:Boca Chica, Texas"]
+    # The first web task starts well before the orchestrator output ends
+    assert metrics.stats["tool_time_hidden"] > 0.1
+    assert metrics.stats["tool_time_total"] >= 0.6
+    assert "orchestration" in metrics.step_times
+    assert "tool_stage" in metrics.step_times
+
+
+def test_streaming_orchestration_drops_tasks_disabled_by_final_output(mocker):
+    mock_search = mocker.patch("chains.streaming_orchestrator.ddg_text_search")
+    mocker.patch(
+        "chains.streaming_orchestrator.get_bulk_weather_data",
+        fake_get_bulk_weather_data,
+    )
+    output = ORCHESTRATOR_OUTPUT.replace(
+        '"should_search_web": true', '"should_search_web": false'
+    )
+
+    _, web_results, weather_results, _ = run_streaming_multi_search_orchestration(
+        FakeStreamingOrchestrator(output, chunk_size=64, delay=0),
+        {"user_query": "", "chat_history": ""},
+        metrics=StepMetrics(),
+    )
+
+    assert web_results == []
+    assert weather_results == ["weather:Boca Chica, Texas"]
+    # The false flag streams before the web tasks, which never start
+    mock_search.assert_not_called()
+
+
+def test_scanner_collects_flags_and_closed_arrays():
+    scanner = TaskArrayScanner(["web_tasks", "weather_tasks"])
+
+    feed_in_chunks(scanner, ORCHESTRATOR_OUTPUT.split('"weather_tasks"')[0], 5)
+    assert scanner.flags == {"should_search_web": True, "should_search_weather": True}
+    assert scanner.closed_arrays == {"web_tasks"}
+
+    scanner.feed('"weather_tasks": []}')
+    assert scanner.closed_arrays == {"web_tasks", "weather_tasks"}
+
+
+def test_dispatcher_discards_stale_attempts():
+    metrics = StepMetrics()
+    with ToolStage(metrics) as stage:
+        dispatcher = StreamedTaskDispatcher(stage)
+        dispatcher.submit("web_search[0]", "old", lambda: sleep(0.1))
+        future = dispatcher.resolve("web_search[0]", "new", lambda: "new")
+        dispatcher.discard_unused()
+
+    assert future.result() == "new"
+    assert dispatcher.used_names == ["web_search[0]#2"]
+    # The stale attempt finished after being discarded and left no timings
+    assert set(metrics.task_times) == {"web_search[0]#2"}
+    assert set(stage.task_spans) == {"web_search[0]#2"}
@@ -0,0 +1,185 @@
+import asyncio
+from time import sleep, perf_counter
+
+import pytest
+
+from chains.metrics import StepMetrics
+from chains.tool_stage import (
+    ToolStage,
+    run_multi_search_task,
+    arun_multi_search_task,
+)
+from tasks.search import (
+    KnowledgeBaseSearchTask,
+    MultiSearchTask,
+    WebTextSearchTask,
+    WeatherSearchTask,
+)
+
+
+@pytest.fixture
+def multi_search_task():
+    return MultiSearchTask(
+        should_search_web=True,
+        web_tasks=[
+            WebTextSearchTask(query="slow query", query_count=3),
+            WebTextSearchTask(query="fast query", query_count=5),
+        ],
+        should_search_weather=True,
+        weather_tasks=[
+            WeatherSearchTask(location="Paris, France"),
+            WeatherSearchTask(location="Tokyo, Japan"),
+        ],
+    )
+
+
+def fake_ddg_text_search(query: str, query_count: int = 3, **kwargs) -> str:
+    sleep(0.2 if query == "slow query" else 0.05)
+    return f"web:{query}:{query_count}"
+
+
+def fake_get_bulk_weather_data(locations, forcast_days: int = 0) -> list:
+    sleep(0.1)
+    return [f"weather:{location}" for location in locations]
+
+
+def test_run_multi_search_task_keeps_task_order(mocker, multi_search_task):
+    mocker.patch("chains.tool_stage.ddg_text_search", fake_ddg_text_search)
+    mocker.patch(
+        "chains.tool_stage.get_bulk_weather_data", fake_get_bulk_weather_data
+    )
+
+    web_results, weather_results, _ = run_multi_search_task(
+        multi_search_task, metrics=StepMetrics()
+    )
+
+    assert web_results == ["web:slow query:3", "web:fast query:5"]
+    assert weather_results == ["weather:Paris, France", "weather:Tokyo, Japan"]
+
+
+def test_run_multi_search_task_runs_concurrently(mocker, multi_search_task):
+    mocker.patch("chains.tool_stage.ddg_text_search", fake_ddg_text_search)
+    mocker.patch(
+        "chains.tool_stage.get_bulk_weather_data", fake_get_bulk_weather_data
+    )
+    metrics = StepMetrics()
+
+    start = perf_counter()
+    run_multi_search_task(multi_search_task, metrics=metrics)
+    elapsed = perf_counter() - start
+
+    # Sequential execution would take 0.35s; concurrent is bounded by the slowest
+    assert elapsed < 0.3
+    # All weather locations share one bulk task
+    assert set(metrics.task_times) == {
+        "web_search[0]",
+        "web_search[1]",
+        "weather_search",
+    }
+    assert metrics.task_times["web_search[0]"] >= 0.2
+    # Task times overlap, so they are not part of the step total
+    assert metrics.get_total_time() == 0
+
+
+def test_run_multi_search_task_respects_concurrency_limit(mocker, multi_search_task):
+    mocker.patch("chains.tool_stage.ddg_text_search", fake_ddg_text_search)
+    mocker.patch(
+        "chains.tool_stage.get_bulk_weather_data", fake_get_bulk_weather_data
+    )
+
+    start = perf_counter()
+    run_multi_search_task(multi_search_task, metrics=StepMetrics(), max_concurrency=1)
+    elapsed = perf_counter() - start
+
+    assert elapsed >= 0.35
+
+
+def test_run_multi_search_task_skips_disabled_tools(mocker, multi_search_task):
+    mock_search = mocker.patch("chains.tool_stage.ddg_text_search")
+    mocker.patch(
+        "chains.tool_stage.get_bulk_weather_data", fake_get_bulk_weather_data
+    )
+    search_task = multi_search_task.model_copy(update={"should_search_web": False})
+
+    web_results, weather_results, _ = run_multi_search_task(
+        search_task, metrics=StepMetrics()
+    )
+
+    assert web_results == []
+    assert len(weather_results) == 2
+    mock_search.assert_not_called()
+
+
+def test_run_multi_search_task_batches_knowledge_base_queries(
+    mocker, multi_search_task
+):
+    mocker.patch("chains.tool_stage.ddg_text_search", fake_ddg_text_search)
+    mocker.patch(
+        "chains.tool_stage.get_bulk_weather_data", fake_get_bulk_weather_data
+    )
+    batches = []
+
+    def fake_search_knowledge_base(queries):
+        batches.append(queries)
+        sleep(0.1)
+        return [f"kb:{query}" for query in queries]
+
+    mocker.patch(
+        "chains.tool_stage.search_knowledge_base", fake_search_knowledge_base
+    )
+    search_task = multi_search_task.model_copy(
+        update={
+            "should_search_knowledge_base": True,
+            "knowledge_base_tasks": [
+                KnowledgeBaseSearchTask(query="alert thresholds"),
+                KnowledgeBaseSearchTask(query="error E1042"),
+            ],
+        }
+    )
+    metrics = StepMetrics()
+
+    start = perf_counter()
+    _, _, knowledge_base_results = run_multi_search_task(search_task, metrics=metrics)
+    elapsed = perf_counter() - start
+
+    assert knowledge_base_results == ["kb:alert thresholds", "kb:error E1042"]
+    # One retrieval batch, overlapping the web and weather tasks
+    assert batches == [["alert thresholds", "error E1042"]]
+    assert "knowledge_base_search" in metrics.task_times
+    assert elapsed < 0.3
+
+
+def test_tool_stage_rejects_invalid_concurrency():
+    with pytest.raises(ValueError):
+        ToolStage(StepMetrics(), max_concurrency=0)
+
+
+async def fake_addg_text_search(query: str, query_count: int = 3, **kwargs) -> str:
+    await asyncio.sleep(0.2 if query == "slow query" else 0.05)
+    return f"web:{query}:{query_count}"
+
+
+async def fake_aget_bulk_weather_data(locations, forcast_days: int = 0) -> list:
+    await asyncio.sleep(0.1)
+    return [f"weather:{location}" for location in locations]
+
+
+def test_arun_multi_search_task_keeps_order_and_runs_concurrently(
+    mocker, multi_search_task
+):
+    mocker.patch("chains.tool_stage.addg_text_search", fake_addg_text_search)
+    mocker.patch(
+        "chains.tool_stage.aget_bulk_weather_data", fake_aget_bulk_weather_data
+    )
+    metrics = StepMetrics()
+
+    start = perf_counter()
+    web_results, weather_results, _ = asyncio.run(
+        arun_multi_search_task(multi_search_task, metrics=metrics)
+    )
+    elapsed = perf_counter() - start
+
+    assert web_results == ["web:slow query:3", "web:fast query:5"]
+    assert weather_results == ["weather:Paris, France", "weather:Tokyo, Japan"]
+    assert elapsed < 0.3
+    assert len(metrics.task_times) == 3
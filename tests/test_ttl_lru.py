@@ -0,0 +1,129 @@
+import pytest
+
+from caches.ttl_lru import TTLLRUCache, SqliteCacheStore
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def test_cache_evicts_least_recently_used(clock):
+    cache = TTLLRUCache(max_size=2, clock=clock)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+    assert cache.stats.evictions == 1
+
+
+def test_cache_expires_entries_by_ttl(clock):
+    cache = TTLLRUCache(max_size=4, default_ttl=60, clock=clock)
+    cache.set("short", "value", ttl=10)
+    cache.set("default", "value")
+
+    clock.now += 30
+    assert cache.get("short") is None
+    assert cache.get("default") == "value"
+
+    clock.now += 31
+    assert cache.get("default") is None
+    assert cache.stats.expirations == 2
+
+
+def test_cache_tracks_hits_and_misses(clock):
+    cache = TTLLRUCache(max_size=4, clock=clock)
+    cache.set("key", "value")
+    cache.get("key")
+    cache.get("missing")
+
+    assert cache.stats.hits == 1
+    assert cache.stats.misses == 1
+    assert cache.stats.hit_rate == 0.5
+
+
+def test_cache_survives_restart_with_sqlite_store(tmp_path, clock):
+    path = str(tmp_path / "cache.sqlite")
+    cache = TTLLRUCache(store=SqliteCacheStore(path, "weather"), clock=clock)
+    cache.set(("london", 0), {"temp_c": 5.2}, ttl=60)
+
+    restarted = TTLLRUCache(store=SqliteCacheStore(path, "weather"), clock=clock)
+    assert restarted.get(("london", 0)) == {"temp_c": 5.2}
+
+    other_namespace = TTLLRUCache(store=SqliteCacheStore(path, "other"), clock=clock)
+    assert other_namespace.get(("london", 0)) is None
+
+    clock.now += 61
+    assert TTLLRUCache(store=SqliteCacheStore(path, "weather"), clock=clock).get(
+        ("london", 0)
+    ) is None
+
+
+def test_sqlite_store_encodes_and_decodes_values(tmp_path, clock):
+    path = str(tmp_path / "cache.sqlite")
+
+    def make_store():
+        return SqliteCacheStore(
+            path,
+            "weather",
+            encode=lambda value: value[0],
+            decode=lambda value: (value,),
+        )
+
+    TTLLRUCache(store=make_store(), clock=clock).set("key", ({"temp_c": 5.2},))
+
+    assert TTLLRUCache(store=make_store(), clock=clock).get("key") == (
+        {"temp_c": 5.2},
+    )
+
+
+def test_sqlite_store_purges_expired_rows_on_writes(tmp_path, clock):
+    store = SqliteCacheStore(
+        str(tmp_path / "cache.sqlite"), "weather", purge_interval=3, clock=clock
+    )
+    store.set("stale", 1, expires_at=clock.now + 10)
+    store.set("fresh", 2, expires_at=clock.now + 100)
+    clock.now += 50
+    assert len(store) == 2
+
+    store.set("new", 3, expires_at=None)
+
+    assert len(store) == 2
+    assert store.get("stale") is None
+    assert store.get("fresh") == (2, 1100.0)
+
+
+def test_sqlite_store_caps_rows_keeping_recent_writes(tmp_path, clock):
+    path = str(tmp_path / "cache.sqlite")
+    store = SqliteCacheStore(path, "weather", max_rows=3)
+    other = SqliteCacheStore(path, "other", max_rows=3)
+    other.set("kept", 0, expires_at=None)
+
+    for index in range(6):
+        store.set(f"key{index}", index, expires_at=None)
+    # Rewriting a key makes it the most recent write
+    store.set("key1", 1, expires_at=None)
+    store.purge()
+
+    assert len(store) == 3
+    assert [store.get(f"key{index}") is not None for index in range(6)] == [
+        False,
+        True,
+        False,
+        False,
+        True,
+        True,
+    ]
+    assert len(other) == 1
@@ -1,8 +1,24 @@
+import asyncio
 import json
 
+import httpx
 import pytest
 
-from tools.weather import get_weather_data
+import tools.weather
+from tools.weather import (
+    get_weather_data,
+    aget_weather_data,
+    get_bulk_weather_data,
+    aget_bulk_weather_data,
+    weather_cache,
+)
+
+
+@pytest.fixture(autouse=True)
+def clear_weather_cache():
+    weather_cache.clear()
+    yield
+    weather_cache.clear()
 
 
 @pytest.fixture
@@ -33,26 +49,44 @@ def forecast_response(weather_response):
 def test_get_forecast_weather_success(mocker, forecast_response):
     mock_response = mocker.Mock(status_code=200)
     mock_response.json.return_value = forecast_response
-    mock_get = mocker.patch("tools.weather.get", return_value=mock_response)
+    mock_client = mocker.patch("tools.weather.get_http_client").return_value
+    mock_client.get.return_value = mock_response
 
-    result = get_weather_data("London", 2)
+    result = get_weather_data("London", 2, projection="full")
     expected = json.dumps(forecast_response, indent=2)
 
     assert result == expected
-    assert "forecast.json" in mock_get.call_args[0][0]
-    assert "days=2" in mock_get.call_args[0][0]
+    assert "forecast.json" in mock_client.get.call_args[0][0]
+    assert mock_client.get.call_args.kwargs["params"]["days"] == 2
+    assert mock_client.get.call_args.kwargs["params"]["q"] == "London"
+
+
+def test_aget_forecast_weather_success(mocker, forecast_response):
+    mock_response = mocker.Mock(status_code=200)
+    mock_response.json.return_value = forecast_response
+    mock_client = mocker.AsyncMock()
+    mock_client.get.return_value = mock_response
+    mocker.patch("tools.weather.get_async_http_client", return_value=mock_client)
+
+    result = asyncio.run(aget_weather_data("London", 2, projection="full"))
+
+    assert result == json.dumps(forecast_response, indent=2)
+    assert "forecast.json" in mock_client.get.call_args[0][0]
+    assert mock_client.get.call_args.kwargs["params"]["days"] == 2
 
 
 def test_get_weather_invalid_location(mocker):
     mock_response = mocker.Mock(status_code=404)
-    mocker.patch("tools.weather.get", return_value=mock_response)
+    mock_client = mocker.patch("tools.weather.get_http_client").return_value
+    mock_client.get.return_value = mock_response
 
     result = get_weather_data("InvalidLocation")
     assert result == "Failed to fetch weather data from WeatherAPI."
 
 
 def test_get_weather_api_error(mocker):
-    mocker.patch("tools.weather.get", return_value=None)
+    mock_client = mocker.patch("tools.weather.get_http_client").return_value
+    mock_client.get.side_effect = httpx.ConnectTimeout("timed out")
 
     result = get_weather_data("London")
     assert result == "Failed to fetch weather data from WeatherAPI."
@@ -68,8 +102,243 @@ def test_normalize_forecast_days_limits(mocker):
         (-1, 0),  # Invalid negative days
     ]
 
-    mock_get = mocker.patch("tools.weather.get")
+    mock_client = mocker.patch("tools.weather.get_http_client").return_value
     for input_days, expected_days in test_cases:
         get_weather_data("London", input_days)
+        params = mock_client.get.call_args.kwargs["params"]
         if expected_days > 0:
-            assert "days=" + str(expected_days) in mock_get.call_args[0][0]
+            assert params["days"] == expected_days
+        else:
+            assert "days" not in params
+
+
+def test_get_weather_data_is_cached_by_normalized_location(mocker, weather_response):
+    mock_response = mocker.Mock(status_code=200)
+    mock_response.json.return_value = weather_response
+    mock_client = mocker.patch("tools.weather.get_http_client").return_value
+    mock_client.get.return_value = mock_response
+
+    first = get_weather_data("London")
+    second = get_weather_data("  london ")
+
+    assert first == second
+    assert mock_client.get.call_count == 1
+    assert weather_cache.stats.hits == 1
+    assert weather_cache.stats.misses == 1
+
+
+def test_get_weather_data_caches_forecast_days_separately(mocker, weather_response):
+    mock_response = mocker.Mock(status_code=200)
+    mock_response.json.return_value = weather_response
+    mock_client = mocker.patch("tools.weather.get_http_client").return_value
+    mock_client.get.return_value = mock_response
+
+    get_weather_data("London", 0)
+    get_weather_data("London", 2)
+    # Days above the maximum normalize to the same key as the maximum
+    get_weather_data("London", 3)
+    get_weather_data("London", 5)
+
+    assert mock_client.get.call_count == 3
+
+
+def test_get_weather_data_does_not_cache_failures(mocker):
+    mock_client = mocker.patch("tools.weather.get_http_client").return_value
+    mock_client.get.return_value = mocker.Mock(status_code=500)
+
+    get_weather_data("London")
+    get_weather_data("London")
+
+    assert mock_client.get.call_count == 2
+
+
+@pytest.fixture
+def full_forecast_response(weather_response):
+    start_epoch = 1739869200  # 2025-02-18 09:00 in London
+
+    def make_day(date, day_index):
+        return {
+            "date": date,
+            "day": {
+                "maxtemp_c": 9.0 + day_index,
+                "mintemp_c": 2.0,
+                "daily_chance_of_rain": 40,
+                "condition": {"text": "Patchy rain", "icon": "//cdn/icon.png"},
+            },
+            "astro": {"sunrise": "07:12 AM", "sunset": "05:20 PM", "moon_phase": "Full"},
+            "hour": [
+                {
+                    "time_epoch": start_epoch + (day_index * 24 + hour - 9) * 3600,
+                    "time": f"{date} {hour:02d}:00",
+                    "temp_c": 4.0 + hour / 4,
+                    "chance_of_rain": 10,
+                    "condition": {"text": "Cloudy", "icon": "//cdn/icon.png"},
+                    "dewpoint_c": 1.0,
+                    "heatindex_c": 4.0,
+                }
+                for hour in range(24)
+            ],
+        }
+
+    return {
+        "location": {
+            **weather_response["location"],
+            "localtime": "2025-02-18 09:30",
+            "localtime_epoch": start_epoch + 1800,
+        },
+        "current": {
+            **weather_response["current"],
+            "air_quality": {"us-epa-index": 2, "pm2_5": 8.1},
+        },
+        "forecast": {
+            "forecastday": [make_day("2025-02-18", 0), make_day("2025-02-19", 1)]
+        },
+        "alerts": {"alert": [{"headline": "Flood warning", "desc": "..."}]},
+    }
+
+
+def mock_weather_payload(mocker, payload):
+    mock_response = mocker.Mock(status_code=200)
+    mock_response.json.return_value = payload
+    mock_client = mocker.patch("tools.weather.get_http_client").return_value
+    mock_client.get.return_value = mock_response
+
+
+def test_get_weather_data_returns_compact_daily_report(mocker, full_forecast_response):
+    mock_weather_payload(mocker, full_forecast_response)
+
+    compact = get_weather_data("London", 2)
+    full = get_weather_data("London", 2, projection="full")
+    report = json.loads(compact)
+
+    assert report["location"] == "London, City of London, Greater London, United Kingdom"
+    assert report["current"] == {"condition": "Sunny", "temp_c": 5.2, "us_epa_index": 2}
+    assert [day["date"] for day in report["daily"]] == ["2025-02-18", "2025-02-19"]
+    assert report["daily"][0]["chance_of_rain"] == 40
+    assert report["daily"][0]["sunrise"] == "07:12 AM"
+    assert report["alerts"] == ["Flood warning"]
+    assert "hourly" not in report
+    assert len(compact) * 10 < len(full)
+
+
+def test_get_weather_data_projections(mocker, full_forecast_response):
+    mock_weather_payload(mocker, full_forecast_response)
+
+    current = json.loads(get_weather_data("London", 2, projection="current"))
+    hourly = json.loads(get_weather_data("London", 2, projection="hourly"))
+
+    assert "daily" not in current and "hourly" not in current
+    assert len(hourly["hourly"]) == 12
+    # Starts at the hour in progress and continues past midnight
+    assert hourly["hourly"][0]["time"] == "2025-02-18 09:00"
+    assert "time_epoch" not in hourly["hourly"][0]
+
+
+def test_cache_hits_reuse_the_parsed_report(mocker, full_forecast_response):
+    mock_weather_payload(mocker, full_forecast_response)
+    parse = mocker.spy(tools.weather, "parse_weather_payload")
+
+    first = get_weather_data("London", 2)
+    assert get_weather_data("London", 2) == first
+    get_weather_data("london", 2, projection="hourly")
+    get_weather_data("London", 2, projection="full")
+
+    assert parse.call_count == 1
+    assert weather_cache.stats.hits == 3
+
+
+def make_bulk_response(mocker, *locations):
+    mock_response = mocker.Mock(status_code=200)
+    mock_response.json.return_value = {
+        "bulk": [
+            {
+                "query": {
+                    "custom_id": str(index),
+                    "q": location,
+                    "location": {"name": location},
+                    "current": {"temp_c": 10.0 + index},
+                }
+            }
+            for index, location in enumerate(locations)
+        ]
+    }
+    return mock_response
+
+
+def test_get_bulk_weather_data_uses_one_request(mocker):
+    mocker.patch("tools.weather.bulk_weather_supported", True)
+    mock_client = mocker.patch("tools.weather.get_http_client").return_value
+    mock_client.post.return_value = make_bulk_response(mocker, "Paris", "Tokyo")
+
+    results = get_bulk_weather_data(["Paris", "Tokyo"], projection="full")
+
+    assert [json.loads(result)["location"]["name"] for result in results] == [
+        "Paris",
+        "Tokyo",
+    ]
+    assert mock_client.post.call_count == 1
+    mock_client.get.assert_not_called()
+    assert mock_client.post.call_args.kwargs["params"]["q"] == "bulk"
+    assert mock_client.post.call_args.kwargs["json"]["locations"] == [
+        {"q": "Paris", "custom_id": "0"},
+        {"q": "Tokyo", "custom_id": "1"},
+    ]
+
+    # Each location is cached on its own and served without a request
+    get_weather_data("Tokyo")
+    assert mock_client.get.call_count == 0
+
+
+def test_get_bulk_weather_data_only_requests_cache_misses(mocker, weather_response):
+    mocker.patch("tools.weather.bulk_weather_supported", True)
+    mock_client = mocker.patch("tools.weather.get_http_client").return_value
+    mock_response = mocker.Mock(status_code=200)
+    mock_response.json.return_value = weather_response
+    mock_client.get.return_value = mock_response
+    get_weather_data("London")
+
+    mock_client.post.return_value = make_bulk_response(mocker, "Paris", "Tokyo")
+    results = get_bulk_weather_data(["Paris", "London", "Tokyo"], projection="full")
+
+    assert json.loads(results[1]) == weather_response
+    requested = mock_client.post.call_args.kwargs["json"]["locations"]
+    assert [item["q"] for item in requested] == ["Paris", "Tokyo"]
+
+
+def test_get_bulk_weather_data_falls_back_without_bulk_access(
+    mocker, weather_response
+):
+    mocker.patch("tools.weather.bulk_weather_supported", True)
+    mock_client = mocker.patch("tools.weather.get_http_client").return_value
+    mock_client.post.return_value = mocker.Mock(status_code=403)
+    mock_response = mocker.Mock(status_code=200)
+    mock_response.json.return_value = weather_response
+    mock_client.get.return_value = mock_response
+
+    results = get_bulk_weather_data(["Paris", "Tokyo"], projection="full")
+
+    assert results == [json.dumps(weather_response, indent=2)] * 2
+    assert mock_client.get.call_count == 2
+    assert tools.weather.bulk_weather_supported is False
+
+    # Later batches skip the bulk endpoint entirely
+    get_bulk_weather_data(["Rome", "Oslo"])
+    assert mock_client.post.call_count == 1
+
+
+def test_aget_bulk_weather_data_uses_one_request(mocker):
+    mocker.patch("tools.weather.bulk_weather_supported", True)
+    mock_client = mocker.AsyncMock()
+    mock_client.post.return_value = make_bulk_response(mocker, "Paris", "Tokyo")
+    mocker.patch("tools.weather.get_async_http_client", return_value=mock_client)
+
+    results = asyncio.run(
+        aget_bulk_weather_data(["Paris", "Tokyo"], projection="full")
+    )
+
+    assert [json.loads(result)["current"]["temp_c"] for result in results] == [
+        10.0,
+        11.0,
+    ]
+    assert mock_client.post.call_count == 1
+    mock_client.get.assert_not_called()
@@ -0,0 +1,161 @@
+import asyncio
+import json
+import time
+from dataclasses import dataclass
+from math import exp
+from random import Random
+from typing import Callable, Dict, List
+from urllib.parse import quote
+
+
+@dataclass(frozen=True)
+class LatencyDistribution:
+    """Log-normal latency in seconds; `sigma` 0 makes it constant."""
+
+    median: float
+    sigma: float = 0.0
+
+    def sample(self, rng: Random) -> float:
+        if self.sigma <= 0:
+            return self.median
+        return self.median * exp(rng.gauss(0, self.sigma))
+
+
+class FakeSearchTools:
+    """
+    Offline stand-ins for the web search, weather and knowledge base tools.
+
+    Each call sleeps for a latency drawn from its distribution and returns
+    a canned result. Latencies are seeded by the seed and the call's query
+    or location, so a given workload has the same timings on every run, no
+    matter how the calls are scheduled across threads.
+    """
+
+    def __init__(
+        self,
+        web_latency: LatencyDistribution,
+        weather_latency: LatencyDistribution,
+        seed: int = 0,
+        knowledge_base_latency: LatencyDistribution = LatencyDistribution(0.0),
+    ) -> None:
+        self.web_latency: LatencyDistribution = web_latency
+        self.weather_latency: LatencyDistribution = weather_latency
+        self.seed: int = seed
+        self.knowledge_base_latency: LatencyDistribution = knowledge_base_latency
+
+    def sample_latency(self, distribution: LatencyDistribution, key: str) -> float:
+        return distribution.sample(Random(f"{self.seed}:{key}"))
+
+    def _web_results(self, query: str, query_count: int) -> str:
+        # Shaped like `ddg_text_search` output, so the context packer parses
+        # and ranks it as it would real results
+        return json.dumps(
+            {
+                "status": "success",
+                "query": query,
+                "results": [
+                    {
+                        "title": f"Result {index + 1} for {query}",
+                        "href": f"https://example.com/{quote(query)}/{index}",
+                        "body": f"Canned snippet about {query}.",
+                    }
+                    for index in range(query_count)
+                ],
+            },
+            indent=2,
+        )
+
+    def _weather_result(self, location: str) -> str:
+        return json.dumps({"location": {"name": location}, "current": {"temp_c": 20}})
+
+    def ddg_text_search(self, query: str, query_count: int = 3, **kwargs) -> str:
+        time.sleep(self.sample_latency(self.web_latency, f"web:{query}"))
+        return self._web_results(query, query_count)
+
+    async def addg_text_search(
+        self, query: str, query_count: int = 3, **kwargs
+    ) -> str:
+        await asyncio.sleep(self.sample_latency(self.web_latency, f"web:{query}"))
+        return self._web_results(query, query_count)
+
+    def get_weather_data(self, location: str, *args, **kwargs) -> str:
+        time.sleep(self.sample_latency(self.weather_latency, f"weather:{location}"))
+        return self._weather_result(location)
+
+    async def aget_weather_data(self, location: str, *args, **kwargs) -> str:
+        await asyncio.sleep(
+            self.sample_latency(self.weather_latency, f"weather:{location}")
+        )
+        return self._weather_result(location)
+
+    def bulk_weather_latency(self, locations: List[str]) -> float:
+        # One bulk request, as slow as its slowest location
+        return max(
+            (
+                self.sample_latency(self.weather_latency, f"weather:{location}")
+                for location in locations
+            ),
+            default=0.0,
+        )
+
+    def get_bulk_weather_data(
+        self, locations: List[str], *args, **kwargs
+    ) -> List[str]:
+        time.sleep(self.bulk_weather_latency(locations))
+        return [self._weather_result(location) for location in locations]
+
+    async def aget_bulk_weather_data(
+        self, locations: List[str], *args, **kwargs
+    ) -> List[str]:
+        await asyncio.sleep(self.bulk_weather_latency(locations))
+        return [self._weather_result(location) for location in locations]
+
+    def _knowledge_base_results(self, queries: List[str]) -> List[str]:
+        return [
+            json.dumps(
+                {
+                    "status": "success",
+                    "query": query,
+                    "results": [{"id": f"kb#{query}", "source": "", "text": query}],
+                }
+            )
+            for query in queries
+        ]
+
+    def knowledge_base_latency_for(self, queries: List[str]) -> float:
+        # One retrieval batch, so one embeddings call for all queries
+        return self.sample_latency(
+            self.knowledge_base_latency, "knowledge_base:" + "|".join(queries)
+        )
+
+    def search_knowledge_base(self, queries: List[str], *args, **kwargs) -> List[str]:
+        time.sleep(self.knowledge_base_latency_for(queries))
+        return self._knowledge_base_results(queries)
+
+    async def asearch_knowledge_base(
+        self, queries: List[str], *args, **kwargs
+    ) -> List[str]:
+        await asyncio.sleep(self.knowledge_base_latency_for(queries))
+        return self._knowledge_base_results(queries)
+
+    def get_patch_targets(self) -> Dict[str, Callable]:
+        """Map every tool import the chains use to its fake, for mock.patch."""
+        return {
+            "chains.web_search.ddg_text_search": self.ddg_text_search,
+            "chains.web_search.addg_text_search": self.addg_text_search,
+            "chains.web_search.get_weather_data": self.get_weather_data,
+            "chains.web_search.aget_weather_data": self.aget_weather_data,
+            "chains.tool_stage.ddg_text_search": self.ddg_text_search,
+            "chains.tool_stage.addg_text_search": self.addg_text_search,
+            "chains.tool_stage.get_bulk_weather_data": self.get_bulk_weather_data,
+            "chains.tool_stage.aget_bulk_weather_data": self.aget_bulk_weather_data,
+            "chains.tool_stage.search_knowledge_base": self.search_knowledge_base,
+            "chains.tool_stage.asearch_knowledge_base": self.asearch_knowledge_base,
+            "chains.streaming_orchestrator.ddg_text_search": self.ddg_text_search,
+            "chains.streaming_orchestrator.get_bulk_weather_data": (
+                self.get_bulk_weather_data
+            ),
+            "chains.streaming_orchestrator.search_knowledge_base": (
+                self.search_knowledge_base
+            ),
+        }
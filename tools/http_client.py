@@ -0,0 +1,54 @@
+from asyncio import AbstractEventLoop, get_running_loop
+from functools import cache
+from importlib.util import find_spec
+from weakref import WeakKeyDictionary
+
+from httpx import AsyncClient, Client, Limits, Timeout
+
+# Fail fast on unreachable hosts, but give slow APIs time to answer
+HTTP_TIMEOUT = Timeout(10.0, connect=3.0)
+# Keep idle connections around so repeat calls skip the TCP and TLS handshakes
+HTTP_LIMITS = Limits(
+    max_connections=20,
+    max_keepalive_connections=10,
+    keepalive_expiry=60.0,
+)
+
+_async_clients: "WeakKeyDictionary[AbstractEventLoop, AsyncClient]" = (
+    WeakKeyDictionary()
+)
+
+
+def is_http2_available() -> bool:
+    """HTTP/2 needs the optional `h2` package (`pip install httpx[http2]`)."""
+    return find_spec("h2") is not None
+
+
+@cache
+def get_http_client() -> Client:
+    """Process-wide pooled, keep-alive HTTP client shared by sync tools."""
+    return Client(
+        http2=is_http2_available(),
+        limits=HTTP_LIMITS,
+        timeout=HTTP_TIMEOUT,
+    )
+
+
+def get_async_http_client() -> AsyncClient:
+    """
+    Pooled, keep-alive async HTTP client for the running event loop.
+
+    Async connections are bound to the loop that opened them, so one client
+    is kept per event loop instead of one per process.
+    """
+    loop: AbstractEventLoop = get_running_loop()
+    client: AsyncClient | None = _async_clients.get(loop)
+    if client is None or client.is_closed:
+        client = AsyncClient(
+            http2=is_http2_available(),
+            limits=HTTP_LIMITS,
+            timeout=HTTP_TIMEOUT,
+        )
+        _async_clients[loop] = client
+    return client
+
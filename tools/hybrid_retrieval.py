@@ -0,0 +1,201 @@
+from dataclasses import dataclass, field
+from time import perf_counter
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from langchain_core.documents import Document
+from langchain_core.vectorstores import VectorStore
+
+from chains.metrics import (
+    RETRIEVAL_METRIC,
+    RETRIEVAL_REQUESTS_METRIC,
+    MetricsRegistry,
+    metrics_registry,
+)
+from tools.lexical_index import BM25Index, get_query_terms
+
+LEXICAL_PATH: str = "lexical"
+HYBRID_PATH: str = "hybrid"
+DENSE_PATH: str = "dense"
+
+# Rank constant from the original RRF paper; damps the weight of top ranks so
+# one ranking cannot dominate the fused order
+RRF_K: int = 60
+# Each ranking contributes this many candidates to the fusion
+DEFAULT_CANDIDATES: int = 20
+
+
+def get_document_key(document: Document) -> str:
+    return document.id or str(document.metadata.get("id") or document.page_content)
+
+
+def reciprocal_rank_fusion(
+    rankings: Sequence[Sequence[Document]], k: int = RRF_K
+) -> List[Document]:
+    """Merge rankings by summing 1 / (k + rank) for each document."""
+    scores: Dict[str, float] = {}
+    documents: Dict[str, Document] = {}
+    for ranking in rankings:
+        for rank, document in enumerate(ranking, start=1):
+            key: str = get_document_key(document)
+            scores[key] = scores.get(key, 0.0) + 1 / (k + rank)
+            documents.setdefault(key, document)
+    ordered = sorted(scores.items(), key=lambda item: -item[1])
+    return [documents[key] for key, _ in ordered]
+
+
+@dataclass(frozen=True)
+class LexicalFastPath:
+    """
+    When lexical results alone answer a query, skipping the embedding call.
+
+    The top document has to contain at least `min_coverage` of the query's
+    content terms and outscore the runner-up by `min_score_ratio`, which
+    holds for exact product names and error codes but not for common words
+    many documents share.
+    """
+
+    min_coverage: float = 0.75
+    min_score_ratio: float = 1.5
+
+    def accepts(
+        self, index: BM25Index, query: str, results: List[Tuple[str, float]]
+    ) -> bool:
+        if not results:
+            return False
+        top_id, top_score = results[0]
+        if index.get_coverage(top_id, get_query_terms(query)) < self.min_coverage:
+            return False
+        return len(results) == 1 or top_score >= self.min_score_ratio * results[1][1]
+
+
+@dataclass
+class RetrievalResult:
+    documents: List[Document]
+    path: str
+    stage_times: Dict[str, float] = field(default_factory=dict)
+
+
+class HybridRetriever:
+    """
+    Dense retrieval fused with BM25 through reciprocal rank fusion.
+
+    Without a lexical index this is plain dense retrieval. With one, the
+    lexical search runs first and answers on its own when the fast path
+    accepts it; otherwise the query is embedded and both rankings are
+    fused. Stage latencies are published per retrieval path.
+    """
+
+    def __init__(
+        self,
+        vector_store: VectorStore,
+        lexical_index: Optional[BM25Index] = None,
+        fast_path: Optional[LexicalFastPath] = LexicalFastPath(),
+        candidates: int = DEFAULT_CANDIDATES,
+        registry: MetricsRegistry = metrics_registry,
+    ) -> None:
+        self.vector_store: VectorStore = vector_store
+        self.lexical_index: Optional[BM25Index] = lexical_index
+        self.fast_path: Optional[LexicalFastPath] = fast_path
+        self.candidates: int = candidates
+        self.registry: MetricsRegistry = registry
+
+    def _publish(self, result: RetrievalResult) -> RetrievalResult:
+        for stage, duration in result.stage_times.items():
+            self.registry.observe(
+                RETRIEVAL_METRIC, duration, stage=stage, path=result.path
+            )
+        self.registry.increment(RETRIEVAL_REQUESTS_METRIC, path=result.path)
+        return result
+
+    def _search_lexical(
+        self,
+        query: str,
+        candidates: int,
+        filter: Optional[Dict[str, Any]],
+        stage_times: Dict[str, float],
+    ) -> Tuple[List[Document], bool]:
+        # Returns the lexical ranking and whether the fast path accepts it
+        if self.lexical_index is None:
+            return [], False
+        start: float = perf_counter()
+        lexical = self.lexical_index.search(query, k=candidates, filter=filter)
+        documents: List[Document] = [
+            self.lexical_index.get_document(id_) for id_, _ in lexical
+        ]
+        stage_times["lexical"] = perf_counter() - start
+        accepted: bool = self.fast_path is not None and self.fast_path.accepts(
+            self.lexical_index, query, lexical
+        )
+        return documents, accepted
+
+    def retrieve(
+        self,
+        query: str,
+        k: int = 4,
+        filter: Optional[Dict[str, Any]] = None,
+    ) -> RetrievalResult:
+        return self.retrieve_many([query], k=k, filter=filter)[0]
+
+    def retrieve_many(
+        self,
+        queries: Sequence[str],
+        k: int = 4,
+        filter: Optional[Dict[str, Any]] = None,
+    ) -> List[RetrievalResult]:
+        """
+        Retrieve for several queries, in query order.
+
+        Queries the fast path does not answer are embedded together in one
+        `embed_documents` call, so a batch costs a single embeddings round
+        trip. Each result's "embed" stage is the time of that shared call.
+        """
+        candidates: int = max(k, self.candidates)
+        results: List[Optional[RetrievalResult]] = [None] * len(queries)
+        pending: List[Tuple[int, List[Document], Dict[str, float]]] = []
+
+        for position, query in enumerate(queries):
+            stage_times: Dict[str, float] = {}
+            lexical_documents, accepted = self._search_lexical(
+                query, candidates, filter, stage_times
+            )
+            if accepted:
+                results[position] = RetrievalResult(
+                    lexical_documents[:k], LEXICAL_PATH, stage_times
+                )
+            else:
+                pending.append((position, lexical_documents, stage_times))
+
+        if pending:
+            start: float = perf_counter()
+            embeddings: List[List[float]] = (
+                self.vector_store.embeddings.embed_documents(
+                    [queries[position] for position, _, _ in pending]
+                )
+            )
+            embed_time: float = perf_counter() - start
+            for (position, lexical_documents, stage_times), embedding in zip(
+                pending, embeddings
+            ):
+                stage_times["embed"] = embed_time
+                start = perf_counter()
+                dense_documents: List[Document] = (
+                    self.vector_store.similarity_search_by_vector(
+                        embedding, k=candidates, filter=filter
+                    )
+                )
+                stage_times["dense"] = perf_counter() - start
+                if self.lexical_index is None:
+                    results[position] = RetrievalResult(
+                        dense_documents[:k], DENSE_PATH, stage_times
+                    )
+                    continue
+                start = perf_counter()
+                fused: List[Document] = reciprocal_rank_fusion(
+                    [lexical_documents, dense_documents]
+                )
+                stage_times["fusion"] = perf_counter() - start
+                results[position] = RetrievalResult(
+                    fused[:k], HYBRID_PATH, stage_times
+                )
+
+        return [self._publish(result) for result in results]
@@ -0,0 +1,57 @@
+import json
+from asyncio import to_thread
+from typing import Any, Dict, List
+
+from langchain_core.documents import Document
+
+from tools.vecterstore import get_relevant_docs_many
+
+# Chunks are a few hundred tokens each, so three per query keep the
+# summarizer context close to what a web search task adds
+KNOWLEDGE_BASE_RESULTS_PER_QUERY: int = 3
+
+
+def format_document(document: Document) -> Dict[str, Any]:
+    return {
+        "id": document.id,
+        "source": document.metadata.get("source", ""),
+        "text": " ".join(document.page_content.split()),
+    }
+
+
+def search_knowledge_base(
+    queries: List[str], k: int = KNOWLEDGE_BASE_RESULTS_PER_QUERY
+) -> List[str]:
+    """
+    Retrieve knowledge base chunks for every query, one JSON result each.
+
+    All queries share one retrieval batch, and so at most one embeddings
+    call. Results follow the `ddg_text_search` format, with a status and
+    the query, and failures are reported in the results instead of raised.
+    """
+    if not queries:
+        return []
+    try:
+        documents: List[List[Document]] = get_relevant_docs_many(queries, k=k)
+    except Exception as e:
+        return [
+            json.dumps({"status": "error", "message": str(e), "query": query})
+            for query in queries
+        ]
+    return [
+        json.dumps(
+            {
+                "status": "success",
+                "query": query,
+                "results": [format_document(document) for document in docs],
+            }
+        )
+        for query, docs in zip(queries, documents)
+    ]
+
+
+async def asearch_knowledge_base(
+    queries: List[str], k: int = KNOWLEDGE_BASE_RESULTS_PER_QUERY
+) -> List[str]:
+    # Retrieval is a blocking embeddings call plus local search
+    return await to_thread(search_knowledge_base, queries, k)
@@ -0,0 +1,195 @@
+import json
+import math
+import re
+from collections import Counter
+from pathlib import Path
+from threading import Lock
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from langchain_core.documents import Document
+
+from tools.local_vectorstore import matches_filter
+
+LEXICAL_DOCUMENTS_FILE: str = "lexical.jsonl"
+
+# Words, plus codes and names with inner dots or dashes ("E-1234", "gpt-4o")
+TOKEN_PATTERN = re.compile(r"\w+(?:[.\-]\w+)*")
+
+STOPWORDS: FrozenSet[str] = frozenset(
+    "a an and are as at be by can do does for from how i in is it of on or "
+    "the this to was what when where which who why with you your".split()
+)
+
+
+def fold_plural(term: str) -> str:
+    # Light stemming: "webhooks" -> "webhook", "retries"/"retried" -> "retry";
+    # codes and short words are left alone
+    if len(term) <= 3 or not term.isalpha():
+        return term
+    if term.endswith(("ies", "ied")):
+        return term[:-3] + "y"
+    if term.endswith("s") and not term.endswith(("ss", "us", "is")):
+        return term[:-1]
+    return term
+
+
+def tokenize(text: str) -> List[str]:
+    return [fold_plural(term) for term in TOKEN_PATTERN.findall(text.casefold())]
+
+
+def get_query_terms(query: str) -> List[str]:
+    # Distinct terms in query order; stopwords only when nothing else is left
+    terms: List[str] = list(dict.fromkeys(tokenize(query)))
+    content_terms: List[str] = [term for term in terms if term not in STOPWORDS]
+    return content_terms or terms
+
+
+class BM25Index:
+    """
+    In-memory inverted index ranking documents with Okapi BM25.
+
+    Only the posting lists of the query's terms are visited, so a search
+    costs time proportional to the number of matching documents, not the
+    corpus. Documents are added and replaced by id, and the index is saved
+    as JSONL and rebuilt on load.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75) -> None:
+        self.k1: float = k1
+        self.b: float = b
+        self._lock: Lock = Lock()
+        self._documents: Dict[str, Tuple[str, Dict[str, Any]]] = {}
+        self._term_counts: Dict[str, Counter] = {}
+        self._lengths: Dict[str, int] = {}
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._total_length: int = 0
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+    def _remove(self, id_: str) -> None:
+        term_counts: Optional[Counter] = self._term_counts.pop(id_, None)
+        if term_counts is None:
+            return
+        del self._documents[id_]
+        self._total_length -= self._lengths.pop(id_)
+        for term in term_counts:
+            postings: Dict[str, int] = self._postings[term]
+            del postings[id_]
+            if not postings:
+                del self._postings[term]
+
+    def add_documents(
+        self,
+        ids: List[str],
+        texts: List[str],
+        metadatas: Optional[List[Dict[str, Any]]] = None,
+    ) -> None:
+        metadatas = metadatas or [{} for _ in texts]
+        with self._lock:
+            for id_, text, metadata in zip(ids, texts, metadatas):
+                self._remove(id_)
+                term_counts: Counter = Counter(tokenize(text))
+                self._documents[id_] = (text, metadata)
+                self._term_counts[id_] = term_counts
+                self._lengths[id_] = sum(term_counts.values())
+                self._total_length += self._lengths[id_]
+                for term, count in term_counts.items():
+                    self._postings.setdefault(term, {})[id_] = count
+
+    def delete(self, ids: Iterable[str]) -> None:
+        with self._lock:
+            for id_ in ids:
+                self._remove(id_)
+
+    def get_document(self, id_: str) -> Document:
+        text, metadata = self._documents[id_]
+        return Document(id=id_, page_content=text, metadata=dict(metadata))
+
+    def get_coverage(self, id_: str, terms: List[str]) -> float:
+        """Share of `terms` that occur in the document."""
+        if not terms:
+            return 0.0
+        term_counts: Counter = self._term_counts.get(id_, Counter())
+        return sum(1 for term in terms if term in term_counts) / len(terms)
+
+    def search(
+        self,
+        query: str,
+        k: int = 4,
+        filter: Optional[Dict[str, Any]] = None,
+    ) -> List[Tuple[str, float]]:
+        """Top-k `(id, score)` pairs by BM25 score, best first."""
+        with self._lock:
+            document_count: int = len(self._documents)
+            if not document_count:
+                return []
+            average_length: float = self._total_length / document_count
+            scores: Dict[str, float] = {}
+            for term in get_query_terms(query):
+                postings: Dict[str, int] = self._postings.get(term, {})
+                if not postings:
+                    continue
+                idf: float = math.log(
+                    1 + (document_count - len(postings) + 0.5) / (len(postings) + 0.5)
+                )
+                for id_, count in postings.items():
+                    norm: float = self.k1 * (
+                        1 - self.b + self.b * self._lengths[id_] / average_length
+                    )
+                    scores[id_] = scores.get(id_, 0.0) + idf * count * (
+                        self.k1 + 1
+                    ) / (count + norm)
+            if filter:
+                scores = {
+                    id_: score
+                    for id_, score in scores.items()
+                    if matches_filter(self._documents[id_][1], filter)
+                }
+        return sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:k]
+
+    def save(self, directory: str | Path) -> None:
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            documents = list(self._documents.items())
+        with open(directory / LEXICAL_DOCUMENTS_FILE, "w", encoding="utf-8") as file:
+            for id_, (text, metadata) in documents:
+                file.write(
+                    json.dumps({"id": id_, "text": text, "metadata": metadata}) + "\n"
+                )
+
+    @classmethod
+    def load(cls, directory: str | Path) -> "BM25Index":
+        index = cls()
+        path: Path = Path(directory) / LEXICAL_DOCUMENTS_FILE
+        if not path.exists():
+            return index
+        ids: List[str] = []
+        texts: List[str] = []
+        metadatas: List[Dict[str, Any]] = []
+        with open(path, encoding="utf-8") as file:
+            for line in file:
+                record: Dict[str, Any] = json.loads(line)
+                ids.append(record["id"])
+                texts.append(record["text"])
+                metadatas.append(record["metadata"])
+        index.add_documents(ids, texts, metadatas)
+        return index
+
+    @classmethod
+    def from_metadatas(
+        cls, metadatas: Iterable[Dict[str, Any]], text_key: str = "text"
+    ) -> "BM25Index":
+        """Build from vector index metadata, which carries the chunk text."""
+        index = cls()
+        ids: List[str] = []
+        texts: List[str] = []
+        rest: List[Dict[str, Any]] = []
+        for metadata in metadatas:
+            metadata = dict(metadata)
+            ids.append(str(metadata.pop("id", len(ids))))
+            texts.append(metadata.pop(text_key, ""))
+            rest.append(metadata)
+        index.add_documents(ids, texts, rest)
+        return index
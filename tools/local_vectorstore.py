@@ -0,0 +1,493 @@
+import json
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from uuid import uuid4
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+# Rows scored per matrix product; bounds the temporary float32 copy an int8
+# index needs to about 64 MB at 1536 dimensions
+SEARCH_BLOCK_ROWS: int = 8192
+# Rows reserved by the first write; capacity then doubles as rows are added
+MIN_CAPACITY_ROWS: int = 1024
+
+VECTORS_FILE: str = "vectors.npy"
+SCALES_FILE: str = "scales.npy"
+DOCUMENTS_FILE: str = "documents.jsonl"
+
+# Pinecone metadata filter operators supported by the local index
+FILTER_OPERATORS: Dict[str, Callable[[np.ndarray, Any], np.ndarray]] = {
+    "$eq": lambda column, value: column == value,
+    "$ne": lambda column, value: column != value,
+    "$gt": lambda column, value: column > value,
+    "$gte": lambda column, value: column >= value,
+    "$lt": lambda column, value: column < value,
+    "$lte": lambda column, value: column <= value,
+    "$in": lambda column, value: np.isin(column, list(value)),
+    "$nin": lambda column, value: ~np.isin(column, list(value)),
+}
+
+
+def apply_operator(operator: str, column: np.ndarray, value: Any) -> np.ndarray:
+    compare = FILTER_OPERATORS[operator]
+    try:
+        return np.asarray(compare(column, value), dtype=bool)
+    except TypeError:
+        # Object columns mixing types, or with missing values: compare row by
+        # row, and a row whose value cannot be compared never matches
+        matches: np.ndarray = np.zeros(len(column), dtype=bool)
+        for row, item in enumerate(column):
+            try:
+                matches[row] = item is not None and bool(
+                    compare(np.array([item]), value)[0]
+                )
+            except TypeError:
+                pass
+        return matches
+
+
+def matches_filter(metadata: Dict[str, Any], filter: Optional[Dict[str, Any]]) -> bool:
+    """Evaluate a metadata filter against one document, like a mask row."""
+    for field, condition in (filter or {}).items():
+        if field == "$and":
+            if not all(matches_filter(metadata, sub) for sub in condition):
+                return False
+            continue
+        if field == "$or":
+            if not any(matches_filter(metadata, sub) for sub in condition):
+                return False
+            continue
+
+        value: Any = metadata.get(field)
+        if not isinstance(condition, dict):
+            condition = {"$eq": condition}
+        for operator, expected in condition.items():
+            if operator not in FILTER_OPERATORS:
+                raise ValueError(f"Unsupported filter operator: {operator}")
+            if not apply_operator(operator, np.array([value]), expected)[0]:
+                return False
+    return True
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms: np.ndarray = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, np.finfo(np.float32).tiny)
+
+
+def quantize_rows(vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Symmetric per-row int8 quantization; returns (int8 rows, row scales)."""
+    scales: np.ndarray = np.abs(vectors).max(axis=1) / 127
+    scales = np.maximum(scales, np.finfo(np.float32).tiny).astype(np.float32)
+    quantized: np.ndarray = np.round(vectors / scales[:, None]).astype(np.int8)
+    return quantized, scales
+
+
+class LocalVectorIndex:
+    """
+    In-memory cosine-similarity index over a NumPy matrix.
+
+    Rows are L2-normalized float32, or int8 with a per-row scale when
+    `quantize` is set, which cuts memory four times at a small recall cost.
+    Scoring is a blocked matrix product against a batch of queries, followed
+    by an exact top-k per query over the rows the filter keeps.
+    """
+
+    def __init__(
+        self,
+        vectors: np.ndarray,
+        metadatas: List[Dict[str, Any]],
+        scales: Optional[np.ndarray] = None,
+    ) -> None:
+        # `vectors` are stored as given: normalized float32 rows, or int8 rows
+        # with their `scales`; use `from_vectors` to build from raw embeddings
+        if len(vectors) != len(metadatas):
+            raise ValueError("Every vector needs exactly one metadata entry")
+        # Rows live at the start of possibly larger buffers; the given arrays
+        # (maybe read-only memory maps) are copied on the first write only
+        self._vector_buffer: np.ndarray = vectors
+        self._scale_buffer: Optional[np.ndarray] = scales
+        self._owns_buffers: bool = False
+        self.metadatas: List[Dict[str, Any]] = metadatas
+        self._columns: Dict[str, np.ndarray] = {}
+        self._rows_by_id: Optional[Dict[Any, int]] = None
+
+    @property
+    def vectors(self) -> np.ndarray:
+        return self._vector_buffer[: len(self)]
+
+    @property
+    def scales(self) -> Optional[np.ndarray]:
+        if self._scale_buffer is None:
+            return None
+        return self._scale_buffer[: len(self)]
+
+    @classmethod
+    def from_vectors(
+        cls,
+        vectors: np.ndarray,
+        metadatas: List[Dict[str, Any]],
+        quantize: bool = False,
+    ) -> "LocalVectorIndex":
+        normalized: np.ndarray = normalize_rows(vectors)
+        if quantize:
+            quantized, scales = quantize_rows(normalized)
+            return cls(quantized, metadatas, scales=scales)
+        return cls(normalized, metadatas)
+
+    def _reserve(self, row_count: int, like: "LocalVectorIndex") -> None:
+        # Amortized growth: buffers double, so n appended rows cost O(n)
+        # copies overall instead of a full copy of the index per write
+        if self._owns_buffers and len(self._vector_buffer) >= row_count:
+            return
+        source: "LocalVectorIndex" = self if len(self) else like
+        capacity: int = max(row_count, 2 * len(self), MIN_CAPACITY_ROWS)
+        vectors: np.ndarray = np.empty(
+            (capacity, source.vectors.shape[1]), dtype=source.vectors.dtype
+        )
+        scales: Optional[np.ndarray] = (
+            np.empty(capacity, dtype=np.float32) if source.quantized else None
+        )
+        if len(self):
+            vectors[: len(self)] = self.vectors
+            if scales is not None:
+                scales[: len(self)] = self.scales
+        self._vector_buffer, self._scale_buffer = vectors, scales
+        self._owns_buffers = True
+
+    def _get_rows_by_id(self) -> Dict[Any, int]:
+        if self._rows_by_id is None:
+            self._rows_by_id = {
+                metadata["id"]: row
+                for row, metadata in enumerate(self.metadatas)
+                if metadata.get("id") is not None
+            }
+        return self._rows_by_id
+
+    def upsert(self, other: "LocalVectorIndex") -> None:
+        """
+        Write the rows of `other` into this index in place.
+
+        Rows whose metadata `id` is already indexed are overwritten where
+        they are, the rest are appended. Within `other`, the last row with
+        a given id wins.
+        """
+        if len(other) == 0:
+            return
+        if len(self) and self.quantized != other.quantized:
+            raise ValueError("Cannot mix quantized and float32 indexes")
+
+        rows_by_id: Dict[Any, int] = self._get_rows_by_id()
+        overwrites: Dict[int, int] = {}
+        appended: List[int] = []
+        appended_by_id: Dict[Any, int] = {}
+        for source_row, metadata in enumerate(other.metadatas):
+            id_: Any = metadata.get("id")
+            if id_ in rows_by_id:
+                overwrites[rows_by_id[id_]] = source_row
+            elif id_ in appended_by_id:
+                appended[appended_by_id[id_]] = source_row
+            else:
+                if id_ is not None:
+                    appended_by_id[id_] = len(appended)
+                appended.append(source_row)
+
+        start: int = len(self)
+        self._reserve(start + len(appended), other)
+        for target_rows, source_rows in (
+            (list(overwrites), list(overwrites.values())),
+            (list(range(start, start + len(appended))), appended),
+        ):
+            if not source_rows:
+                continue
+            self._vector_buffer[target_rows] = other.vectors[source_rows]
+            if self._scale_buffer is not None:
+                self._scale_buffer[target_rows] = other.scales[source_rows]
+        for target_row, source_row in overwrites.items():
+            self.metadatas[target_row] = other.metadatas[source_row]
+        # Extended last, so concurrent readers never see rows before their data
+        self.metadatas.extend(other.metadatas[row] for row in appended)
+        for id_, position in appended_by_id.items():
+            rows_by_id[id_] = start + position
+        self._columns.clear()
+
+    def drop(self, ids: Iterable[str]) -> "LocalVectorIndex":
+        """Index without the rows whose metadata `id` is in `ids`."""
+        ids = list(ids)
+        if not ids or len(self) == 0:
+            return self
+        keep: np.ndarray = ~np.isin(self._get_column("id"), ids)
+        if keep.all():
+            return self
+        return LocalVectorIndex(
+            self.vectors[keep],
+            [metadata for metadata, kept in zip(self.metadatas, keep) if kept],
+            scales=self.scales[keep] if self.quantized else None,
+        )
+
+    @property
+    def quantized(self) -> bool:
+        return self.scales is not None
+
+    def __len__(self) -> int:
+        return len(self.metadatas)
+
+    def _get_column(self, field: str) -> np.ndarray:
+        # Metadata values of one field for every row, None where missing
+        column: Optional[np.ndarray] = self._columns.get(field)
+        if column is None:
+            values: List[Any] = [metadata.get(field) for metadata in self.metadatas]
+            if all(isinstance(value, (int, float)) for value in values):
+                column = np.asarray(values, dtype=np.float64)
+            else:
+                column = np.empty(len(values), dtype=object)
+                column[:] = values
+            self._columns[field] = column
+        return column
+
+    def build_filter_mask(self, filter: Optional[Dict[str, Any]]) -> np.ndarray:
+        """Evaluate a Pinecone-style metadata filter into a row mask."""
+        mask: np.ndarray = np.ones(len(self), dtype=bool)
+        for field, condition in (filter or {}).items():
+            if field == "$and":
+                for sub_filter in condition:
+                    mask &= self.build_filter_mask(sub_filter)
+                continue
+            if field == "$or":
+                any_mask = np.zeros(len(self), dtype=bool)
+                for sub_filter in condition:
+                    any_mask |= self.build_filter_mask(sub_filter)
+                mask &= any_mask
+                continue
+
+            column: np.ndarray = self._get_column(field)
+            if not isinstance(condition, dict):
+                condition = {"$eq": condition}
+            for operator, value in condition.items():
+                if operator not in FILTER_OPERATORS:
+                    raise ValueError(f"Unsupported filter operator: {operator}")
+                mask &= apply_operator(operator, column, value)
+        return mask
+
+    def _score_rows(self, rows: slice | np.ndarray, queries: np.ndarray) -> np.ndarray:
+        block: np.ndarray = self.vectors[rows]
+        if self.scales is None:
+            return block @ queries.T
+        return (block.astype(np.float32) @ queries.T) * self.scales[rows, None]
+
+    def search(
+        self,
+        queries: np.ndarray,
+        k: int = 4,
+        filter: Optional[Dict[str, Any]] = None,
+    ) -> List[List[Tuple[int, float]]]:
+        """Top-k `(row, score)` pairs for each row of `queries`, best first."""
+        queries = normalize_rows(np.atleast_2d(queries))
+        mask: np.ndarray = self.build_filter_mask(filter)
+        candidates: np.ndarray = np.flatnonzero(mask)
+        if len(candidates) == 0 or k < 1:
+            return [[] for _ in queries]
+
+        # Only rows passing the filter are scored; contiguous slices avoid a
+        # gather copy when nothing is filtered out
+        unfiltered: bool = len(candidates) == len(self)
+        scores: np.ndarray = np.empty((len(candidates), len(queries)), np.float32)
+        for start in range(0, len(candidates), SEARCH_BLOCK_ROWS):
+            end: int = min(start + SEARCH_BLOCK_ROWS, len(candidates))
+            rows = slice(start, end) if unfiltered else candidates[start:end]
+            scores[start:end] = self._score_rows(rows, queries)
+
+        k = min(k, len(candidates))
+        results: List[List[Tuple[int, float]]] = []
+        for column in scores.T:
+            top: np.ndarray = np.argpartition(-column, k - 1)[:k]
+            top = top[np.argsort(-column[top], kind="stable")]
+            results.append(
+                [(int(candidates[row]), float(column[row])) for row in top]
+            )
+        return results
+
+    def save(self, directory: str | Path) -> None:
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        np.save(directory / VECTORS_FILE, self.vectors)
+        if self.scales is not None:
+            np.save(directory / SCALES_FILE, self.scales)
+        elif (directory / SCALES_FILE).exists():
+            (directory / SCALES_FILE).unlink()
+        with open(directory / DOCUMENTS_FILE, "w", encoding="utf-8") as file:
+            for metadata in self.metadatas:
+                file.write(json.dumps(metadata) + "\n")
+
+    @classmethod
+    def load(cls, directory: str | Path, mmap: bool = True) -> "LocalVectorIndex":
+        """Load a saved index; with `mmap` the vectors stay on disk until read."""
+        directory = Path(directory)
+        mmap_mode: Optional[str] = "r" if mmap else None
+        vectors: np.ndarray = np.load(directory / VECTORS_FILE, mmap_mode=mmap_mode)
+        scales: Optional[np.ndarray] = None
+        if (directory / SCALES_FILE).exists():
+            scales = np.load(directory / SCALES_FILE)
+        with open(directory / DOCUMENTS_FILE, encoding="utf-8") as file:
+            metadatas: List[Dict[str, Any]] = [json.loads(line) for line in file]
+        return cls(vectors, metadatas, scales=scales)
+
+
+class LocalVectorStore(VectorStore):
+    """
+    LangChain vector store over a LocalVectorIndex.
+
+    A drop-in for PineconeVectorStore in `get_relevant_docs`: same
+    `similarity_search` signature and the same metadata filter syntax.
+    Page content is kept in the index metadata under `text`, as the
+    Pinecone integration does.
+    """
+
+    TEXT_KEY: str = "text"
+
+    def __init__(
+        self,
+        embedding: Embeddings,
+        index: Optional[LocalVectorIndex] = None,
+        quantize: bool = False,
+    ) -> None:
+        self._embedding: Embeddings = embedding
+        if index is None:
+            index = LocalVectorIndex(np.empty((0, 0), dtype=np.float32), [])
+        elif len(index):
+            # New rows must match the storage of the rows already indexed
+            quantize = index.quantized
+        self.index: LocalVectorIndex = index
+        self.quantize: bool = quantize
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self._embedding
+
+    def _to_document(self, row: int) -> Document:
+        metadata: Dict[str, Any] = dict(self.index.metadatas[row])
+        page_content: str = metadata.pop(self.TEXT_KEY, "")
+        return Document(
+            id=metadata.pop("id", None), page_content=page_content, metadata=metadata
+        )
+
+    def add_texts(
+        self,
+        texts: Iterable[str],
+        metadatas: Optional[List[dict]] = None,
+        *,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        texts = list(texts)
+        return self.add_embeddings(
+            texts,
+            self._embedding.embed_documents(texts),
+            metadatas,
+            ids=ids,
+        )
+
+    def add_embeddings(
+        self,
+        texts: List[str],
+        embeddings: List[List[float]],
+        metadatas: Optional[List[dict]] = None,
+        *,
+        ids: Optional[List[str]] = None,
+    ) -> List[str]:
+        """
+        Add precomputed vectors; rows with an existing id are replaced in
+        place, and within one call the last row with a given id wins.
+        """
+        metadatas = metadatas or [{} for _ in texts]
+        ids = ids or [str(uuid4()) for _ in texts]
+        self.index.upsert(
+            LocalVectorIndex.from_vectors(
+                np.asarray(embeddings, np.float32),
+                [
+                    {**metadata, self.TEXT_KEY: text, "id": id_}
+                    for text, metadata, id_ in zip(texts, metadatas, ids)
+                ],
+                quantize=self.quantize,
+            )
+        )
+        return ids
+
+    def delete(self, ids: Optional[List[str]] = None, **kwargs: Any) -> bool:
+        if ids is None:
+            raise ValueError("Deleting from a local index requires ids")
+        self.index = self.index.drop(ids)
+        return True
+
+    def similarity_search_by_vector_with_scores(
+        self,
+        embedding: List[float],
+        k: int = 4,
+        filter: Optional[Dict[str, Any]] = None,
+    ) -> List[Tuple[Document, float]]:
+        matches = self.index.search(np.asarray(embedding), k=k, filter=filter)[0]
+        return [(self._to_document(row), score) for row, score in matches]
+
+    def similarity_search_by_vector(
+        self,
+        embedding: List[float],
+        k: int = 4,
+        filter: Optional[Dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> List[Document]:
+        return [
+            document
+            for document, _ in self.similarity_search_by_vector_with_scores(
+                embedding, k=k, filter=filter
+            )
+        ]
+
+    def similarity_search_with_score(
+        self,
+        query: str,
+        k: int = 4,
+        filter: Optional[Dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> List[Tuple[Document, float]]:
+        return self.similarity_search_by_vector_with_scores(
+            self._embedding.embed_query(query), k=k, filter=filter
+        )
+
+    def similarity_search(
+        self,
+        query: str,
+        k: int = 4,
+        filter: Optional[Dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> List[Document]:
+        return [
+            document
+            for document, _ in self.similarity_search_with_score(query, k, filter)
+        ]
+
+    @classmethod
+    def from_texts(
+        cls,
+        texts: List[str],
+        embedding: Embeddings,
+        metadatas: Optional[List[dict]] = None,
+        *,
+        ids: Optional[List[str]] = None,
+        quantize: bool = False,
+        **kwargs: Any,
+    ) -> "LocalVectorStore":
+        store = cls(embedding, quantize=quantize)
+        store.add_texts(texts, metadatas, ids=ids)
+        return store
+
+    def save(self, directory: str | Path) -> None:
+        self.index.save(directory)
+
+    @classmethod
+    def load(
+        cls, directory: str | Path, embedding: Embeddings, mmap: bool = True
+    ) -> "LocalVectorStore":
+        return cls(embedding, LocalVectorIndex.load(directory, mmap=mmap))
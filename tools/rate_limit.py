@@ -0,0 +1,47 @@
+from threading import Lock
+from time import monotonic, sleep
+from typing import Callable
+
+
+class RateLimiter:
+    """
+    Thread-safe token bucket limiting calls to an upstream service.
+
+    Allows bursts of up to `burst` calls, refilled at `rate` calls per
+    second. `acquire` blocks until a token is available.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: int = 1,
+        clock: Callable[[], float] = monotonic,
+        sleeper: Callable[[float], None] = sleep,
+    ) -> None:
+        if rate <= 0 or burst < 1:
+            raise ValueError("rate must be positive and burst at least 1")
+        self.rate: float = rate
+        self.burst: int = burst
+        self._clock: Callable[[], float] = clock
+        self._sleep: Callable[[float], None] = sleeper
+        self._tokens: float = float(burst)
+        self._updated_at: float = clock()
+        self._lock: Lock = Lock()
+
+    def _reserve(self) -> float:
+        """Take a token and return how long the caller must wait for it."""
+        with self._lock:
+            now: float = self._clock()
+            self._tokens = min(
+                self.burst, self._tokens + (now - self._updated_at) * self.rate
+            )
+            self._updated_at = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def acquire(self) -> None:
+        wait: float = self._reserve()
+        if wait > 0:
+            self._sleep(wait)
@@ -1,26 +1,81 @@
 from datetime import datetime
-from typing import List
+from functools import cache
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
 
 from langchain_core.documents import Document
-from langchain_pinecone import PineconeVectorStore
-from pinecone import Pinecone
+from langchain_core.vectorstores import VectorStore
 
-from llms.openai import openai_embeddings
-from config.envs import PINECONE_API_KEY, PINECONE_INDEX_NAME
+from llms.openai import get_openai_embeddings
+from config.envs import get_env, get_optional_env
 
-pc = Pinecone(api_key=PINECONE_API_KEY)
-pc_index = pc.Index(name=PINECONE_INDEX_NAME)
-pc_vector_store = PineconeVectorStore(index=pc_index, embedding=openai_embeddings)
+if TYPE_CHECKING:
+    from tools.hybrid_retrieval import HybridRetriever
+    from tools.lexical_index import BM25Index
 
+PINECONE_BACKEND: str = "pinecone"
+LOCAL_BACKEND: str = "local"
 
-def get_relevant_docs(query: str, k: int = 1) -> List[Document]:
+
+@cache
+def get_vector_store() -> VectorStore:
+    backend: str = get_optional_env("VECTOR_STORE_BACKEND") or PINECONE_BACKEND
+    if backend == LOCAL_BACKEND:
+        # Keeps NumPy out of the import path of Pinecone deployments
+        from tools.local_vectorstore import LocalVectorStore
+
+        return LocalVectorStore.load(
+            get_env("LOCAL_VECTOR_INDEX_PATH"), embedding=get_openai_embeddings()
+        )
+    if backend != PINECONE_BACKEND:
+        raise ValueError(f"Unknown VECTOR_STORE_BACKEND: {backend}")
+
+    # Connecting to Pinecone is a network round trip, so it happens on the
+    # first query rather than at import time
+    from langchain_pinecone import PineconeVectorStore
+    from pinecone import Pinecone
+
+    pc = Pinecone(api_key=get_env("PINECONE_API_KEY"))
+    pc_index = pc.Index(name=get_env("PINECONE_INDEX_NAME"))
+    return PineconeVectorStore(index=pc_index, embedding=get_openai_embeddings())
+
+
+@cache
+def get_lexical_index() -> Optional["BM25Index"]:
+    # A saved index when configured; the local backend can also build one
+    # from its own metadata, which carries the chunk text
+    from tools.lexical_index import BM25Index
+
+    path: Optional[str] = get_optional_env("LEXICAL_INDEX_PATH")
+    if path:
+        return BM25Index.load(path)
+    if get_optional_env("VECTOR_STORE_BACKEND") == LOCAL_BACKEND:
+        return BM25Index.from_metadatas(get_vector_store().index.metadatas)
+    return None
+
+
+@cache
+def get_retriever() -> "HybridRetriever":
+    from tools.hybrid_retrieval import HybridRetriever
+
+    return HybridRetriever(get_vector_store(), get_lexical_index())
+
+
+def get_recency_filter() -> Dict[str, Any]:
     current_year: int = datetime.now().year
-    docs: List[Document] = pc_vector_store.similarity_search(
-        query=query,
-        k=k,
-        filter={
-            # Retrieve only data from the past year.
-            "lastmod_year": {"$gte": current_year - 1}
-        },
-    )
-    return docs
+    # Retrieve only data from the past year.
+    return {"lastmod_year": {"$gte": current_year - 1}}
+
+
+def get_relevant_docs(query: str, k: int = 1) -> List[Document]:
+    return get_retriever().retrieve(query, k=k, filter=get_recency_filter()).documents
+
+
+def get_relevant_docs_many(queries: List[str], k: int = 1) -> List[List[Document]]:
+    results = get_retriever().retrieve_many(queries, k=k, filter=get_recency_filter())
+    return [result.documents for result in results]
+
+
+def __getattr__(name: str):
+    if name == "pc_vector_store":
+        return get_vector_store()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,11 +1,80 @@
 import json
-from typing import Optional
+from asyncio import gather
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
 
-from httpx import get, Response
+from httpx import HTTPError, Response
 from langchain_core.tools import BaseTool
 from pydantic import BaseModel, Field
 
-from config.envs import WEATHERAPI_API_KEY
+from caches.ttl_lru import TTLLRUCache, SqliteCacheStore
+from config.envs import WEATHER_CACHE_PATH, get_env
+from tools.http_client import get_http_client, get_async_http_client
+from tools.weather_report import (
+    WeatherProjection,
+    WeatherReport,
+    format_weather_report,
+    parse_weather_payload,
+    project_weather_report,
+)
+
+WEATHERAPI_BASE_URL: str = "https://api.weatherapi.com/v1"
+
+# WeatherAPI refreshes current conditions every 15 minutes and forecasts
+# roughly hourly, so shorter TTLs would only add upstream calls
+CURRENT_WEATHER_TTL: float = 10 * 60
+FORECAST_WEATHER_TTL: float = 60 * 60
+WEATHER_CACHE_MAX_SIZE: int = 512
+
+# WeatherAPI answers bulk requests from keys without bulk access with these
+BULK_UNSUPPORTED_STATUS_CODES: Tuple[int, ...] = (401, 403)
+bulk_weather_supported: bool = True
+
+
+@dataclass
+class CachedWeather:
+    """
+    A WeatherAPI payload as cached, with its parsed report and rendered
+    projections kept alongside so cache hits skip validation and formatting.
+    """
+
+    payload: Dict[str, Any]
+    report: Optional[WeatherReport] = None
+    rendered: Dict[WeatherProjection, str] = field(default_factory=dict)
+
+    def get_report(self) -> WeatherReport:
+        if self.report is None:
+            self.report = parse_weather_payload(self.payload)
+        return self.report
+
+    def format(self, projection: WeatherProjection) -> str:
+        rendered: Optional[str] = self.rendered.get(projection)
+        if rendered is None:
+            if projection == WeatherProjection.FULL:
+                rendered = json.dumps(self.payload, indent=2)
+            else:
+                rendered = format_weather_report(
+                    project_weather_report(self.get_report(), projection)
+                )
+            self.rendered[projection] = rendered
+        return rendered
+
+
+# Only the raw payload goes to disk; it is parsed again once per process
+weather_cache = TTLLRUCache(
+    max_size=WEATHER_CACHE_MAX_SIZE,
+    store=(
+        SqliteCacheStore(
+            WEATHER_CACHE_PATH,
+            namespace="weather",
+            encode=lambda weather: weather.payload,
+            decode=CachedWeather,
+        )
+        if WEATHER_CACHE_PATH
+        else None
+    ),
+)
 
 
 def normalize_forcast_days(forcast_days: int, max_days: int = 3) -> int:
@@ -17,37 +86,289 @@ def normalize_forcast_days(forcast_days: int, max_days: int = 3) -> int:
     return 0
 
 
-def get_weather_data(location: str, forcast_days: int = 0) -> str:
+def normalize_location(location: str) -> str:
+    return " ".join(location.casefold().split())
+
+
+def get_weather_cache_key(location: str, forcast_days: int = 0) -> Tuple[str, int]:
+    return normalize_location(location), normalize_forcast_days(forcast_days)
+
+
+def cache_weather(
+    location: str, forcast_days: int, payload: Dict[str, Any]
+) -> CachedWeather:
+    weather: CachedWeather = CachedWeather(payload)
+    cache_key: Tuple[str, int] = get_weather_cache_key(location, forcast_days)
+    ttl: float = CURRENT_WEATHER_TTL if cache_key[1] == 0 else FORECAST_WEATHER_TTL
+    weather_cache.set(cache_key, weather, ttl=ttl)
+    return weather
+
+
+def build_weather_request(
+    location: str, forcast_days: int = 0
+) -> Tuple[str, Dict[str, str | int]]:
     normalized_forcast_days: int = normalize_forcast_days(forcast_days)
 
-    current_endpoint: str = (
-        f"https://api.weatherapi.com/v1/current.json?key={WEATHERAPI_API_KEY}"
+    # httpx encodes the params, so locations like "São Paulo" or "40.7,-74.0"
+    # reach the API intact
+    params: Dict[str, str | int] = {
+        "key": get_env("WEATHERAPI_API_KEY"),
+        "q": location,
+        "aqi": "yes",
+    }
+    if normalized_forcast_days > 0:
+        params["days"] = normalized_forcast_days
+        params["alerts"] = "yes"
+        return f"{WEATHERAPI_BASE_URL}/forecast.json", params
+
+    return f"{WEATHERAPI_BASE_URL}/current.json", params
+
+
+def parse_weather_response(response: Response | None) -> Optional[Dict[str, Any]]:
+    if response and response.status_code == 200:
+        return response.json()
+    return None
+
+
+def format_weather(
+    weather: Optional[CachedWeather],
+    projection: WeatherProjection | str = WeatherProjection.DAILY,
+) -> str:
+    if weather is None:
+        return "Failed to fetch weather data from WeatherAPI."
+    return weather.format(WeatherProjection(projection))
+
+
+def request_weather(
+    location: str, forcast_days: int = 0
+) -> Optional[CachedWeather]:
+    endpoint, params = build_weather_request(location, forcast_days)
+    try:
+        response: Response | None = get_http_client().get(endpoint, params=params)
+    except HTTPError:
+        response = None
+
+    payload: Optional[Dict[str, Any]] = parse_weather_response(response)
+    if payload is None:
+        return None
+    return cache_weather(location, forcast_days, payload)
+
+
+def fetch_weather(
+    location: str, forcast_days: int = 0
+) -> Optional[CachedWeather]:
+    weather: Optional[CachedWeather] = weather_cache.get(
+        get_weather_cache_key(location, forcast_days)
     )
-    forcast_endpoint: str = (
-        f"https://api.weatherapi.com/v1/forecast.json?key={WEATHERAPI_API_KEY}"
+    if weather is not None:
+        return weather
+    return request_weather(location, forcast_days)
+
+
+async def arequest_weather(
+    location: str, forcast_days: int = 0
+) -> Optional[CachedWeather]:
+    endpoint, params = build_weather_request(location, forcast_days)
+    try:
+        response: Response | None = await get_async_http_client().get(
+            endpoint, params=params
+        )
+    except HTTPError:
+        response = None
+
+    payload: Optional[Dict[str, Any]] = parse_weather_response(response)
+    if payload is None:
+        return None
+    return cache_weather(location, forcast_days, payload)
+
+
+async def afetch_weather(
+    location: str, forcast_days: int = 0
+) -> Optional[CachedWeather]:
+    weather: Optional[CachedWeather] = weather_cache.get(
+        get_weather_cache_key(location, forcast_days)
     )
+    if weather is not None:
+        return weather
+    return await arequest_weather(location, forcast_days)
 
-    location_param: str = f"&q={location}"
-    forcast_days_param: str = f"&days={normalized_forcast_days}"
-    air_quality_param: str = "&aqi=yes"
-    alerts_param: str = "&alerts=yes"
 
-    response: Response | None = None
-    if normalized_forcast_days > 0:
-        response = get(
-            forcast_endpoint
-            + location_param
-            + forcast_days_param
-            + air_quality_param
-            + alerts_param
+def build_bulk_weather_request(
+    locations: List[str], forcast_days: int = 0
+) -> Tuple[str, Dict[str, str | int], Dict[str, Any]]:
+    endpoint, params = build_weather_request("bulk", forcast_days)
+    # Each location is tagged with its position to split the response back
+    body: Dict[str, Any] = {
+        "locations": [
+            {"q": location, "custom_id": str(index)}
+            for index, location in enumerate(locations)
+        ]
+    }
+    return endpoint, params, body
+
+
+def split_bulk_weather_response(
+    response: Response | None, location_count: int
+) -> List[Optional[Dict[str, Any]]]:
+    global bulk_weather_supported
+
+    payloads: List[Optional[Dict[str, Any]]] = [None] * location_count
+    if response is None:
+        return payloads
+    if response.status_code in BULK_UNSUPPORTED_STATUS_CODES:
+        # Bulk requests need a paid WeatherAPI plan; stop trying on this key
+        bulk_weather_supported = False
+        return payloads
+    if response.status_code != 200:
+        return payloads
+
+    try:
+        bulk_items: List[Dict[str, Any]] = response.json().get("bulk") or []
+    except ValueError:
+        return payloads
+    for item in bulk_items:
+        query: Dict[str, Any] = item.get("query") or {}
+        custom_id: str = str(query.get("custom_id", ""))
+        if not custom_id.isdigit() or int(custom_id) >= location_count:
+            continue
+        if query.get("location") and not query.get("error"):
+            payloads[int(custom_id)] = {
+                key: value
+                for key, value in query.items()
+                if key not in ("custom_id", "q")
+            }
+    return payloads
+
+
+def fetch_bulk_weather(
+    locations: List[str], forcast_days: int = 0
+) -> List[Optional[CachedWeather]]:
+    """
+    Fetch weather for several locations with as few requests as possible.
+
+    Cached locations are served from the cache, the rest are requested in
+    one WeatherAPI bulk request. Locations the bulk request did not answer
+    fall back to individual requests, made concurrently.
+    """
+    weathers: List[Optional[CachedWeather]] = [
+        weather_cache.get(get_weather_cache_key(location, forcast_days))
+        for location in locations
+    ]
+    missing: List[int] = [
+        index for index, weather in enumerate(weathers) if weather is None
+    ]
+
+    if len(missing) > 1 and bulk_weather_supported:
+        endpoint, params, body = build_bulk_weather_request(
+            [locations[index] for index in missing], forcast_days
         )
-    else:
-        response = get(current_endpoint + location_param + air_quality_param)
+        try:
+            response: Response | None = get_http_client().post(
+                endpoint, params=params, json=body
+            )
+        except HTTPError:
+            response = None
+        bulk_payloads = split_bulk_weather_response(response, len(missing))
+        for index, payload in zip(missing, bulk_payloads):
+            if payload is not None:
+                weathers[index] = cache_weather(
+                    locations[index], forcast_days, payload
+                )
+
+    fallback: List[int] = [index for index in missing if weathers[index] is None]
+    if len(fallback) == 1:
+        weathers[fallback[0]] = request_weather(locations[fallback[0]], forcast_days)
+    elif fallback:
+        with ThreadPoolExecutor(max_workers=len(fallback)) as executor:
+            fallback_weathers = executor.map(
+                lambda index: request_weather(locations[index], forcast_days),
+                fallback,
+            )
+            for index, weather in zip(fallback, fallback_weathers):
+                weathers[index] = weather
+    return weathers
 
-    if response and response.status_code == 200:
-        return json.dumps(response.json(), indent=2)
 
-    return "Failed to fetch weather data from WeatherAPI."
+async def afetch_bulk_weather(
+    locations: List[str], forcast_days: int = 0
+) -> List[Optional[CachedWeather]]:
+    weathers: List[Optional[CachedWeather]] = [
+        weather_cache.get(get_weather_cache_key(location, forcast_days))
+        for location in locations
+    ]
+    missing: List[int] = [
+        index for index, weather in enumerate(weathers) if weather is None
+    ]
+
+    if len(missing) > 1 and bulk_weather_supported:
+        endpoint, params, body = build_bulk_weather_request(
+            [locations[index] for index in missing], forcast_days
+        )
+        try:
+            response: Response | None = await get_async_http_client().post(
+                endpoint, params=params, json=body
+            )
+        except HTTPError:
+            response = None
+        bulk_payloads = split_bulk_weather_response(response, len(missing))
+        for index, payload in zip(missing, bulk_payloads):
+            if payload is not None:
+                weathers[index] = cache_weather(
+                    locations[index], forcast_days, payload
+                )
+
+    fallback: List[int] = [index for index in missing if weathers[index] is None]
+    fallback_weathers = await gather(
+        *(arequest_weather(locations[index], forcast_days) for index in fallback)
+    )
+    for index, weather in zip(fallback, fallback_weathers):
+        weathers[index] = weather
+    return weathers
+
+
+def get_weather_data(
+    location: str,
+    forcast_days: int = 0,
+    projection: WeatherProjection | str = WeatherProjection.DAILY,
+) -> str:
+    """
+    Fetch weather for a location as JSON text.
+
+    Returns a compact `WeatherReport` by default; pass
+    `projection="full"` for the raw WeatherAPI payload.
+    """
+    return format_weather(fetch_weather(location, forcast_days), projection)
+
+
+async def aget_weather_data(
+    location: str,
+    forcast_days: int = 0,
+    projection: WeatherProjection | str = WeatherProjection.DAILY,
+) -> str:
+    return format_weather(await afetch_weather(location, forcast_days), projection)
+
+
+def get_bulk_weather_data(
+    locations: List[str],
+    forcast_days: int = 0,
+    projection: WeatherProjection | str = WeatherProjection.DAILY,
+) -> List[str]:
+    """Batch variant of `get_weather_data`, one result per location in order."""
+    return [
+        format_weather(weather, projection)
+        for weather in fetch_bulk_weather(locations, forcast_days)
+    ]
+
+
+async def aget_bulk_weather_data(
+    locations: List[str],
+    forcast_days: int = 0,
+    projection: WeatherProjection | str = WeatherProjection.DAILY,
+) -> List[str]:
+    return [
+        format_weather(weather, projection)
+        for weather in await afetch_bulk_weather(locations, forcast_days)
+    ]
 
 
 class WeatherInput(BaseModel):
@@ -60,6 +381,10 @@ class WeatherInput(BaseModel):
         ge=0,
         le=3,
     )
+    projection: WeatherProjection = Field(
+        default=WeatherProjection.DAILY,
+        description="Level of detail: 'current' for current conditions only, 'daily' adds one summary per forecast day, 'hourly' adds the next hours, 'full' returns the raw WeatherAPI response",
+    )
 
 
 class WeatherTool(BaseTool):
@@ -69,5 +394,18 @@ class WeatherTool(BaseTool):
     The data includes temperature, conditions, air quality, and weather alerts if available."""
     args_schema: type[BaseModel] = WeatherInput
 
-    def _run(self, location: str, forcast_days: int = 0) -> str:
-        return get_weather_data(location, forcast_days)
+    def _run(
+        self,
+        location: str,
+        forcast_days: int = 0,
+        projection: WeatherProjection = WeatherProjection.DAILY,
+    ) -> str:
+        return get_weather_data(location, forcast_days, projection)
+
+    async def _arun(
+        self,
+        location: str,
+        forcast_days: int = 0,
+        projection: WeatherProjection = WeatherProjection.DAILY,
+    ) -> str:
+        return await aget_weather_data(location, forcast_days, projection)
@@ -0,0 +1,168 @@
+from enum import Enum
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel
+
+
+class WeatherProjection(str, Enum):
+    # The raw WeatherAPI payload, pretty-printed
+    FULL = "full"
+    # Current conditions only
+    CURRENT = "current"
+    # Current conditions plus one summary per forecast day
+    DAILY = "daily"
+    # Current conditions plus the next few forecast hours
+    HOURLY = "hourly"
+
+
+class CurrentConditions(BaseModel):
+    last_updated: Optional[str] = None
+    condition: Optional[str] = None
+    temp_c: Optional[float] = None
+    temp_f: Optional[float] = None
+    feelslike_c: Optional[float] = None
+    feelslike_f: Optional[float] = None
+    humidity: Optional[int] = None
+    wind_kph: Optional[float] = None
+    wind_mph: Optional[float] = None
+    precip_mm: Optional[float] = None
+    uv: Optional[float] = None
+    us_epa_index: Optional[int] = None
+
+
+class DailyForecast(BaseModel):
+    date: Optional[str] = None
+    condition: Optional[str] = None
+    maxtemp_c: Optional[float] = None
+    maxtemp_f: Optional[float] = None
+    mintemp_c: Optional[float] = None
+    mintemp_f: Optional[float] = None
+    chance_of_rain: Optional[int] = None
+    chance_of_snow: Optional[int] = None
+    totalprecip_mm: Optional[float] = None
+    maxwind_kph: Optional[float] = None
+    uv: Optional[float] = None
+    sunrise: Optional[str] = None
+    sunset: Optional[str] = None
+
+
+class HourlyForecast(BaseModel):
+    time: Optional[str] = None
+    time_epoch: Optional[int] = None
+    condition: Optional[str] = None
+    temp_c: Optional[float] = None
+    temp_f: Optional[float] = None
+    chance_of_rain: Optional[int] = None
+    wind_kph: Optional[float] = None
+
+
+class WeatherReport(BaseModel):
+    location: Optional[str] = None
+    localtime: Optional[str] = None
+    localtime_epoch: Optional[int] = None
+    current: Optional[CurrentConditions] = None
+    daily: List[DailyForecast] = []
+    hourly: List[HourlyForecast] = []
+    alerts: List[str] = []
+
+
+def get_condition_text(values: Dict[str, Any]) -> Optional[str]:
+    return (values.get("condition") or {}).get("text")
+
+
+def parse_weather_payload(payload: Dict[str, Any]) -> WeatherReport:
+    """Parse a WeatherAPI current or forecast payload into a WeatherReport."""
+    location: Dict[str, Any] = payload.get("location") or {}
+    location_name: str = ", ".join(
+        part
+        for part in (
+            location.get("name"),
+            location.get("region"),
+            location.get("country"),
+        )
+        if part
+    )
+
+    current: Optional[CurrentConditions] = None
+    if payload.get("current"):
+        current_values: Dict[str, Any] = payload["current"]
+        current = CurrentConditions.model_validate(
+            {
+                **current_values,
+                "condition": get_condition_text(current_values),
+                "us_epa_index": (current_values.get("air_quality") or {}).get(
+                    "us-epa-index"
+                ),
+            }
+        )
+
+    daily: List[DailyForecast] = []
+    hourly: List[HourlyForecast] = []
+    for forecast_day in (payload.get("forecast") or {}).get("forecastday") or []:
+        day: Dict[str, Any] = forecast_day.get("day") or {}
+        daily.append(
+            DailyForecast.model_validate(
+                {
+                    **day,
+                    **(forecast_day.get("astro") or {}),
+                    "date": forecast_day.get("date"),
+                    "condition": get_condition_text(day),
+                    "chance_of_rain": day.get("daily_chance_of_rain"),
+                    "chance_of_snow": day.get("daily_chance_of_snow"),
+                }
+            )
+        )
+        for hour in forecast_day.get("hour") or []:
+            hourly.append(
+                HourlyForecast.model_validate(
+                    {**hour, "condition": get_condition_text(hour)}
+                )
+            )
+
+    alerts: List[str] = [
+        alert.get("headline") or alert.get("event") or ""
+        for alert in (payload.get("alerts") or {}).get("alert") or []
+    ]
+
+    return WeatherReport(
+        location=location_name or None,
+        localtime=location.get("localtime"),
+        localtime_epoch=location.get("localtime_epoch"),
+        current=current,
+        daily=daily,
+        hourly=hourly,
+        alerts=[alert for alert in alerts if alert],
+    )
+
+
+def project_weather_report(
+    report: WeatherReport,
+    projection: WeatherProjection,
+    hourly_window: int = 12,
+) -> WeatherReport:
+    """Keep only the parts of a report the projection asks for."""
+    if projection == WeatherProjection.CURRENT:
+        return report.model_copy(update={"daily": [], "hourly": []})
+    if projection == WeatherProjection.DAILY:
+        return report.model_copy(update={"hourly": []})
+
+    upcoming_hours: List[HourlyForecast] = report.hourly
+    if report.localtime_epoch is not None:
+        # Include the hour in progress, then the following ones
+        upcoming_hours = [
+            hour
+            for hour in report.hourly
+            if hour.time_epoch is None
+            or hour.time_epoch > report.localtime_epoch - 3600
+        ]
+    return report.model_copy(
+        update={"daily": [], "hourly": upcoming_hours[:hourly_window]}
+    )
+
+
+def format_weather_report(report: WeatherReport) -> str:
+    return report.model_dump_json(
+        exclude_none=True,
+        exclude_defaults=True,
+        exclude={"localtime_epoch": True, "hourly": {"__all__": {"time_epoch"}}},
+    )
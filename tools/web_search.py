@@ -1,10 +1,139 @@
 import json
-from typing import List, Dict, Optional
+from asyncio import to_thread
+from dataclasses import dataclass, field
+from threading import Lock
+from time import sleep
+from typing import Any, List, Dict, Optional, Tuple
 
 from duckduckgo_search import DDGS
+from duckduckgo_search.exceptions import RatelimitException
 from pydantic import BaseModel, Field
 from langchain_core.tools import BaseTool
 
+from caches.ttl_lru import TTLLRUCache, SqliteCacheStore
+from config.envs import SEARCH_CACHE_PATH
+from tools.rate_limit import RateLimiter
+
+# Results for narrow time windows go stale quickly, broad ones barely move
+SEARCH_CACHE_TTLS: Dict[Optional[str], float] = {
+    "d": 15 * 60,
+    "w": 60 * 60,
+    "m": 6 * 60 * 60,
+    "y": 24 * 60 * 60,
+    None: 24 * 60 * 60,
+}
+# DDG answers soft blocks and transient failures with no results, so empty
+# answers are only kept long enough to absorb a burst of retries
+EMPTY_RESULTS_TTL: float = 60
+SEARCH_CACHE_MAX_SIZE: int = 1024
+# DDG starts answering with 202 rate limit errors above roughly one query per
+# second, so bursts are smoothed client-side and retried with backoff
+DDG_RATE_LIMIT: float = 1.0
+DDG_RATE_LIMIT_BURST: int = 3
+DDG_RATE_LIMIT_RETRIES: int = 2
+DDG_RATE_LIMIT_BACKOFF: float = 1.0
+
+search_cache = TTLLRUCache(
+    max_size=SEARCH_CACHE_MAX_SIZE,
+    store=(
+        SqliteCacheStore(SEARCH_CACHE_PATH, namespace="ddg_text_search")
+        if SEARCH_CACHE_PATH
+        else None
+    ),
+)
+ddg_rate_limiter = RateLimiter(rate=DDG_RATE_LIMIT, burst=DDG_RATE_LIMIT_BURST)
+
+
+@dataclass
+class _InflightSearch:
+    lock: Lock = field(default_factory=Lock)
+    # Callers holding or waiting on `lock`; the last one out removes the entry
+    callers: int = 0
+
+
+_inflight_guard: Lock = Lock()
+_inflight_searches: Dict[Tuple[str, str, Optional[str]], _InflightSearch] = {}
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.casefold().split()).rstrip("?!.")
+
+
+def get_search_cache_key(
+    query: str, region: str, time_limit: Optional[str]
+) -> Tuple[str, str, Optional[str]]:
+    return normalize_query(query), region, time_limit
+
+
+def get_cached_results(
+    cache_key: Tuple[str, str, Optional[str]], query_count: int
+) -> Optional[List[Dict[str, str]]]:
+    # An entry fetched with more results also answers smaller requests
+    entry: Optional[Dict[str, Any]] = search_cache.get(cache_key)
+    if entry is not None and entry["query_count"] >= query_count:
+        return entry["results"][:query_count]
+    return None
+
+
+def fetch_ddg_results(
+    query: str,
+    query_count: int,
+    region: str,
+    time_limit: Optional[str],
+) -> List[Dict[str, str]]:
+    for attempt in range(DDG_RATE_LIMIT_RETRIES + 1):
+        ddg_rate_limiter.acquire()
+        try:
+            return DDGS().text(
+                keywords=query,
+                region=region,
+                safesearch="strict",
+                timelimit=time_limit,
+                max_results=query_count,
+            )
+        except RatelimitException:
+            if attempt == DDG_RATE_LIMIT_RETRIES:
+                raise
+            sleep(DDG_RATE_LIMIT_BACKOFF * 2**attempt)
+
+
+def fetch_and_cache_results(
+    cache_key: Tuple[str, str, Optional[str]],
+    query: str,
+    query_count: int,
+    region: str,
+    time_limit: Optional[str],
+) -> List[Dict[str, str]]:
+    # Identical concurrent searches wait for the first one to fill the cache
+    # instead of each spending a request against the rate limit
+    with _inflight_guard:
+        inflight: _InflightSearch = _inflight_searches.setdefault(
+            cache_key, _InflightSearch()
+        )
+        inflight.callers += 1
+    try:
+        with inflight.lock:
+            results: Optional[List[Dict[str, str]]] = get_cached_results(
+                cache_key, query_count
+            )
+            if results is None:
+                results = fetch_ddg_results(query, query_count, region, time_limit)
+                search_cache.set(
+                    cache_key,
+                    {"query_count": query_count, "results": results},
+                    ttl=(
+                        SEARCH_CACHE_TTLS.get(time_limit, SEARCH_CACHE_TTLS[None])
+                        if results
+                        else EMPTY_RESULTS_TTL
+                    ),
+                )
+            return results
+    finally:
+        with _inflight_guard:
+            inflight.callers -= 1
+            if inflight.callers == 0:
+                del _inflight_searches[cache_key]
+
 
 def ddg_text_search(
     query: str,
@@ -20,15 +149,22 @@ def ddg_text_search(
         query_count: Number of results to return (3-10)
         region: Region code for search results (e.g., "us-en", "uk-en")
         time_limit: Time filter ("d" for day, "w" for week, "m" for month, "y" for year)
+
+    Results are cached per normalized query, region and time limit. Entries
+    expire sooner for narrow time limits, and a cached entry with more
+    results also serves requests for fewer.
     """
+    cache_key: Tuple[str, str, Optional[str]] = get_search_cache_key(
+        query, region, time_limit
+    )
     try:
-        results: List[Dict[str, str]] = DDGS().text(
-            keywords=query,
-            region=region,
-            safesearch="strict",
-            timelimit=time_limit,
-            max_results=query_count,
+        results: Optional[List[Dict[str, str]]] = get_cached_results(
+            cache_key, query_count
         )
+        if results is None:
+            results = fetch_and_cache_results(
+                cache_key, query, query_count, region, time_limit
+            )
         return json.dumps(
             {"status": "success", "query": query, "results": results}, indent=2
         )
@@ -38,6 +174,27 @@ def ddg_text_search(
         )
 
 
+async def addg_text_search(
+    query: str,
+    query_count: int = 3,
+    region: str = "wt-wt",
+    time_limit: Optional[str] = None,
+) -> str:
+    """
+    Non-blocking variant of `ddg_text_search`.
+
+    DDGS has no async client, so the search runs on the default thread pool
+    to keep the event loop free for other conversations.
+    """
+    return await to_thread(
+        ddg_text_search,
+        query=query,
+        query_count=query_count,
+        region=region,
+        time_limit=time_limit,
+    )
+
+
 class DDGTextSearchInput(BaseModel):
     query: str = Field(description="The search query to use for the text search")
     query_count: int = Field(
@@ -74,3 +231,14 @@ class DDGTextSearchTool(BaseTool):
         return ddg_text_search(
             query=query, query_count=query_count, region=region, time_limit=time_limit
         )
+
+    async def _arun(
+        self,
+        query: str,
+        query_count: int = 3,
+        region: str = "wt-wt",
+        time_limit: Optional[str] = None,
+    ) -> str:
+        return await addg_text_search(
+            query=query, query_count=query_count, region=region, time_limit=time_limit
+        )